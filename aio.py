@@ -0,0 +1,182 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Awaitable Matrix operations for asyncio programs
+
+Large products and transposes run on an executor so the event loop
+stays responsive. The work is split into blocks of rows, each block is
+a separate executor call, and cancelling the awaiting task stops before
+the next block. A block already running finishes but its result is
+dropped.
+
+>>> import asyncio
+>>> m1 = Matrix([[1, 2], [3, 4]])
+>>> asyncio.run(m1.amul(m1))
+Matrix([[7, 10],
+        [15, 22]])
+>>> asyncio.run(multiplyMany([(m1, m1), (m1, m1.transpose())]))
+[Matrix([[7, 10],
+        [15, 22]]), Matrix([[5, 11],
+        [11, 25]])]
+
+The executor is EXECUTOR, or the default executor of the event loop if
+it is None, unless one is passed in. A thread executor keeps the loop
+responsive. A process executor runs the blocks in parallel but pickles
+the arguments of every call: for a product the rows of the block and
+the whole right operand, for a transpose only the columns of the block.
+Those are first copied into lists on the event loop.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import dtypes
+import kernels
+from matrix import Matrix, MatrixSizeError, TransposedMatrix
+
+# Executor used when none is given, None for the default executor of
+# the event loop.
+EXECUTOR = None
+
+# Number of rows computed per executor call.
+BLOCK_ROWS = 64
+
+def _portable(rows, executor):
+    """ Return rows that can be sent to the executor """
+    if isinstance(executor, ProcessPoolExecutor):
+        return [list(row) for row in rows]
+    return rows
+
+def _multiplyBlock(block, right, transposed):
+    """ Multiply a block of rows by the right operand """
+    if transposed:
+        return kernels.multiplyTransposed(block, right)
+    return kernels.multiply(block, right)
+
+def _transposeBlock(rows, start, stop):
+    """ Return the columns start to stop of the rows as rows """
+    return [[row[j] for row in rows] for j in range(start, stop)]
+
+def _multiplyAll(pairs):
+    """ Multiply each (left rows, right rows, transposed) triple """
+    return [_multiplyBlock(left, right, transposed)
+            for left, right, transposed in pairs]
+
+def _operand(matrix):
+    """ Return the rows of a right operand and whether they are columns """
+    if isinstance(matrix, TransposedMatrix):
+        return matrix._base._elements, True
+    return matrix._elements, False
+
+async def multiply(a, b, executor=None, blockRows=None):
+    """ Multiply the Matrix a by the Matrix b on an executor
+
+    Args:
+        a: Matrix, the left operand.
+        b: Matrix, the right operand.
+        executor: concurrent.futures executor, defaults to EXECUTOR.
+        blockRows: rows per executor call, defaults to BLOCK_ROWS.
+
+    Returns:
+        The product as a new Matrix.
+    """
+    if a.nColumns() != b.nRows():
+        raise MatrixSizeError('columns of the left Matrix must '
+                              'match rows of the right Matrix')
+    executor = executor or EXECUTOR
+    blockRows = blockRows or BLOCK_ROWS
+    loop = asyncio.get_running_loop()
+    right, transposed = _operand(b)
+    right = _portable(right, executor)
+    left = a._elements
+    rows = []
+    for start in range(0, len(left), blockRows):
+        block = _portable(left[start:start + blockRows], executor)
+        rows.extend(await loop.run_in_executor(
+            executor, _multiplyBlock, block, right, transposed))
+    return a._new(rows, dtypes.promote(a._dtype, b._dtype))
+
+async def transpose(a, executor=None, blockRows=None):
+    """ Return the transpose of the Matrix a as a new Matrix
+
+    Unlike Matrix.transpose, which returns a view at once, the elements
+    are copied, one block of rows of the result per executor call.
+
+    Args:
+        a: Matrix.
+        executor: concurrent.futures executor, defaults to EXECUTOR.
+        blockRows: rows of the result per executor call, defaults to
+                   BLOCK_ROWS.
+    """
+    executor = executor or EXECUTOR
+    blockRows = blockRows or BLOCK_ROWS
+    loop = asyncio.get_running_loop()
+    source = a._elements
+    process = isinstance(executor, ProcessPoolExecutor)
+    rows = []
+    for start in range(0, a.nColumns(), blockRows):
+        stop = min(start + blockRows, a.nColumns())
+        if process:
+            # Send only the columns of this block to the process.
+            block = [list(row[start:stop]) for row in source]
+            rows.extend(await loop.run_in_executor(
+                executor, _transposeBlock, block, 0, stop - start))
+        else:
+            rows.extend(await loop.run_in_executor(
+                executor, _transposeBlock, source, start, stop))
+    return a._new(rows, a._dtype)
+
+async def multiplyMany(pairs, executor=None):
+    """ Multiply many pairs of matrices in a single executor call
+
+    Small products cost less together than the executor round trips of
+    one call each.
+
+    Args:
+        pairs: iterable of (left, right) Matrix pairs.
+        executor: concurrent.futures executor, defaults to EXECUTOR.
+
+    Returns:
+        A list of the products in the order of the pairs.
+    """
+    executor = executor or EXECUTOR
+    pairs = list(pairs)
+    work = []
+    for a, b in pairs:
+        if a.nColumns() != b.nRows():
+            raise MatrixSizeError('columns of the left Matrix must '
+                                  'match rows of the right Matrix')
+        right, transposed = _operand(b)
+        work.append((_portable(a._elements, executor),
+                     _portable(right, executor), transposed))
+    loop = asyncio.get_running_loop()
+    products = await loop.run_in_executor(executor, _multiplyAll, work)
+    return [a._new(rows, dtypes.promote(a._dtype, b._dtype))
+            for (a, b), rows in zip(pairs, products)]
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
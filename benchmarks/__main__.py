@@ -0,0 +1,85 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Command line interface of the benchmarks """
+import argparse
+import random
+import sys
+from benchmarks import cases, runner
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the vector, matrix and point operations.')
+    parser.add_argument('cases', nargs='*', metavar='case',
+                        help='cases to run, all by default: %s'
+                             % ', '.join(sorted(cases.CASES)))
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        help='sizes to sweep instead of the defaults')
+    parser.add_argument('--repeat', type=int,
+                        help='timed calls per size instead of --min-time')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='seconds to time each size for (default 0.2)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed of the operands (default 0)')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='compare against results saved with --output')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slow down reported as a regression '
+                             '(default 0.1)')
+    options = parser.parse_args(arguments)
+
+    names = options.cases or sorted(cases.CASES)
+    for name in names:
+        if name not in cases.CASES:
+            parser.error('unknown case %r' % name)
+
+    random.seed(options.seed)
+    results = {}
+    for name in names:
+        results[name] = {}
+        for size in options.sizes or cases.SIZES[name]:
+            function = cases.CASES[name](size)
+            results[name][str(size)] = runner.measure(
+                function, options.repeat, options.min_time)
+    print(runner.formatResults(results))
+
+    if options.output:
+        runner.save(results, options.output)
+    if options.compare:
+        rows = runner.compare(results, runner.load(options.compare),
+                              options.threshold)
+        print('')
+        print(runner.formatComparison(rows))
+        if any(regression for case, size, ratio, regression in rows):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" The benchmark cases
+
+Each case takes a size and returns a function of no arguments running
+the operation once on operands of that size.
+"""
+import random
+from vector import Vector
+from matrix import Matrix
+import kernels
+from point import Point
+
+def _numbers(size):
+    return [random.random() for i in range(size)]
+
+def _matrix(size, storage=None):
+    return Matrix([_numbers(size) for i in range(size)], storage=storage)
+
+def vectorDot(size):
+    """ Vector * Vector of length size """
+    a = Vector(_numbers(size))
+    b = Vector(_numbers(size))
+    return lambda: a * b
+
+def vectorAdd(size):
+    """ Vector + Vector of length size """
+    a = Vector(_numbers(size))
+    b = Vector(_numbers(size))
+    return lambda: a + b
+
+def matrixMul(size):
+    """ Matrix * Matrix of size by size list storage """
+    a = _matrix(size)
+    b = _matrix(size)
+    return lambda: a * b
+
+def matrixMulArray(size):
+    """ Matrix * Matrix of size by size array storage """
+    a = _matrix(size, 'array')
+    b = _matrix(size, 'array')
+    return lambda: a * b
+
+def blockedKernel(size):
+    """ kernels.blockedMultiply of size by size rows """
+    a = [_numbers(size) for i in range(size)]
+    columns = list(zip(*a))
+    return lambda: kernels.blockedMultiply(a, columns)
+
+def strassenKernel(size):
+    """ kernels.strassenMultiply of size by size rows """
+    a = [_numbers(size) for i in range(size)]
+    return lambda: kernels.strassenMultiply(a, a)
+
+def matrixVector(size):
+    """ Matrix * Vector of size by size """
+    a = _matrix(size)
+    b = Vector(_numbers(size))
+    return lambda: a * b
+
+def matrixTranspose(size):
+    """ Matrix.transpose of size by size, materialized """
+    a = _matrix(size)
+    return lambda: a.transpose().materialize()
+
+def pointAdd(size):
+    """ Point + Point of dimension size """
+    a = Point(_numbers(size))
+    b = Point(_numbers(size))
+    return lambda: a + b
+
+CASES = {
+    'vector.dot': vectorDot,
+    'vector.add': vectorAdd,
+    'matrix.mul': matrixMul,
+    'matrix.mul.array': matrixMulArray,
+    'kernels.blocked': blockedKernel,
+    'kernels.strassen': strassenKernel,
+    'matrix.vector': matrixVector,
+    'matrix.transpose': matrixTranspose,
+    'point.add': pointAdd,
+}
+
+# Sizes used when none are given, per case.
+SIZES = {
+    'vector.dot': [10, 1000, 100000],
+    'vector.add': [10, 1000, 100000],
+    'matrix.mul': [10, 50, 100],
+    'matrix.mul.array': [10, 50, 100],
+    'kernels.blocked': [128, 256],
+    'kernels.strassen': [128, 256],
+    'matrix.vector': [10, 100, 500],
+    'matrix.transpose': [10, 100, 500],
+    'point.add': [3, 100, 10000],
+}
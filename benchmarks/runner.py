@@ -0,0 +1,170 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Timing, reporting and comparison of benchmark results """
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+def measure(function, repeat=None, minTime=0.2):
+    """ Time calls of the function
+
+    The function is called repeat times, or until minTime seconds have
+    passed when repeat is None, after one warm up call. The peak memory
+    is taken from one more call traced by tracemalloc.
+
+    >>> result = measure(lambda: sum(range(10)), repeat=5)
+    >>> result['calls']
+    5
+    >>> sorted(result)
+    ['calls', 'max', 'mean', 'min', 'opsPerSecond', 'p50', 'p90', 'p99', 'peakBytes']
+
+    Args:
+        function: function of no arguments to time.
+        repeat: number of timed calls.
+        minTime: seconds to keep timing for when repeat is None.
+
+    Returns:
+        A dict of the statistics, times are in seconds.
+    """
+    function()
+    timings = []
+    clock = time.perf_counter
+    started = clock()
+    while True:
+        start = clock()
+        function()
+        timings.append(clock() - start)
+        if repeat is None:
+            if clock() - started >= minTime and len(timings) >= 3:
+                break
+        elif len(timings) >= repeat:
+            break
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    return {
+        'calls': len(timings),
+        'mean': mean,
+        'min': timings[0],
+        'max': timings[-1],
+        'p50': percentile(timings, 50),
+        'p90': percentile(timings, 90),
+        'p99': percentile(timings, 99),
+        'opsPerSecond': 1.0 / mean if mean else float('inf'),
+        'peakBytes': peak,
+    }
+
+def percentile(timings, percent):
+    """ Return the percentile of sorted timings by linear interpolation
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2.5
+    """
+    position = (len(timings) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(timings) - 1)
+    return timings[lower] + (timings[upper] - timings[lower]) * (position - lower)
+
+def environment():
+    """ Return a description of the machine running the benchmarks """
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def save(results, path):
+    """ Save the results with a description of the machine as JSON """
+    with open(path, 'w') as output:
+        json.dump({'environment': environment(), 'results': results},
+                  output, indent=2, sort_keys=True)
+
+def load(path):
+    """ Load results saved by save """
+    with open(path) as source:
+        return json.load(source)['results']
+
+def compare(results, baseline, threshold=0.1):
+    """ Compare the mean times of results against a baseline
+
+    >>> rows = compare({'a': {'10': {'mean': 2.0}}},\
+                       {'a': {'10': {'mean': 1.0}}})
+    >>> rows
+    [('a', '10', 2.0, True)]
+
+    Args:
+        results: results of this run, by case and size.
+        baseline: earlier results, by case and size.
+        threshold: relative slow down counted as a regression.
+
+    Returns:
+        A list of (case, size, ratio of the times, regression) tuples
+        for the cases and sizes found in both.
+    """
+    rows = []
+    for case in sorted(results):
+        for size in sorted(results[case], key=int):
+            before = baseline.get(case, {}).get(size)
+            if before is None:
+                continue
+            ratio = results[case][size]['mean'] / before['mean']
+            rows.append((case, size, ratio, ratio > 1 + threshold))
+    return rows
+
+def formatResults(results):
+    """ Return the results as a text table """
+    lines = ['%-20s %8s %14s %12s %12s %12s %12s' % (
+        'case', 'size', 'ops/sec', 'p50 (us)', 'p90 (us)', 'p99 (us)',
+        'peak (KiB)')]
+    for case in sorted(results):
+        for size in sorted(results[case], key=int):
+            stats = results[case][size]
+            lines.append('%-20s %8s %14.1f %12.1f %12.1f %12.1f %12.1f' % (
+                case, size, stats['opsPerSecond'], stats['p50'] * 1e6,
+                stats['p90'] * 1e6, stats['p99'] * 1e6,
+                stats['peakBytes'] / 1024.0))
+    return '\n'.join(lines)
+
+def formatComparison(rows):
+    """ Return compared results as a text table """
+    lines = ['%-20s %8s %10s' % ('case', 'size', 'time ratio')]
+    for case, size, ratio, regression in rows:
+        lines.append('%-20s %8s %10.2f%s' % (
+            case, size, ratio, '  REGRESSION' if regression else ''))
+    return '\n'.join(lines)
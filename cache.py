@@ -0,0 +1,384 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Opt-in memoization of expensive Matrix results
+
+While enabled the methods named in TARGETS are replaced by wrappers
+that keep their results in a bounded least recently used cache. The
+key is a fingerprint of the contents of the matrix and of the
+arguments, so a bit identical matrix built again reuses the results of
+the first. Disabling puts the original methods back.
+
+>>> enable()
+>>> m1 = Matrix([[2, 1], [1, 3]])
+>>> m1.inverse()
+Matrix([[0.6, -0.2],
+        [-0.2, 0.4]])
+>>> Matrix([[2, 1], [1, 3]]).inverse()
+Matrix([[0.6, -0.2],
+        [-0.2, 0.4]])
+>>> stats()['hits'], stats()['misses']
+(1, 1)
+>>> m1[0] = [4, 1]
+>>> m1.inverse()
+Matrix([[0.2727272727272727, -0.09090909090909091],
+        [-0.09090909090909091, 0.36363636363636365]])
+>>> stats()['misses']
+2
+>>> disable()
+>>> clear()
+
+A fingerprint is a hash of the elements, taken once per version of the
+matrix (see Matrix.version), so setting rows and in place arithmetic
+are seen. Writes through row Vectors do not change the version; call
+invalidate on such a matrix. Every hit returns a copy of the cached
+result, so callers may change what they get back.
+
+Only the outermost call is memoized: products made inside a cached
+inverse or power are not kept. Products by scalars and Vectors cost
+about as much as their fingerprint and are not cached.
+"""
+from collections import OrderedDict
+from functools import wraps
+from hashlib import blake2b
+from array import array
+from numbers import Number
+import threading
+import weakref
+import storage
+from vector import Vector
+from matrix import Matrix, TransposedMatrix
+
+# Methods wrapped while the cache is enabled, per class.
+TARGETS = {
+    Matrix: ('__mul__', '__pow__', 'inverse', 'lu', 'solve', 'det', 'exp',
+             'eigenvalues', 'eigen', 'svd'),
+    TransposedMatrix: ('materialize',),
+}
+
+# Most results kept, least recently used first out.
+MAX_ENTRIES = 128
+
+# Most elements kept over all the Vectors and Matrices in the results.
+# A single result larger than this is never kept.
+MAX_ELEMENTS = 1 << 20
+
+# Results by key, (result, elements, digests). The digests are the
+# fingerprints of the matrices in the key.
+_entries = OrderedDict()
+
+# Fingerprints of matrices by id, (reference, version, digest).
+_fingerprints = {}
+
+# hits, misses, evictions and elements held.
+_counters = [0, 0, 0, 0]
+
+# Original methods, (class, name, method), while enabled.
+_originals = []
+
+# Set while a memoized call is running on the thread.
+_local = threading.local()
+
+# Guards _entries and _counters, memoized methods may run on several
+# threads, for example in the executors of the aio module.
+_lock = threading.Lock()
+
+def _digest(header, elements, typecode):
+    """ Return a hash of the elements and a header naming their layout """
+    h = blake2b(header.encode(), digest_size=16)
+    if typecode is not None:
+        if not isinstance(elements, (array, memoryview)):
+            elements = array(typecode, elements)
+        h.update(memoryview(elements).cast('B'))
+    else:
+        # Hash the values, the repr of a row object may hold an address.
+        for row in elements:
+            h.update(repr(list(row)).encode())
+    return h.digest()
+
+def _matrixDigest(matrix):
+    """ Return the fingerprint of a Matrix, once per version """
+    entry = _fingerprints.get(id(matrix))
+    version = matrix.version()
+    if entry is not None and entry[0]() is matrix and entry[1] == version:
+        return entry[2]
+    dtype = matrix._dtype
+    typecode = dtype.typecode if dtype is not None else None
+    header = '%dx%d %s %s' % (matrix.nRows(), matrix.nColumns(), dtype,
+                              matrix._storage)
+    if matrix._data is not None:
+        digest = _digest(header, matrix._data, typecode)
+    elif typecode is not None:
+        digest = _digest(header, storage.flatten(matrix._elements, typecode),
+                         typecode)
+    else:
+        digest = _digest(header, matrix._elements, None)
+    key = id(matrix)
+    reference = weakref.ref(matrix, lambda reference:
+                            _fingerprints.pop(key, None))
+    _fingerprints[key] = (reference, version, digest)
+    return digest
+
+def fingerprint(value):
+    """ Return a hashable fingerprint of a Matrix, Vector or number
+
+    Matrices with the same shape, dtype, storage and elements have the
+    same fingerprint, as do their transposes.
+
+    >>> fingerprint(Matrix([[1, 2]])) == fingerprint(Matrix([[1, 2]]))
+    True
+    >>> fingerprint(Matrix([[1, 2]])) == fingerprint(Matrix([[1, 2.5]]))
+    False
+    >>> fingerprint([1, 2]) is None
+    True
+
+    Only the values count, not the objects holding the rows:
+    >>> m1 = Matrix(Matrix([[2, 1], [1, 3]]).T)
+    >>> m2 = Matrix(Matrix([[3, 1], [1, 3]]).T)
+    >>> fingerprint(m1) == fingerprint(m2)
+    False
+    >>> fingerprint(m1) == fingerprint(Matrix([[2, 1], [1, 3]]))
+    True
+    >>> enable()
+    >>> [Matrix(Matrix([[i + 2, 1], [1, 3]]).T).det() for i in range(4)]
+    [5.0, 8.0, 11.0, 14.0]
+    >>> disable()
+    >>> clear()
+
+    Args:
+        value: Matrix, Vector, number or None.
+
+    Returns:
+        A tuple, or None for a value that can not be fingerprinted.
+    """
+    if isinstance(value, TransposedMatrix):
+        return ('T', _matrixDigest(value._base))
+    if isinstance(value, Matrix):
+        return ('M', _matrixDigest(value))
+    if isinstance(value, Vector):
+        dtype = value._dtype
+        typecode = dtype.typecode if dtype is not None else None
+        elements = value._elements
+        if typecode is None:
+            elements = [elements]
+        return (type(value).__name__,
+                _digest('%d %s' % (len(value), dtype), elements, typecode))
+    if value is None or isinstance(value, (Number, str)):
+        return (type(value).__name__, value)
+    return None
+
+def _key(name, self, args, kwargs):
+    """ Return the key of a call and its matrix digests, None if uncached """
+    parts = [fingerprint(self)]
+    parts.extend(fingerprint(arg) for arg in args)
+    names = sorted(kwargs)
+    parts.extend(fingerprint(kwargs[key]) for key in names)
+    if None in parts:
+        return None, None
+    digests = frozenset(part[1] for part in parts if part[0] in ('M', 'T'))
+    return (name, tuple(parts), tuple(names)), digests
+
+def _size(value):
+    """ Return the number of elements held by a result """
+    if isinstance(value, Matrix):
+        return value.nRows() * value.nColumns()
+    if isinstance(value, Vector):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(map(_size, value))
+    return 1
+
+def _copy(value):
+    """ Return a copy of a result which shares no mutable elements """
+    if isinstance(value, Matrix):
+        return value.materialize()._clone()
+    if isinstance(value, Vector):
+        elements = value._elements
+        if isinstance(elements, memoryview):
+            elements = array(elements.format, elements)
+        else:
+            elements = elements[:]
+        return type(value)._wrap(elements, value._dtype)
+    if isinstance(value, list):
+        return list(map(_copy, value))
+    if isinstance(value, tuple):
+        return tuple(map(_copy, value))
+    return value
+
+def _lookup(key):
+    """ Return the cached result of key, or None, counting a hit or miss """
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            _counters[1] += 1
+            return None
+        _entries.move_to_end(key)
+        _counters[0] += 1
+    return entry
+
+def _store(key, result, digests):
+    """ Keep a result, evicting the least recently used as needed """
+    size = _size(result)
+    if MAX_ENTRIES <= 0 or size > MAX_ELEMENTS:
+        return
+    result = _copy(result)
+    with _lock:
+        if key in _entries:
+            _drop(key)
+        _entries[key] = (result, size, digests)
+        _counters[3] += size
+        while len(_entries) > MAX_ENTRIES or _counters[3] > MAX_ELEMENTS:
+            _drop(next(iter(_entries)))
+            _counters[2] += 1
+
+def _drop(key):
+    """ Forget the entry of key, the caller holds _lock """
+    result, size, digests = _entries.pop(key)
+    _counters[3] -= size
+
+def _memoize(name, method, cacheable):
+    """ Return a wrapper of method keeping its results under name """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if getattr(_local, 'active', False) or \
+                not cacheable(self, args, kwargs):
+            return method(self, *args, **kwargs)
+        key, digests = _key(name, self, args, kwargs)
+        if key is None:
+            return method(self, *args, **kwargs)
+        entry = _lookup(key)
+        if entry is not None:
+            return _copy(entry[0])
+        _local.active = True
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _local.active = False
+        if result is not NotImplemented:
+            _store(key, result, digests)
+        return result
+    return wrapper
+
+def _always(self, args, kwargs):
+    return True
+
+def _matrixOperand(self, args, kwargs):
+    """ Only products of two matrices are worth caching """
+    return len(args) == 1 and isinstance(args[0], Matrix)
+
+# Methods only cached for some arguments.
+_CACHEABLE = {'__mul__': _matrixOperand}
+
+def enable():
+    """ Replace the methods in TARGETS by memoizing wrappers
+
+    Enabling again while enabled does nothing. When used together with
+    the instrument module, disable the two in the reverse order of
+    enabling them.
+    """
+    if _originals:
+        return
+    for cls, names in TARGETS.items():
+        for name in names:
+            method = cls.__dict__.get(name)
+            if method is None or not callable(method):
+                continue
+            _originals.append((cls, name, method))
+            setattr(cls, name,
+                    _memoize(cls.__name__ + '.' + name, method,
+                             _CACHEABLE.get(name, _always)))
+
+def disable():
+    """ Put the original methods back
+
+    The cached results are kept for the next enable, see clear.
+    """
+    while _originals:
+        cls, name, method = _originals.pop()
+        setattr(cls, name, method)
+
+def isEnabled():
+    """ Return True if the methods are memoized """
+    return bool(_originals)
+
+def invalidate(matrix):
+    """ Forget the results computed from a matrix
+
+    Needed after writing elements through its row Vectors, which does
+    not change the version of the matrix. The matrix is given a new
+    version, so the results it keeps itself are recomputed as well.
+
+    >>> enable()
+    >>> m1 = Matrix([[2, 0], [0, 2]])
+    >>> m1.det()
+    4
+    >>> m1[0][0] = 3
+    >>> invalidate(m1)
+    >>> m1.det()
+    6
+    >>> disable()
+    >>> clear()
+
+    Args:
+        matrix: Matrix, or a transposed view of one.
+    """
+    if isinstance(matrix, TransposedMatrix):
+        matrix = matrix._base
+    matrix._touch()
+    entry = _fingerprints.pop(id(matrix), None)
+    if entry is None or entry[0]() is not matrix:
+        return
+    digest = entry[2]
+    with _lock:
+        for key in [key for key, (result, size, digests)
+                    in _entries.items() if digest in digests]:
+            _drop(key)
+
+def clear():
+    """ Forget every cached result and reset the statistics """
+    with _lock:
+        _entries.clear()
+        _fingerprints.clear()
+        _counters[:] = [0, 0, 0, 0]
+
+def stats():
+    """ Return the statistics of the cache
+
+    Returns:
+        A dict of 'hits', 'misses', 'evictions', 'entries' and
+        'elements', the elements held by the cached results.
+    """
+    with _lock:
+        hits, misses, evictions, elements = _counters
+        entries = len(_entries)
+    return {'hits': hits, 'misses': misses, 'evictions': evictions,
+            'entries': entries, 'elements': elements}
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
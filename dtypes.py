@@ -0,0 +1,242 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Numeric element types for Vector and Matrix
+
+A Vector or Matrix with a dtype holds elements of that one type only.
+Types with an array typecode are kept in arrays of that typecode, so
+float32 elements take half the memory of float64 elements, and
+arithmetic between typed operands promotes to the wider type.
+
+>>> promote(int64, float32).name
+'float64'
+>>> promote(float64, complex128).name
+'complex128'
+"""
+from array import array
+from numbers import Integral, Number
+
+class DType(object):
+    """ A numeric element type """
+
+    def __init__(self, name, typecode, kind, rank, scalar):
+        """ Construct a DType
+
+        Args:
+            name: name of the type.
+            typecode: array typecode storing the type, None if arrays
+                      can not store it.
+            kind: 'i' for integers, 'f' for floats or 'c' for complex.
+            rank: position in the promotion order.
+            scalar: Python type of a single element.
+        """
+        self.name = name
+        self.typecode = typecode
+        self.kind = kind
+        self.rank = rank
+        self.scalar = scalar
+
+    def __repr__(self):
+        return self.name
+
+    def convert(self, values):
+        """ Return the values converted to this type as a list
+
+        Conversion goes through an array when the type has a typecode,
+        which rounds float32 elements and range checks int64 elements.
+
+        >>> float32.convert([0.1])
+        [0.10000000149011612]
+        >>> int64.convert([2 ** 63])
+        Traceback (most recent call last):
+            ...
+        OverflowError: int too big to convert
+
+        Args:
+            values: iterable of numbers.
+        """
+        if self.typecode is not None:
+            return array(self.typecode, values).tolist()
+        return list(map(self.scalar, values))
+
+    def store(self, values):
+        """ Return the values in the storage of this type
+
+        Types with a typecode are stored in an array, others in a list.
+
+        >>> int64.store([1, 2])
+        array('q', [1, 2])
+        >>> complex128.store([1, 2])
+        [(1+0j), (2+0j)]
+        """
+        if self.typecode is not None:
+            return array(self.typecode, values)
+        return list(map(self.scalar, values))
+
+int64 = DType('int64', 'q', 'i', 0, int)
+float32 = DType('float32', 'f', 'f', 1, float)
+float64 = DType('float64', 'd', 'f', 2, float)
+complex128 = DType('complex128', None, 'c', 3, complex)
+
+DTYPES = dict((dtype.name, dtype)
+              for dtype in (int64, float32, float64, complex128))
+
+_TYPECODES = {'q': int64, 'f': float32, 'd': float64}
+
+def dtype(value):
+    """ Return the DType named by value, or None for None
+
+    >>> dtype('float32')
+    float32
+    >>> dtype(float64)
+    float64
+    >>> dtype('int8')
+    Traceback (most recent call last):
+        ...
+    ValueError: unknown dtype 'int8'
+    """
+    if value is None or isinstance(value, DType):
+        return value
+    try:
+        return DTYPES[value]
+    except KeyError:
+        raise ValueError('unknown dtype %r' % (value,))
+
+def fromTypecode(typecode):
+    """ Return the DType stored by an array typecode, None if there is none
+
+    >>> fromTypecode('d')
+    float64
+    """
+    return _TYPECODES.get(typecode)
+
+def promote(a, b):
+    """ Return the type of the result of arithmetic on two types
+
+    Untyped (None) operands give an untyped result. int64 with float32
+    promotes to float64 so no integer precision is lost.
+
+    >>> promote(int64, int64)
+    int64
+    >>> promote(int64, float32)
+    float64
+    >>> promote(float32, None) is None
+    True
+    """
+    if a is None or b is None:
+        return None
+    if a.rank < b.rank:
+        a, b = b, a
+    if a is float32 and b is int64:
+        return float64
+    return a
+
+def floating(dtype):
+    """ Return the type of a result that can not stay an integer
+
+    >>> floating(int64)
+    float64
+    >>> floating(float32)
+    float32
+    """
+    if dtype is int64:
+        return float64
+    return dtype
+
+def promoteScalar(dtype, scalar):
+    """ Return the type of the result of arithmetic with a scalar
+
+    A scalar only widens the type if it is of a higher kind, so a
+    float32 matrix times a float stays float32.
+
+    >>> promoteScalar(float32, 2.5)
+    float32
+    >>> promoteScalar(int64, 2.5)
+    float64
+    >>> promoteScalar(float64, 1j)
+    complex128
+    """
+    if dtype is None or not isinstance(scalar, Number):
+        return dtype
+    if isinstance(scalar, complex):
+        return complex128
+    if isinstance(scalar, float) and dtype.kind == 'i':
+        return float64
+    return dtype
+
+def ofValues(values):
+    """ Return the dtype plain Python numbers would need, None if unknown
+
+    >>> ofValues([1, 2]), ofValues([1, 2.5]), ofValues([1j, 2.5])
+    (int64, float64, complex128)
+    >>> ofValues(['a']) is None
+    True
+    """
+    dtype = None
+    for value in values:
+        if isinstance(value, complex):
+            return complex128
+        if isinstance(value, float):
+            dtype = float64
+        elif isinstance(value, Integral):
+            if dtype is None:
+                dtype = int64
+        else:
+            return None
+    return dtype
+
+# Kinds in the order a store may not go up, see checkStore.
+_KINDS = 'ifc'
+
+def checkStore(target, dtype):
+    """ Raise TypeError unless results of dtype can be written as target
+
+    In place arithmetic writes into the existing storage. A result may
+    be rounded to a narrower type of its kind, float64 into float32,
+    but an integer store can not take floats and only complex128 can
+    take complex numbers. Untyped targets or results are not checked.
+
+    >>> checkStore(float32, float64)
+    >>> checkStore(int64, float64)
+    Traceback (most recent call last):
+        ...
+    TypeError: result dtype float64 cannot be stored in int64
+
+    Args:
+        target: DType of the storage written into, or None.
+        dtype: DType of the result, or None.
+    """
+    if target is None or dtype is None:
+        return
+    if _KINDS.index(dtype.kind) > _KINDS.index(target.kind):
+        raise TypeError('result dtype %s cannot be stored in %s'
+                        % (dtype.name, target.name))
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,292 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Lazy arithmetic expressions for Vector and Matrix
+
+Arithmetic on an Expression builds a tree instead of computing the
+result. Evaluating the tree compiles it into a single function of one
+element from each operand and maps that function once over the
+operands, so chained operations allocate no intermediate vectors or
+matrices.
+
+>>> from vector import Vector
+>>> a = Vector([1, 2, 3])
+>>> b = Vector([10, 20, 30])
+>>> c = Vector([1, 1, 1])
+>>> (a.lazy() + b - c.lazy() * 2).evaluate()
+Vector([9, 20, 31])
+"""
+from numbers import Number
+from array import array
+from itertools import repeat
+import dtypes
+import storage
+import vector
+import matrix
+
+# Compiled element functions keyed by the source of the expression.
+_compiled = {}
+
+class Expression(object):
+    """ Node of a lazy Vector or Matrix expression """
+
+    def __add__(self, other):
+        return Operation('+', self, _wrap(other))
+
+    def __radd__(self, other):
+        return Operation('+', _wrap(other), self)
+
+    def __sub__(self, other):
+        return Operation('-', self, _wrap(other))
+
+    def __rsub__(self, other):
+        return Operation('-', _wrap(other), self)
+
+    def __mul__(self, other):
+        """ Scale the expression by a scalar
+
+        >>> from vector import Vector
+        >>> (Vector([1, 2]).lazy() * 3).evaluate()
+        Vector([3, 6])
+        """
+        return Operation('*', self, _scalar(other))
+
+    def __rmul__(self, other):
+        return Operation('*', _scalar(other), self)
+
+    def __truediv__(self, other):
+        return Operation('/', self, _scalar(other))
+
+    def __neg__(self):
+        return Negation(self)
+
+    def __iter__(self):
+        """ Iterate over the evaluated elements of a Vector expression
+
+        >>> from vector import Vector
+        >>> Vector(Vector([1, 2]).lazy() + Vector([3, 4]))
+        Vector([4, 6])
+        """
+        if len(self.shape) != 1:
+            raise TypeError('only Vector expressions can be iterated')
+        function, leaves, constants = self.compile()
+        return map(function, *_operands(leaves, constants, '_elements'))
+
+    def compile(self):
+        """ Compile the expression into a function of one element per leaf
+
+        The function takes one element of every leaf followed by the
+        constants, so expressions of the same form share one function.
+
+        >>> from vector import Vector
+        >>> a = Vector([1, 2])
+        >>> function, leaves, constants = (a.lazy() * 2 + a).compile()
+        >>> function(5, 2)
+        15
+        >>> len(leaves), constants
+        (1, [2])
+
+        Returns:
+            The function, the list of Leaf nodes and the list of
+            constants giving its arguments.
+        """
+        leaves = []
+        constants = []
+        source = self._source(leaves, constants)
+        function = _compiled.get(source)
+        if function is None:
+            arguments = ['a%d' % i for i in range(len(leaves))] + \
+                        ['c%d' % i for i in range(len(constants))]
+            function = eval('lambda %s: %s' % (', '.join(arguments), source))
+            _compiled[source] = function
+        return function, leaves, constants
+
+    def evaluate(self):
+        """ Evaluate the expression in a single pass over its operands
+
+        The result has the dtype eager arithmetic would give, see
+        dtype.
+
+        >>> from matrix import Matrix
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> (m1.lazy() * 2 - m1).evaluate()
+        Matrix([[1, 2],
+                [3, 4]])
+        >>> m2 = Matrix([[1, 2], [3, 4]], dtype='int64')
+        >>> m3 = (m2.lazy() * 0.5).evaluate()
+        >>> m3.dtype(), m3
+        (float64, Matrix([[0.5, 1.0],
+                [1.5, 2.0]]))
+        >>> (m2.lazy() * 1j).evaluate().storage()
+        'list'
+
+        Returns:
+            A new Vector or Matrix.
+        """
+        function, leaves, constants = self.compile()
+        dtype = self.dtype()
+        if len(self.shape) == 1:
+            return vector.Vector(list(map(
+                function, *_operands(leaves, constants, '_elements'))),
+                dtype=dtype)
+
+        first = leaves[0].value
+        if all(leaf.value._data is not None for leaf in leaves) and \
+                (dtype is None or dtype.typecode is not None):
+            typecode = dtype.typecode if dtype is not None \
+                else storage.typecodeOf(first._data)
+            data = array(typecode,
+                         map(function, *_operands(leaves, constants, '_data')))
+            return matrix.Matrix._fromFlat(data, *self.shape)
+        rows = zip(*[leaf.value._elements for leaf in leaves])
+        constants = [repeat(constant) for constant in constants]
+        return first._new([list(map(function, *(row + tuple(constants))))
+                           for row in rows], dtype)
+
+    def dtype(self):
+        """ Return the dtype of the result, None if it is untyped
+
+        The dtypes of the operands are promoted as by eager arithmetic,
+        and division never gives integers.
+
+        >>> from matrix import Matrix
+        >>> from vector import Vector
+        >>> m1 = Matrix([[1, 2]], dtype='int64')
+        >>> (m1.lazy() + Matrix([[0.5, 1]], dtype='float64')).dtype()
+        float64
+        >>> (m1.lazy() / 2).dtype()
+        float64
+        >>> v1 = Vector([1, 2], dtype='float32')
+        >>> (v1.lazy() + Vector([1, 2], dtype='float64')).evaluate().dtype()
+        float64
+        """
+        return self._dtype()
+
+class Leaf(Expression):
+    """ A Vector or Matrix operand of an expression """
+
+    def __init__(self, value):
+        self.value = value
+        if hasattr(value, 'nRows'):
+            self.shape = (value.nRows(), value.nColumns())
+        else:
+            self.shape = (len(value),)
+
+    def _source(self, leaves, constants):
+        for index, leaf in enumerate(leaves):
+            if leaf.value is self.value:
+                return 'a%d' % index
+        leaves.append(self)
+        return 'a%d' % (len(leaves) - 1)
+
+    def _dtype(self):
+        return self.value._dtype
+
+class Constant(Expression):
+    """ A scalar operand of an expression """
+
+    shape = None
+
+    def __init__(self, value):
+        self.value = value
+
+    def _source(self, leaves, constants):
+        constants.append(self.value)
+        return 'c%d' % (len(constants) - 1)
+
+    def _dtype(self):
+        # Constants are promoted by the operation using them.
+        return None
+
+class Operation(Expression):
+    """ A binary operation of an expression """
+
+    def __init__(self, operator, left, right):
+        if left.shape is not None and right.shape is not None \
+                and left.shape != right.shape:
+            if len(left.shape) == 1:
+                raise vector.VectorLengthError('vectors must have the same length')
+            raise matrix.MatrixSizeError('matrices must have the same size')
+        self.operator = operator
+        self.left = left
+        self.right = right
+        self.shape = left.shape if left.shape is not None else right.shape
+
+    def _source(self, leaves, constants):
+        return '(%s %s %s)' % (self.left._source(leaves, constants),
+                               self.operator,
+                               self.right._source(leaves, constants))
+
+    def _dtype(self):
+        if isinstance(self.right, Constant):
+            dtype = dtypes.promoteScalar(self.left._dtype(), self.right.value)
+        elif isinstance(self.left, Constant):
+            dtype = dtypes.promoteScalar(self.right._dtype(), self.left.value)
+        else:
+            dtype = dtypes.promote(self.left._dtype(), self.right._dtype())
+        if self.operator == '/':
+            return dtypes.floating(dtype)
+        return dtype
+
+class Negation(Expression):
+    """ The negation of an expression """
+
+    def __init__(self, operand):
+        self.operand = operand
+        self.shape = operand.shape
+
+    def _source(self, leaves, constants):
+        return '(-%s)' % self.operand._source(leaves, constants)
+
+    def _dtype(self):
+        return self.operand._dtype()
+
+def _operands(leaves, constants, attribute):
+    """ Return the arguments mapping the compiled function over the leaves """
+    return [getattr(leaf.value, attribute) for leaf in leaves] + \
+           [repeat(constant) for constant in constants]
+
+def _wrap(value):
+    """ Return value as a Vector or Matrix operand of an expression """
+    if isinstance(value, Expression):
+        if value.shape is None:
+            raise TypeError('only scalars can multiply or divide')
+        return value
+    if hasattr(value, '_elements'):
+        return Leaf(value)
+    raise TypeError('cannot add or subtract %r' % (value,))
+
+def _scalar(value):
+    """ Return value as a scalar operand of an expression """
+    if isinstance(value, Number):
+        return Constant(value)
+    raise TypeError('only scalars can multiply or divide')
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,60 +1,27 @@
 #!/usr/bin/env pyhton
 from numbers import Number
+from array import array
+from itertools import chain, cycle, product, repeat
+from math import floor, sqrt
+from operator import add, mul
+from point import Point
+from vector import Vector, VectorBatch, smallVector
+
+# Default tolerance of the parallel and perpendicular tests. Two unit
+# directions u and v are parallel if u - v or u + v is at most this
+# long, and perpendicular if |u * v| is at most this.
+TOLERANCE = 1e-9
 
-class Point(object):
-    def __init__(self, elements):
-        self.elements = list(elements)
-    def __repr__(self):
-        return 'Point' + str(self) 
-    def __str__(self):
-        return '(' + reduce(lambda x, y: str(x) + ', ' + str(y), self.elements) + ')'
-    def __iter__(self):
-        for element in self.elements:
-            yield element
-    def __add__(self, other):
-        assert type(other) == Point
-        assert len(self) == len(other)
-        new_point = Point([0]*len(self))
-        for i in range(len(self)):
-            new_point[i] = self[i] + other[i]
-        return new_point
-    def __iadd__(self, other):
-        assert type(other) == Point
-        assert len(self) == len(other)
-        for i in range(len(self)):
-            self[i] += other[i]
-        return self
-    def __sub__(self, other):
-        assert type(other) == Point
-        assert len(self) == len(other)
-        new_point = Point([0]*len(self))
-        for i in range(len(self)):
-            new_point[i] = self[i] + other[i]
-        return new_point
-    def __iadd__(self, other):
-        assert type(other) == Point
-        assert len(self) == len(other)
-        for i in range(len(self)):
-            self[i] -= other[i]
-        return self
-    def __setitem__(self, index, value):
-        assert index >= 0 and index < len(self)
-        self.elements[index] = value
-    def __getitem__(self, index):
-        assert index >= 0 and index < len(self)
-        return self.elements[index]
-    def __len__(self):
-        return len(self.elements)
-
-       
 class Graph(object):
+    __slots__ = ('point',)
     def __init__(self, point):
-        assert type(point) == Point
+        assert isinstance(point, Point)
         self.point = point
 
 class NormalForm(Graph):
+    __slots__ = ('normal',)
     def __init__(self, point, normal):
-        assert type(normal) == Vector
+        assert isinstance(normal, Vector)
         super(NormalForm, self).__init__(point)
         self.normal = normal
     def __repr__(self):
@@ -62,34 +29,77 @@ class NormalForm(Graph):
                 + 'normal=' + str(self.normal) + ')'
     def __str__(self):
         return repr(self)
-    def isParell(self, other):
-        if type(other) == NormalForm:
-            if self.normal.dot(other.normal) == \
-                    abs(self.normal) == abs(other.normal):
-               return True
-        elif type(other) == VectorForm:
-            if self.normal.dot(other.distance) == 0:
-               return True
-        return False
-    def isPerpendicular(self, other):
-        if type(other) == VectorForm:
-            if self.normal.dot(other.distance) == \
-                    abs(self.normal) == abs(other.distance):
-               return True
-        elif type(other) == NormalForm:
-            if self.normal.dot(other.normal) == 0:
-               return True
-        return False
+    def orientation(self):
+        """ Return the vector the plane is oriented by, its normal """
+        return self.normal
+
+    def isParell(self, other, tolerance=TOLERANCE):
+        """ Return True if the other plane or line is parallel to this plane
+
+        >>> plane = NormalForm(Point((0, 0, 0)), Vector([0, 0, 1]))
+        >>> plane.isParell(NormalForm(Point((1, 1, 1)), Vector([0, 0, -2])))
+        True
+        >>> plane.isParell(VectorForm(Point((0, 0, 1)), Vector([1, 1, 0])))
+        True
+        """
+        return _isParallel(self, other, tolerance)
+
+    def isPerpendicular(self, other, tolerance=TOLERANCE):
+        """ Return True if the other plane or line is perpendicular
+
+        >>> plane = NormalForm(Point((0, 0, 0)), Vector([0, 0, 1]))
+        >>> plane.isPerpendicular(NormalForm(Point((0, 0, 0)), Vector([1, 0, 0])))
+        True
+        >>> plane.isPerpendicular(VectorForm(Point((0, 0, 0)), Vector([0, 0, 3])))
+        True
+        """
+        return _isPerpendicular(self, other, tolerance)
+
     def vectorForm(self):
-        pass
+        """ Return the point and vectors spanning the plane
+
+        The spanning vectors are orthonormal and perpendicular to the
+        normal, the plane is point + s * u + t * v + ...
+
+        >>> plane = NormalForm(Point((0, 0, 1)), Vector([0, 0, 2]))
+        >>> plane.vectorForm()
+        (Point(0, 0, 1), [Vector3([1.0, 0.0, 0.0]), Vector3([0.0, 1.0, 0.0])])
+        """
+        return self.point, [smallVector(u) for u in _complement(_unit(self))]
+
     def parametricForm(self):
-        pass
+        """ Return the parametric equations of the plane
+
+        Coordinate i of the plane is constant + sum(c * t for c, t in
+        zip(coefficients, parameters)), see vectorForm.
+
+        >>> plane = NormalForm(Point((0, 0, 1)), Vector([0, 0, 2]))
+        >>> plane.parametricForm()
+        [(0, (1.0, 0.0)), (0, (0.0, 1.0)), (1, (0.0, 0.0))]
+
+        Returns:
+            A list of (constant, coefficients) pairs, one per coordinate.
+        """
+        point, spans = self.vectorForm()
+        return list(zip(point, zip(*spans)))
+
     def generalForm(self):
-        pass
+        """ Return the coefficients of the equation of the plane
+
+        The plane is every x with a1 * x1 + ... + an * xn + d = 0.
+
+        >>> NormalForm(Point((0, 0, 1)), Vector([0, 0, 2])).generalForm()
+        (0, 0, 2, -2)
+
+        Returns:
+            The tuple (a1, ..., an, d).
+        """
+        return _generalForm(self.normal, self.point)
 
 class VectorForm(Graph):
+    __slots__ = ('distance',)
     def __init__(self, point, distance):
-        assert type(distance) == Vector
+        assert isinstance(distance, Vector)
         super(VectorForm, self).__init__(point)
         self.distance = distance
     def __repr__(self):
@@ -97,30 +107,518 @@ class VectorForm(Graph):
                 + 'distance=' + str(self.distance) + ')'
     def __str__(self):
         return repr(self)
-    def isParell(self, other):
-        if type(other) == VectorForm:
-            if self.distance.dot(other.distance) == \
-                    abs(self.distance) == abs(other.distance):
-               return True
-        elif type(other) == NormalForm:
-            if self.distance.dot(other.normal) == 0:
-               return True
-        return False
-    def isPerpendicular(self, other):
-        if type(other) == NormalForm:
-            if self.distance.dot(other.normal) == \
-                    abs(self.distance) == abs(other.normal):
-               return True
-        elif type(other) == VectorForm:
-            if self.distance.dot(other.distance) == 0:
-               return True
-        return False
+    def orientation(self):
+        """ Return the vector the line is oriented by, its direction """
+        return self.distance
+
+    def isParell(self, other, tolerance=TOLERANCE):
+        """ Return True if the other line or plane is parallel to this line
+
+        >>> line = VectorForm(Point((0, 0, 0)), Vector([1, 2, 3]))
+        >>> line.isParell(VectorForm(Point((1, 0, 0)), Vector([2, 4, 6])))
+        True
+        """
+        return _isParallel(self, other, tolerance)
+
+    def isPerpendicular(self, other, tolerance=TOLERANCE):
+        """ Return True if the other line or plane is perpendicular
+
+        >>> line = VectorForm(Point((0, 0, 0)), Vector([1, 0, 0]))
+        >>> line.isPerpendicular(VectorForm(Point((0, 0, 0)), Vector([0, 1, 0])))
+        True
+        """
+        return _isPerpendicular(self, other, tolerance)
+
     def NormalForm(self):
-        pass
+        """ Return the line as a NormalForm, only lines in a plane have one
+
+        >>> VectorForm(Point((1, 0)), Vector([1, 1])).NormalForm()
+        NormalForm(point=(1, 0), normal=[-1, 1])
+
+        Raises:
+            ValueError: if the line is not two dimensional.
+        """
+        if len(self.distance) != 2:
+            raise ValueError('only a two dimensional line has a normal form')
+        return NormalForm(self.point,
+                          smallVector((-self.distance[1], self.distance[0])))
+
     def parametricForm(self):
-        pass
+        """ Return the parametric equations of the line
+
+        Coordinate i of the line is constant + coefficient * t.
+
+        >>> VectorForm(Point((1, 2)), Vector([3, 4])).parametricForm()
+        [(1, (3,)), (2, (4,))]
+
+        Returns:
+            A list of (constant, coefficients) pairs, one per coordinate.
+        """
+        return [(p, (d,)) for p, d in zip(self.point, self.distance)]
+
     def generalForm(self):
-        pass
+        """ Return the equations of planes whose intersection is the line
+
+        A line in n dimensions takes n - 1 equations, each in the form
+        returned by NormalForm.generalForm.
+
+        >>> VectorForm(Point((0, 0, 5)), Vector([2, 0, 0])).generalForm()
+        [(0.0, 1.0, 0.0, 0.0), (0.0, 0.0, 1.0, -5.0)]
+        """
+        return [_generalForm(normal, self.point)
+                for normal in _complement(_unit(self))]
+
+def _unit(form):
+    """ Return the orientation of a form as a tuple of unit length """
+    vector = form.orientation()
+    length = abs(vector)
+    if length == 0:
+        raise ValueError('the orientation of a form must not be zero')
+    return tuple(x / length for x in vector)
+
+def _generalForm(normal, point):
+    """ Return the coefficients of the plane through point with normal """
+    # Subtracting from 0 rather than negating keeps -0.0 out.
+    return tuple(normal) + (0 - sum(map(mul, normal, point)),)
+
+def _complement(u):
+    """ Return an orthonormal basis of the directions perpendicular to u
+
+    The standard basis vectors are made perpendicular to u and to each
+    other in turn, those that vanish are dropped.
+    """
+    basis = [u]
+    for axis in range(len(u)):
+        v = [0.0] * len(u)
+        v[axis] = 1.0
+        for w in basis:
+            dot = sum(map(mul, v, w))
+            v = [a - dot * b for a, b in zip(v, w)]
+        length = sqrt(sum(map(mul, v, v)))
+        if length > 1e-6:
+            basis.append(tuple(a / length + 0.0 for a in v))
+        if len(basis) == len(u):
+            break
+    return basis[1:]
+
+def _parallelUnits(u, v, tolerance):
+    """ Return True if the unit directions are parallel """
+    near = sqrt(sum((a - b) ** 2 for a, b in zip(u, v)))
+    opposite = sqrt(sum((a + b) ** 2 for a, b in zip(u, v)))
+    return min(near, opposite) <= tolerance
+
+def _perpendicularUnits(u, v, tolerance):
+    """ Return True if the unit directions are perpendicular """
+    return abs(sum(a * b for a, b in zip(u, v))) <= tolerance
+
+def _isParallel(first, second, tolerance):
+    """ Return True if two forms are parallel
+
+    Planes are parallel when their normals are, lines when their
+    directions are, and a line is parallel to a plane when its direction
+    is perpendicular to the normal.
+    """
+    u, v = _unit(first), _unit(second)
+    if type(first) == type(second):
+        return _parallelUnits(u, v, tolerance)
+    return _perpendicularUnits(u, v, tolerance)
+
+def _isPerpendicular(first, second, tolerance):
+    """ Return True if two forms are perpendicular """
+    u, v = _unit(first), _unit(second)
+    if type(first) == type(second):
+        return _perpendicularUnits(u, v, tolerance)
+    return _parallelUnits(u, v, tolerance)
+
+class _DirectionGrid(object):
+    """ Hash of unit directions by grid cells of the tolerance
+
+    Directions within tolerance of u, or of -u, lie in the cells next to
+    the cells of u and -u, so finding them looks at a constant number of
+    cells rather than at every direction.
+    """
+
+    def __init__(self, tolerance):
+        # A zero tolerance still needs a cell size, rounding may put
+        # equal directions a few ulps apart.
+        self._size = max(tolerance, 1e-12)
+        self._cells = {}
+
+    def _cell(self, u):
+        return tuple(int(floor(x / self._size)) for x in u)
+
+    def add(self, u, value):
+        self._cells.setdefault(self._cell(u), []).append((u, value))
+
+    def near(self, u):
+        """ Yield the (direction, value) pairs in cells next to u or -u """
+        seen = set()
+        for direction in (u, tuple(-x for x in u)):
+            cell = self._cell(direction)
+            for offset in product((-1, 0, 1), repeat=len(cell)):
+                key = tuple(c + o for c, o in zip(cell, offset))
+                if key in seen:
+                    continue
+                seen.add(key)
+                for entry in self._cells.get(key, ()):
+                    yield entry
+
+class _DirectionTree(object):
+    """ k-d tree of unit directions found by a hyperplane through 0
+
+    Every node keeps a ball bounding its directions, a node whose ball
+    can not reach within slack of the hyperplane perpendicular to u is
+    skipped with all of its directions. The directions near the
+    hyperplane lie along a band, so a query visits far fewer than all
+    of the nodes. Only the angle between directions matters, so every
+    direction is kept on the side of the hyperplane of the first axis
+    that makes its first non zero coordinate positive, which halves
+    the band.
+    """
+
+    # Most directions kept in a leaf.
+    LEAF = 4
+
+    def __init__(self, entries):
+        """ Build the tree of (direction, value) entries """
+        entries = [(_canonical(u), (u, value)) for u, value in entries]
+        self._root = self._build(entries) if entries else None
+
+    def _build(self, entries):
+        """ Return a node, (center, radius, children, entries) """
+        columns = list(zip(*[u for u, entry in entries]))
+        center = [sum(column) / len(column) for column in columns]
+        radius = max(sqrt(sum((a - c) ** 2 for a, c in zip(u, center)))
+                      for u, entry in entries)
+        if len(entries) <= self.LEAF:
+            return center, radius, None, [entry for u, entry in entries]
+        axis = max(range(len(columns)),
+                   key=lambda i: max(columns[i]) - min(columns[i]))
+        entries.sort(key=lambda entry: entry[0][axis])
+        middle = len(entries) // 2
+        return center, radius, (self._build(entries[:middle]),
+                                self._build(entries[middle:])), None
+
+    def near(self, u, slack):
+        """ Return the (direction, value) entries of nodes near u's hyperplane
+
+        Every direction v with |u * v| <= slack is returned, with some
+        others from the same leaves.
+        """
+        found = []
+        if self._root is None:
+            return found
+        stack = [self._root]
+        while stack:
+            center, radius, children, entries = stack.pop()
+            # A unit u moves u * v by at most the radius over the node.
+            if abs(sum(map(mul, u, center))) > radius + slack:
+                continue
+            if children is None:
+                found.extend(entries)
+            else:
+                stack.extend(children)
+        return found
+
+def _canonical(u):
+    """ Return u or -u, whichever has a positive first non zero coordinate """
+    for x in u:
+        if x:
+            return u if x > 0 else tuple(-a for a in u)
+    return u
+
+def _classes(units, tolerance):
+    """ Group directions around representatives within tolerance
+
+    Returns:
+        A list of (representative, indices) pairs.
+    """
+    grid = _DirectionGrid(tolerance)
+    classes = []
+    for index, u in enumerate(units):
+        for representative, members in grid.near(u):
+            if _parallelUnits(u, representative, tolerance):
+                members.append(index)
+                break
+        else:
+            members = [index]
+            classes.append((u, members))
+            grid.add(u, members)
+    return classes
+
+def _parallelIndexPairs(first, second, tolerance):
+    """ Return the (i, j) pairs of parallel directions of two lists
+
+    If second is None the pairs are taken within first with i < j.
+    """
+    grid = _DirectionGrid(tolerance)
+    for j, v in enumerate(first if second is None else second):
+        grid.add(v, j)
+    pairs = []
+    for i, u in enumerate(first):
+        for v, j in grid.near(u):
+            if (second is not None or i < j) and \
+                    _parallelUnits(u, v, tolerance):
+                pairs.append((i, j))
+    return pairs
+
+def _perpendicularIndexPairs(first, second, tolerance):
+    """ Return the (i, j) pairs of perpendicular directions of two lists
+
+    The directions are grouped into classes of parallel directions.
+    The representatives of the right classes go into a _DirectionTree,
+    which finds those close to perpendicular to each left representative
+    with out looking at every class, and only their members are compared.
+    """
+    if second is None:
+        right = left = _classes(first, tolerance)
+        second = first
+        same = True
+    else:
+        left = _classes(first, tolerance)
+        right = _classes(second, tolerance)
+        same = False
+    # Members are within tolerance of their representative.
+    slack = 3 * tolerance
+    tree = _DirectionTree(right)
+    pairs = []
+    for u, members in left:
+        for v, others in tree.near(u, slack):
+            if abs(sum(map(mul, u, v))) > slack:
+                continue
+            for i in members:
+                for j in others:
+                    if (not same or i < j) and \
+                            _perpendicularUnits(first[i], second[j], tolerance):
+                        pairs.append((i, j))
+    return pairs
+
+def _split(forms):
+    """ Return the unit orientations and indices of planes and of lines """
+    planes, lines = ([], []), ([], [])
+    for index, form in enumerate(forms):
+        units, indices = planes if isinstance(form, NormalForm) else lines
+        units.append(_unit(form))
+        indices.append(index)
+    return planes, lines
+
+def _pairs(forms, tolerance, sameKind, otherKind):
+    """ Collect index pairs of forms
+
+    sameKind finds the pairs among forms of one kind, otherKind the
+    pairs of a plane and a line.
+    """
+    (planeUnits, planeIndices), (lineUnits, lineIndices) = _split(forms)
+    pairs = []
+    for units, indices in ((planeUnits, planeIndices), (lineUnits, lineIndices)):
+        pairs.extend((indices[i], indices[j])
+                     for i, j in sameKind(units, None, tolerance))
+    pairs.extend(tuple(sorted((planeIndices[i], lineIndices[j])))
+                 for i, j in otherKind(planeUnits, lineUnits, tolerance))
+    pairs.sort()
+    return pairs
+
+def parallelPairs(forms, tolerance=TOLERANCE):
+    """ Return every pair of parallel forms
+
+    The orientations are hashed by a grid of the tolerance so each form
+    is only compared with forms of about the same direction. The test of
+    a plane against a line, direction perpendicular to normal, is done
+    over classes of equal directions, see perpendicularPairs.
+
+    >>> forms = [NormalForm(Point((0, 0, 0)), Vector([0, 0, 1])),
+    ...          NormalForm(Point((0, 0, 5)), Vector([0, 0, -3])),
+    ...          VectorForm(Point((0, 0, 0)), Vector([1, 0, 0])),
+    ...          VectorForm(Point((0, 0, 0)), Vector([0, 1, 1]))]
+    >>> parallelPairs(forms)
+    [(0, 1), (0, 2), (1, 2)]
+
+    Args:
+        forms: sequence of NormalForm and VectorForm objects.
+        tolerance: see TOLERANCE.
+
+    Returns:
+        A sorted list of (i, j) index pairs with i < j.
+    """
+    return _pairs(forms, tolerance, _parallelIndexPairs,
+                  _perpendicularIndexPairs)
+
+def perpendicularPairs(forms, tolerance=TOLERANCE):
+    """ Return every pair of perpendicular forms
+
+    The orientations are grouped into classes of parallel directions and
+    only classes that are perpendicular are expanded into pairs. The
+    work grows with the square of the number of distinct directions, not
+    of forms.
+
+    >>> forms = [NormalForm(Point((0, 0, 0)), Vector([0, 0, 1])),
+    ...          NormalForm(Point((0, 0, 0)), Vector([1, 0, 0])),
+    ...          VectorForm(Point((0, 0, 0)), Vector([0, 0, 2]))]
+    >>> perpendicularPairs(forms)
+    [(0, 1), (0, 2)]
+
+    Args:
+        forms: sequence of NormalForm and VectorForm objects.
+        tolerance: see TOLERANCE.
+
+    Returns:
+        A sorted list of (i, j) index pairs with i < j.
+    """
+    return _pairs(forms, tolerance, _perpendicularIndexPairs,
+                  _parallelIndexPairs)
+
+def parallelClasses(forms, tolerance=TOLERANCE):
+    """ Group the forms by orientation
+
+    Planes with parallel normals form one class, lines with parallel
+    directions another. Each class gathers the forms within tolerance of
+    its first member.
+
+    >>> forms = [NormalForm(Point((0, 0, 0)), Vector([0, 0, 1])),
+    ...          VectorForm(Point((0, 0, 0)), Vector([0, 0, 1])),
+    ...          NormalForm(Point((0, 0, 1)), Vector([0, 0, 2]))]
+    >>> parallelClasses(forms)
+    [[0, 2], [1]]
+
+    Returns:
+        A list of lists of indices, ordered by their first index.
+    """
+    classes = []
+    for units, indices in _split(forms):
+        classes.extend([indices[i] for i in members]
+                       for representative, members in _classes(units, tolerance))
+    classes.sort()
+    return classes
+
+def _batch(points):
+    """ Return the points as a VectorBatch """
+    if isinstance(points, VectorBatch):
+        return points
+    return VectorBatch(points)
+
+def planeDistances(plane, points):
+    """ Return the signed distances of many points from a plane
+
+    The distance is positive on the side the normal points to. The points
+    are taken as one VectorBatch so the work runs over contiguous
+    storage.
+
+    >>> plane = NormalForm(Point((0, 0, 1)), Vector([0, 0, 2]))
+    >>> planeDistances(plane, [Point((5, 5, 3)), Point((1, 2, 0))])
+    Vector([2.0, -1.0])
+
+    Args:
+        plane: NormalForm.
+        points: VectorBatch or iterable of Points.
+
+    Returns:
+        A Vector of distances.
+    """
+    unit = smallVector(_unit(plane))
+    offset = plane.point.vector() * unit
+    return Vector([d - offset for d in _batch(points) * unit])
+
+def lineDistances(line, points):
+    """ Return the distances of many points from a line
+
+    >>> line = VectorForm(Point((0, 0, 0)), Vector([0, 0, 1]))
+    >>> lineDistances(line, [Point((3, 4, 7)), Point((0, 0, -2))])
+    Vector([5.0, 0.0])
+
+    Args:
+        line: VectorForm.
+        points: VectorBatch or iterable of Points.
+
+    Returns:
+        A Vector of distances.
+    """
+    unit = smallVector(_unit(line))
+    offsets = _batch(points) - line.point.vector()
+    dimension = offsets.dimension()
+    # The part of each offset across the line, not sqrt(|o|**2 - along**2)
+    # which cancels for points near the line.
+    along = map(mul, chain.from_iterable(repeat(a, dimension)
+                                         for a in offsets * unit),
+                cycle(unit))
+    across = array('d', map(lambda o, a: o - a, offsets._data, along))
+    return abs(VectorBatch._fromFlat(across, dimension))
+
+def _forms(forms, attributes):
+    """ Return the vectors of the given attributes of a form or forms
+
+    A single form gives Vectors, which broadcast against batches, a
+    sequence of forms gives VectorBatches.
+    """
+    if isinstance(forms, Graph):
+        return [smallVector(getattr(forms, name)) for name in attributes], 1
+    forms = list(forms)
+    return [VectorBatch([getattr(form, name) for form in forms])
+            for name in attributes], len(forms)
+
+def _dots(x, y):
+    """ Return the dot products of two Vectors or VectorBatches """
+    if isinstance(x, VectorBatch):
+        return list(x * y)
+    if isinstance(y, VectorBatch):
+        return list(y * x)
+    return [x * y]
+
+def _norms(x):
+    """ Return the magnitudes of a Vector or VectorBatch """
+    if isinstance(x, VectorBatch):
+        return list(abs(x))
+    return [abs(x)]
+
+def _flat(x):
+    """ Return the flat elements of a Vector or VectorBatch """
+    if isinstance(x, VectorBatch):
+        return x._data
+    return list(x)
+
+def intersections(lines, planes, tolerance=TOLERANCE):
+    """ Return the points where lines cross planes
+
+    Either argument may be a single form, which is used with every form
+    of the other, or both are sequences of the same length which are
+    taken pairwise. The coordinates of all the forms are gathered into
+    VectorBatches and the intersections are computed over them at once.
+
+    >>> plane = NormalForm(Point((0, 0, 1)), Vector([0, 0, 1]))
+    >>> lines = [VectorForm(Point((0, 0, 0)), Vector([1, 1, 1])),
+    ...          VectorForm(Point((2, 0, 3)), Vector([0, 0, -1])),
+    ...          VectorForm(Point((0, 0, 0)), Vector([1, 0, 0]))]
+    >>> intersections(lines, plane)
+    VectorBatch([[1.0, 1.0, 1.0], [2.0, 0.0, 1.0], [nan, nan, nan]])
+
+    Args:
+        lines: VectorForm or sequence of VectorForms.
+        planes: NormalForm or sequence of NormalForms.
+        tolerance: lines whose direction is within tolerance of
+                   perpendicular to the normal are parallel to the plane.
+
+    Returns:
+        A VectorBatch with a row per line and plane pair, a row of nan
+        if the line is parallel to the plane.
+    """
+    (origins, directions), nLines = _forms(lines, ('point', 'distance'))
+    (points, normals), nPlanes = _forms(planes, ('point', 'normal'))
+    if nLines != nPlanes and 1 not in (nLines, nPlanes):
+        raise ValueError('lines and planes must be as many or single')
+    count = max(nLines, nPlanes)
+    dimension = len(normals[0]) if isinstance(normals, VectorBatch) \
+        else len(normals)
+    # Every quantity holds one value or count values, cycle broadcasts.
+    terms = zip(cycle(_dots(points, normals)), cycle(_dots(origins, normals)),
+                cycle(_dots(directions, normals)), cycle(_norms(directions)),
+                cycle(_norms(normals)), range(count))
+    steps = [(target - start) / slope
+             if abs(slope) > tolerance * length * normal else float('nan')
+             for target, start, slope, length, normal, i in terms]
+    moves = map(mul, chain.from_iterable(repeat(step, dimension)
+                                         for step in steps),
+                cycle(_flat(directions)))
+    return VectorBatch._fromFlat(
+        array('d', map(add, moves, cycle(_flat(origins)))), dimension)
 
 if __name__ == '__main__':
     P1 = Point((1, 2, 3))
@@ -129,3 +627,5 @@ if __name__ == '__main__':
     V2 = Vector(P2)
     normalForm = NormalForm(P1, V1)
     vectorForm = VectorForm(P2, V1)
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,239 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Opt-in instrumentation of Vector and Matrix operations
+
+While enabled the methods named in TARGETS are replaced by wrappers
+that count, per method, the calls, the elements of the object the
+method was called on, the new Vector or Matrix objects returned and the
+cumulative time. Disabling puts the original methods back, so the
+disabled cost is nothing at all.
+
+>>> with collect() as report:
+...     m1 = Matrix([[1, 2], [3, 4]])
+...     m2 = m1 + m1
+...     rows = list(m2)
+>>> report['Matrix.__add__']['calls'], report['Matrix.__add__']['elements']
+(1, 4)
+>>> report['Matrix.__iter__']['allocations']
+2
+>>> isEnabled()
+False
+
+Times include the time of nested instrumented calls. Matrix.__mul__
+hands its operands to kernels.multiply, which works on the rows
+directly, so its time covers the whole product but no Vector methods
+are counted under it. The element accessors in ACCESSORS are only
+counted at public entry points, rows read by an instrumented method
+such as solve are not counted again:
+
+>>> m3 = Matrix([[2.0, 0.0], [0.0, 4.0]])
+>>> with collect() as report:
+...     x = m3.solve(Vector([2.0, 4.0]))
+...     first = m3[0]
+>>> report['Matrix.__getitem__']['calls']
+1
+>>> 'Vector.__getitem__' in report
+False
+"""
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+import json
+import types
+from vector import Vector, Vector2, Vector3, Vector4, VectorBatch
+from matrix import Matrix, TransposedMatrix
+
+# Methods wrapped while instrumentation is enabled, per class. Only
+# methods defined by the class itself are wrapped, inherited ones are
+# counted under the class defining them.
+TARGETS = {
+    Vector: ('__add__', '__sub__', '__mul__', '__iadd__', '__isub__',
+             '__imul__', '__abs__', '__iter__', '__getitem__', 'add',
+             'sub', 'scale'),
+    Vector2: ('__add__', '__sub__', '__mul__', '__abs__'),
+    Vector3: ('__add__', '__sub__', '__mul__', '__abs__', 'cross'),
+    Vector4: ('__add__', '__sub__', '__mul__', '__abs__'),
+    VectorBatch: ('__add__', '__sub__', '__mul__', '__abs__', '__iter__',
+                  '__getitem__'),
+    Matrix: ('__add__', '__sub__', '__mul__', '__iadd__', '__isub__',
+             '__imul__', '__iter__', '__getitem__', 'add', 'sub', 'scale',
+             'mul', 'copy', 'transpose', 'materialize', 'lu', 'solve',
+             'det', 'inverse'),
+    TransposedMatrix: ('copy', 'transpose', 'materialize'),
+}
+
+# Element accessors, counted only when called from outside every
+# instrumented method.
+ACCESSORS = ('__getitem__', '__iter__')
+
+# Objects counted as allocations when a method returns or yields them.
+ALLOCATED = (Vector, VectorBatch, Matrix)
+
+# Per method name, [calls, elements, allocations, seconds].
+_counters = {}
+
+# Original methods, (class, name, method), while enabled.
+_originals = []
+
+# Number of instrumented calls currently running.
+_depth = [0]
+
+def _size(value):
+    """ Return the number of elements of a Vector, Matrix or batch """
+    if isinstance(value, Matrix):
+        return value.nRows() * value.nColumns()
+    if isinstance(value, VectorBatch):
+        return len(value._data)
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+def _counter(name):
+    counter = _counters.get(name)
+    if counter is None:
+        counter = _counters[name] = [0, 0, 0, 0.0]
+    return counter
+
+def _instrument(name, method):
+    """ Return a wrapper of method counting into the counter name """
+    accessor = name.rpartition('.')[2] in ACCESSORS
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if accessor and _depth[0]:
+            return method(self, *args, **kwargs)
+        start = perf_counter()
+        _depth[0] += 1
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _depth[0] -= 1
+            counter = _counter(name)
+            counter[0] += 1
+            counter[1] += _size(self)
+            counter[3] += perf_counter() - start
+        if isinstance(result, types.GeneratorType):
+            return _iterate(name, result)
+        if result is not self and isinstance(result, ALLOCATED):
+            counter[2] += 1
+        return result
+    return wrapper
+
+def _iterate(name, generator):
+    """ Yield from generator counting its time and the objects it yields """
+    counter = _counter(name)
+    while True:
+        start = perf_counter()
+        try:
+            value = next(generator)
+        except StopIteration:
+            counter[3] += perf_counter() - start
+            return
+        counter[3] += perf_counter() - start
+        if isinstance(value, ALLOCATED):
+            counter[2] += 1
+        yield value
+
+def enable():
+    """ Replace the methods in TARGETS by counting wrappers
+
+    Enabling again while enabled does nothing.
+    """
+    if _originals:
+        return
+    for cls, names in TARGETS.items():
+        for name in names:
+            method = cls.__dict__.get(name)
+            if method is None or not callable(method):
+                continue
+            _originals.append((cls, name, method))
+            setattr(cls, name,
+                    _instrument(cls.__name__ + '.' + name, method))
+
+def disable():
+    """ Put the original methods back """
+    while _originals:
+        cls, name, method = _originals.pop()
+        setattr(cls, name, method)
+
+def isEnabled():
+    """ Return True if the methods are instrumented """
+    return bool(_originals)
+
+def reset():
+    """ Forget every count collected so far """
+    _counters.clear()
+
+def stats():
+    """ Return the counts collected so far
+
+    Returns:
+        A dict of 'Class.method' to a dict of 'calls', 'elements',
+        'allocations' and 'seconds'.
+    """
+    return dict((name, {'calls': calls, 'elements': elements,
+                        'allocations': allocations, 'seconds': seconds})
+                for name, (calls, elements, allocations, seconds)
+                in sorted(_counters.items()))
+
+def toJSON(report=None, indent=2):
+    """ Return a report, by default the current stats, as JSON """
+    if report is None:
+        report = stats()
+    return json.dumps(report, indent=indent, sort_keys=True)
+
+@contextmanager
+def collect():
+    """ Instrument the block of a with statement
+
+    Yields a dict which is filled in with the stats of the block when it
+    exits, in the form of stats(). Instrumentation is disabled again on
+    exit unless it was enabled before the block, so blocks may nest.
+    """
+    wasEnabled = isEnabled()
+    before = stats()
+    report = {}
+    enable()
+    try:
+        yield report
+    finally:
+        if not wasEnabled:
+            disable()
+        for name, counts in stats().items():
+            previous = before.get(name)
+            if previous is not None:
+                counts = dict((key, value - previous[key])
+                              for key, value in counts.items())
+                if not counts['calls']:
+                    continue
+            report[name] = counts
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
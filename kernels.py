@@ -0,0 +1,426 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Numeric kernels used by the Matrix
+
+The kernels work on plain row sequences (lists, arrays or memoryviews)
+rather than on Matrix or Vector objects so that no wrapper objects are
+created in the inner loops.
+
+The module level settings may be changed to tune the kernels.
+"""
+from operator import add, mul, sub
+from array import array
+import parallel
+import storage
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Number of columns of the right operand kept hot while sweeping the
+# rows of the left operand.
+BLOCK_SIZE = 64
+
+# Products with at least this many multiply-adds use NumPy when it is
+# importable.
+NUMPY_THRESHOLD = 32 ** 3
+
+# Number of processes used for products with at least PARALLEL_THRESHOLD
+# multiply-adds when NumPy is not used. One process means no pool.
+WORKERS = 1
+PARALLEL_THRESHOLD = 128 ** 3
+
+# Products whose dimensions are all at least STRASSEN_THRESHOLD use the
+# Strassen-Winograd recursion when neither NumPy nor processes are used,
+# None disables it. The recursion falls back to the blocked kernel once
+# the quadrants are no larger than STRASSEN_LEAF.
+STRASSEN_THRESHOLD = 256
+STRASSEN_LEAF = 64
+
+def multiply(a, b, out=None, workers=None):
+    """ Multiply the rows a by the rows b picking the fastest kernel
+
+    >>> multiply([[1, 2], [3, 4]], [[5, 6], [7, 8]])
+    [[19, 22], [43, 50]]
+
+    Processes are only used for floats, integer products stay exact:
+    >>> multiply([[1, 2], [3, 4]], [[5, 6], [7, 8]], workers=2)
+    [[19, 22], [43, 50]]
+    >>> multiply([[10 ** 18 + 1]], [[10 ** 18 + 3]], workers=2)
+    [[1000000000000000004000000000000000003]]
+    >>> multiply([[1.5, 2.0]], [[2.0], [1.0]], workers=2)
+    [[5.0]]
+
+    Args:
+        a: list of row sequences of the left operand.
+        b: list of row sequences of the right operand.
+        out: optional rows the product is written into in place.
+        workers: number of processes for large products, defaults to
+                 WORKERS.
+
+    Returns:
+        The product as a list of lists, or out.
+    """
+    nInner = len(b)
+    nColumns = len(b[0]) if b else 0
+    size = len(a) * nInner * nColumns
+    if _useNumpy(size):
+        result = numpyMultiply(a, b)
+        if result is not None:
+            return _store(result, out)
+    if _useParallel(size, workers, a, b):
+        result = parallelMultiply(a, b, workers or WORKERS)
+        if result is not None:
+            return _store(result, out)
+    if _useStrassen(len(a), nInner, nColumns):
+        return _store(strassenMultiply(a, b), out)
+    return blockedMultiply(a, list(zip(*b)), out=out)
+
+def multiplyTransposed(a, c, out=None, workers=None):
+    """ Multiply the rows a by the transpose of the rows c
+
+    The rows of c are the columns of the right operand, so no transpose
+    has to be built.
+
+    >>> multiplyTransposed([[1, 2], [3, 4]], [[5, 7], [6, 8]])
+    [[19, 22], [43, 50]]
+
+    Args:
+        a: list of row sequences of the left operand.
+        c: list of row sequences of the transposed right operand.
+        out: optional rows the product is written into in place.
+        workers: number of processes for large products, defaults to
+                 WORKERS.
+
+    Returns:
+        The product as a list of lists, or out.
+    """
+    nInner = len(c[0]) if c else 0
+    size = len(a) * nInner * len(c)
+    if _useNumpy(size):
+        result = numpyMultiply(a, c, transposed=True)
+        if result is not None:
+            return _store(result, out)
+    if _useParallel(size, workers, a, c):
+        result = parallelMultiply(a, list(zip(*c)), workers or WORKERS)
+        if result is not None:
+            return _store(result, out)
+    if _useStrassen(len(a), nInner, len(c)):
+        return _store(strassenMultiply(a, list(zip(*c))), out)
+    return blockedMultiply(a, c, out=out)
+
+def multiplyVectors(a, vectors):
+    """ Multiply the rows a by every vector in a single pass over a
+
+    The row loop is outermost: each row is read once and its product
+    with every vector is taken before the next row, however many
+    vectors there are. Large products go to NumPy when it is available.
+
+    >>> multiplyVectors([[1, 2], [3, 4]], [[1, 0], [1, 1]])
+    [[1, 3], [3, 7]]
+
+    Args:
+        a: list of row sequences.
+        vectors: list of sequences as long as the rows of a.
+
+    Returns:
+        The products as a list of lists, one per row of a with one
+        element per vector.
+    """
+    if _useNumpy(len(a) * len(vectors) * (len(a[0]) if a else 0)):
+        result = numpyMultiply(a, vectors, transposed=True)
+        if result is not None:
+            return result
+    return [[sum(map(mul, row, vector)) for vector in vectors] for row in a]
+
+def multiplyFlat(a, b, nRows, nInner, nColumns, typecode):
+    """ Multiply two flat row major blocks of floats with NumPy
+
+    The blocks are handed to NumPy without copying.
+
+    Args:
+        a: flat block of the left operand, nRows by nInner.
+        b: flat block of the right operand, nInner by nColumns.
+        typecode: array typecode of the product.
+
+    Returns:
+        The product as a flat array, or None if NumPy is not available
+        or the product is too small to be worth it.
+    """
+    if not _useNumpy(nRows * nInner * nColumns):
+        return None
+    left = numpy.frombuffer(a, dtype=storage.typecodeOf(a)).reshape(nRows, nInner)
+    right = numpy.frombuffer(b, dtype=storage.typecodeOf(b)).reshape(nInner, nColumns)
+    return array(typecode, numpy.dot(left, right).astype(typecode).tobytes())
+
+def _store(result, out):
+    """ Return result, written into the rows out if they are given """
+    if out is None:
+        return result
+    for target, values in zip(out, result):
+        assign(target, values)
+    return out
+
+def _useNumpy(size):
+    """ Return True if a product of the given size should use NumPy """
+    return numpy is not None and size >= NUMPY_THRESHOLD
+
+def assign(target, values):
+    """ Write the values into the target sequence in place
+
+    The target keeps its identity so every holder of it sees the new
+    values. Lists and buffers are written with a single slice
+    assignment, other sequences one element at a time.
+
+    >>> target = [1, 2, 3]
+    >>> alias = target
+    >>> assign(target, [4, 5, 6])
+    >>> alias
+    [4, 5, 6]
+
+    Args:
+        target: list, array, memoryview or other mutable sequence.
+        values: iterable of as many values as the target has.
+    """
+    if isinstance(target, list):
+        target[:] = values
+    elif isinstance(target, memoryview):
+        target[:] = array(target.format, values)
+    elif isinstance(target, array):
+        target[:] = array(target.typecode, values)
+    else:
+        for index, value in enumerate(values):
+            target[index] = value
+
+def _useParallel(size, workers, a, b):
+    """ Return True if a product of the given size should use processes
+
+    The processes compute in doubles, so only operands holding nothing
+    but floats are handed to them, integers stay exact.
+    """
+    if workers is None:
+        workers = WORKERS
+        if size < PARALLEL_THRESHOLD:
+            return False
+    return workers > 1 and _floating(a) and _floating(b)
+
+def _floating(rows):
+    """ Return True if every element of the rows is a float """
+    for row in rows:
+        if isinstance(row, memoryview):
+            if row.format not in ('d', 'f'):
+                return False
+        elif isinstance(row, array):
+            if row.typecode not in ('d', 'f'):
+                return False
+        elif not all(type(x) is float for x in row):
+            return False
+    return True
+
+def parallelMultiply(a, b, workers):
+    """ Multiply the rows a by the rows b over a pool of processes
+
+    >>> parallelMultiply([[1, 2]], [[3], [4]], 2)
+    [[11.0]]
+
+    Returns:
+        The product as a list of lists of floats, or None if the
+        elements can not be stored as doubles.
+    """
+    try:
+        return parallel.multiply(a, b, workers)
+    except TypeError:
+        return None
+
+def blockedMultiply(a, columns, blockSize=None, out=None):
+    """ Multiply the rows a by the given columns one tile at a time
+
+    Each tile of columns is applied to every row of a before moving on
+    to the next tile. Each entry is a single sum over a map of
+    multiplications so no Python level function is called per element.
+
+    >>> blockedMultiply([[1, 2, 3]], [[1, 0, 1], [0, 1, 1]], 1)
+    [[4, 5]]
+
+    Args:
+        a: list of row sequences of the left operand.
+        columns: list of column sequences of the right operand.
+        blockSize: number of columns per tile, defaults to BLOCK_SIZE.
+        out: optional rows the product is written into in place, they
+             must not be the rows of either operand.
+
+    Returns:
+        The product as a list of lists, or out.
+    """
+    if blockSize is None:
+        blockSize = BLOCK_SIZE
+    nColumns = len(columns)
+    if out is not None and all(isinstance(target, list) for target in out):
+        result = out
+    else:
+        result = [[0] * nColumns for row in a]
+    for start in range(0, nColumns, blockSize):
+        tile = columns[start:start + blockSize]
+        stop = start + len(tile)
+        for row, target in zip(a, result):
+            target[start:stop] = [sum(map(mul, row, column)) for column in tile]
+    if result is not out:
+        return _store(result, out)
+    return result
+
+def _useStrassen(nRows, nInner, nColumns):
+    """ Return True if a product of the given shape should use Strassen
+
+    The operands must be large and close enough to square that padding
+    them to square does not cost more than the recursion saves.
+    """
+    if STRASSEN_THRESHOLD is None:
+        return False
+    smallest = min(nRows, nInner, nColumns)
+    return smallest >= STRASSEN_THRESHOLD and \
+        2 * smallest >= max(nRows, nInner, nColumns)
+
+def strassenMultiply(a, b, leaf=None):
+    """ Multiply the rows a by the rows b with the Strassen-Winograd scheme
+
+    The operands are zero padded to a square whose side halves down to
+    at most leaf, each level then needs seven half sized products
+    instead of eight. Quadrants no larger than leaf are multiplied
+    by the blocked kernel. Integer operands give exact results, floating
+    point ones may differ from the classical product by rounding.
+
+    >>> strassenMultiply([[1, 2, 3], [4, 5, 6]], [[1, 0], [0, 1], [1, 1]], 1)
+    [[4, 5], [10, 11]]
+
+    Args:
+        a: list of row sequences of the left operand.
+        b: list of row sequences of the right operand.
+        leaf: largest side multiplied classically, defaults to
+              STRASSEN_LEAF.
+
+    Returns:
+        The product as a list of lists.
+    """
+    if leaf is None:
+        leaf = STRASSEN_LEAF
+    leaf = max(leaf, 1)
+    nRows = len(a)
+    nColumns = len(b[0]) if b else 0
+    side = max(nRows, len(b), nColumns)
+    depth = 0
+    while side > leaf:
+        side = (side + 1) // 2
+        depth += 1
+    side <<= depth
+    result = _strassen(_pad(a, side), _pad(b, side), leaf)
+    return [row[:nColumns] for row in result[:nRows]]
+
+def _pad(rows, side):
+    """ Return the rows as lists zero padded to a side by side square """
+    padded = [list(row) + [0] * (side - len(row)) for row in rows]
+    padded.extend([0] * side for i in range(side - len(rows)))
+    return padded
+
+def _add(x, y):
+    """ Return the elementwise sum of two lists of rows """
+    return [list(map(add, u, v)) for u, v in zip(x, y)]
+
+def _sub(x, y):
+    """ Return the elementwise difference of two lists of rows """
+    return [list(map(sub, u, v)) for u, v in zip(x, y)]
+
+def _strassen(a, b, leaf):
+    """ Multiply two square lists of rows whose side halves evenly """
+    side = len(a)
+    if side <= leaf:
+        return blockedMultiply(a, list(zip(*b)))
+    half = side // 2
+    a11 = [row[:half] for row in a[:half]]
+    a12 = [row[half:] for row in a[:half]]
+    a21 = [row[:half] for row in a[half:]]
+    a22 = [row[half:] for row in a[half:]]
+    b11 = [row[:half] for row in b[:half]]
+    b12 = [row[half:] for row in b[:half]]
+    b21 = [row[:half] for row in b[half:]]
+    b22 = [row[half:] for row in b[half:]]
+
+    s1 = _add(a21, a22)
+    s2 = _sub(s1, a11)
+    s3 = _sub(a11, a21)
+    s4 = _sub(a12, s2)
+    t1 = _sub(b12, b11)
+    t2 = _sub(b22, t1)
+    t3 = _sub(b22, b12)
+    t4 = _sub(t2, b21)
+
+    p1 = _strassen(a11, b11, leaf)
+    p2 = _strassen(a12, b21, leaf)
+    p3 = _strassen(s4, b22, leaf)
+    p4 = _strassen(a22, t4, leaf)
+    p5 = _strassen(s1, t1, leaf)
+    p6 = _strassen(s2, t2, leaf)
+    p7 = _strassen(s3, t3, leaf)
+
+    u2 = _add(p1, p6)
+    u3 = _add(u2, p7)
+    c11 = _add(p1, p2)
+    c12 = _add(_add(u2, p5), p3)
+    c21 = _sub(u3, p4)
+    c22 = _add(u3, p5)
+    return [left + right for left, right in zip(c11, c12)] + \
+        [left + right for left, right in zip(c21, c22)]
+
+def numpyMultiply(a, b, transposed=False):
+    """ Multiply the rows a by the rows b with NumPy
+
+    Only floating point and complex operands are handed to NumPy since
+    integer operands would lose the arbitrary precision of Python ints.
+    If transposed is True the rows b are the columns of the right
+    operand.
+
+    Returns:
+        The product as a list of lists, or None if NumPy is not
+        available or the operands are not floating point.
+    """
+    if numpy is None:
+        return None
+    left = numpy.array(a)
+    right = numpy.array(b)
+    if left.dtype.kind not in 'fc' and right.dtype.kind not in 'fc':
+        return None
+    if left.dtype.kind not in 'fciu' or right.dtype.kind not in 'fciu':
+        return None
+    if transposed:
+        right = right.T
+    return numpy.dot(left, right).tolist()
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
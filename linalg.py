@@ -0,0 +1,677 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Linear algebra routines for the Matrix
+
+The routines work on plain lists of rows so that they can be shared by
+the Matrix methods without wrapping every row in a Vector.
+
+The iterative eigenvalue and singular value routines only need the
+products of an operator with vectors. Any object with nRows, nColumns,
+a transpose T and a product with a Vector will do, a Matrix or a
+sparse.CSRMatrix, so only the top few components of a large operator
+are ever computed.
+"""
+from operator import add, mul, sub
+from itertools import repeat
+from math import copysign, hypot, sqrt
+import random
+from vector import Vector
+
+# Largest number of QR or QL steps per eigenvalue before giving up.
+QR_ITERATIONS = 500
+
+def luDecompose(rows):
+    """ LU decompose a square matrix with partial pivoting
+
+    The factors are packed into one list of rows: L is below the
+    diagonal (its unit diagonal is not stored) and U is on and above
+    the diagonal. Row i of the factors is row pivots[i] of the input.
+
+    >>> lu, pivots, sign = luDecompose([[1, 2], [3, 4]])
+    >>> lu
+    [[3, 4], [0.3333333333333333, 0.6666666666666667]]
+    >>> pivots, sign
+    ([1, 0], -1)
+
+    Args:
+        rows: list of row sequences of a square matrix.
+
+    Returns:
+        The packed factors, the pivot rows and the sign of the
+        permutation.
+    """
+    lu = [list(row) for row in rows]
+    n = len(lu)
+    pivots = list(range(n))
+    sign = 1
+    for k in range(n):
+        pivot = max(range(k, n), key=lambda i: abs(lu[i][k]))
+        if pivot != k:
+            lu[k], lu[pivot] = lu[pivot], lu[k]
+            pivots[k], pivots[pivot] = pivots[pivot], pivots[k]
+            sign = -sign
+        top = lu[k]
+        if top[k] == 0:
+            continue
+        tail = top[k + 1:]
+        for row in lu[k + 1:]:
+            factor = row[k] / top[k]
+            row[k] = factor
+            if factor:
+                row[k + 1:] = map(sub, row[k + 1:], map(mul, tail, repeat(factor)))
+    return lu, pivots, sign
+
+def luSolve(lu, pivots, b):
+    """ Solve A x = b given the LU decomposition of A
+
+    >>> lu, pivots, sign = luDecompose([[2, 1], [1, 3]])
+    >>> luSolve(lu, pivots, [3, 5])
+    [0.8, 1.4]
+
+    Args:
+        lu: packed factors from luDecompose.
+        pivots: pivot rows from luDecompose.
+        b: sequence of the right hand side.
+
+    Returns:
+        The solution as a list.
+    """
+    n = len(lu)
+    if len(b) != n:
+        raise ValueError('right hand side must have a length of nRows')
+    y = [b[pivot] for pivot in pivots]
+    for i in range(1, n):
+        y[i] -= sum(map(mul, lu[i][:i], y[:i]))
+    for i in reversed(range(n)):
+        row = lu[i]
+        if row[i] == 0:
+            raise SingularMatrixError('matrix is singular')
+        y[i] = (y[i] - sum(map(mul, row[i + 1:], y[i + 1:]))) / row[i]
+    return y
+
+def luDeterminant(lu, sign):
+    """ Return the determinant given the LU decomposition
+
+    >>> lu, pivots, sign = luDecompose([[1, 2], [3, 4]])
+    >>> round(luDeterminant(lu, sign), 12)
+    -2.0
+    """
+    determinant = sign
+    for i, row in enumerate(lu):
+        determinant *= row[i]
+    return determinant
+
+def _dot(x, y):
+    return sum(map(mul, x, y))
+
+def _norm(x):
+    return sqrt(sum(map(mul, x, x)))
+
+def _axpy(alpha, x, y):
+    """ Return alpha * x + y """
+    return list(map(add, map(mul, x, repeat(alpha)), y))
+
+def _apply(operator, x):
+    """ Return the product of the operator and the list x as a list """
+    return list(operator * Vector(x))
+
+def _start(n, seed=0):
+    """ Return a reproducible random unit vector of length n """
+    generator = random.Random(seed)
+    x = [generator.uniform(-1, 1) for i in range(n)]
+    length = _norm(x)
+    return [a / length for a in x]
+
+def _restart(basis, n, attempts=3):
+    """ Return a unit vector orthogonal to the basis, None if none is found """
+    for attempt in range(attempts):
+        x = _start(n, len(basis) + attempt)
+        for sweep in range(2):
+            for u in basis:
+                x = _axpy(-_dot(x, u), u, x)
+        length = _norm(x)
+        if length > 1e-8:
+            return [a / length for a in x]
+    return None
+
+def _orient(x):
+    """ Return x with the sign making its largest component positive """
+    if x and -min(x) > max(x):
+        return [0.0 - a for a in x]
+    return x
+
+def _hessenberg(a, vectors=False):
+    """ Reduce a square list of rows in place to upper Hessenberg form
+
+    Householder reflections H make every entry below the sub diagonal
+    zero with A = Q * H * Q.T, for a symmetric matrix H is tridiagonal.
+
+    Returns:
+        The orthogonal Q as a list of rows if vectors, else None.
+    """
+    n = len(a)
+    q = [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)] \
+        if vectors else None
+    for k in range(n - 2):
+        x = [a[i][k] for i in range(k + 1, n)]
+        length = _norm(x)
+        if length == 0:
+            continue
+        v = list(x)
+        v[0] += copysign(length, x[0])
+        length = _norm(v)
+        v = [t / length for t in v]
+        rows = a[k + 1:]
+        for j in range(k, n):
+            s = 2 * sum(map(mul, v, [row[j] for row in rows]))
+            for row, t in zip(rows, v):
+                row[j] -= s * t
+        for row in a if q is None else a + q:
+            tail = row[k + 1:]
+            s = 2 * sum(map(mul, tail, v))
+            row[k + 1:] = [x - s * t for x, t in zip(tail, v)]
+        for i in range(k + 2, n):
+            a[i][k] = 0.0
+    return q
+
+def _francis(a, tolerance):
+    """ Return the eigenvalues of an upper Hessenberg list of rows
+
+    Francis double shift QR steps, with the two shifts the eigenvalues
+    of the trailing 2 by 2 block, so a complex conjugate pair is found
+    in real arithmetic. After every 10 steps with out a deflation an
+    exceptional shift breaks up cycles. The rows are overwritten.
+    """
+    n = len(a)
+    values = []
+    norm = sum(abs(x) for row in a for x in row)
+    last = n - 1
+    total = 0.0
+    while last >= 0:
+        steps = 0
+        while True:
+            # Look for a negligible sub diagonal entry to split at.
+            low = last
+            while low >= 1:
+                scale = abs(a[low - 1][low - 1]) + abs(a[low][low]) or norm
+                if abs(a[low][low - 1]) <= tolerance * scale:
+                    a[low][low - 1] = 0.0
+                    break
+                low -= 1
+            x = a[last][last]
+            if low == last:
+                values.append(x + total)
+                last -= 1
+                break
+            y = a[last - 1][last - 1]
+            w = a[last][last - 1] * a[last - 1][last]
+            if low == last - 1:
+                p = 0.5 * (y - x)
+                q = p * p + w
+                z = sqrt(abs(q))
+                x += total
+                if q >= 0:
+                    z = p + copysign(z, p)
+                    values.extend([x + z, x - w / z if z else x + z])
+                else:
+                    values.extend([complex(x + p, z), complex(x + p, -z)])
+                last -= 2
+                break
+            if steps >= QR_ITERATIONS:
+                raise ArithmeticError('the QR algorithm did not converge')
+            if steps and steps % 10 == 0:
+                total += x
+                for i in range(last + 1):
+                    a[i][i] -= x
+                s = abs(a[last][last - 1]) + abs(a[last - 1][last - 2])
+                x = y = 0.75 * s
+                w = -0.4375 * s * s
+            steps += 1
+            # Start the bulge at the lowest row where it does not spill
+            # into a negligible entry.
+            m = last - 2
+            while True:
+                z = a[m][m]
+                r = x - z
+                s = y - z
+                p = (r * s - w) / a[m + 1][m] + a[m][m + 1]
+                q = a[m + 1][m + 1] - z - r - s
+                r = a[m + 2][m + 1]
+                s = abs(p) + abs(q) + abs(r)
+                p /= s
+                q /= s
+                r /= s
+                if m == low:
+                    break
+                u = abs(a[m][m - 1]) * (abs(q) + abs(r))
+                v = abs(p) * (abs(a[m - 1][m - 1]) + abs(z) +
+                              abs(a[m + 1][m + 1]))
+                if u <= tolerance * v:
+                    break
+                m -= 1
+            for i in range(m + 2, last + 1):
+                a[i][i - 2] = 0.0
+                if i != m + 2:
+                    a[i][i - 3] = 0.0
+            # Chase the bulge down with 3 by 3 reflections.
+            for k in range(m, last):
+                if k != m:
+                    p = a[k][k - 1]
+                    q = a[k + 1][k - 1]
+                    r = a[k + 2][k - 1] if k != last - 1 else 0.0
+                    x = abs(p) + abs(q) + abs(r)
+                    if x != 0.0:
+                        p /= x
+                        q /= x
+                        r /= x
+                s = copysign(sqrt(p * p + q * q + r * r), p)
+                if s == 0.0:
+                    continue
+                if k == m:
+                    if low != m:
+                        a[k][k - 1] = -a[k][k - 1]
+                else:
+                    a[k][k - 1] = -s * x
+                p += s
+                x = p / s
+                y = q / s
+                z = r / s
+                q /= p
+                r /= p
+                for j in range(k, last + 1):
+                    p = a[k][j] + q * a[k + 1][j]
+                    if k != last - 1:
+                        p += r * a[k + 2][j]
+                        a[k + 2][j] -= p * z
+                    a[k + 1][j] -= p * y
+                    a[k][j] -= p * x
+                for i in range(low, min(last, k + 3) + 1):
+                    p = x * a[i][k] + y * a[i][k + 1]
+                    if k != last - 1:
+                        p += z * a[i][k + 2]
+                        a[i][k + 2] -= p * r
+                    a[i][k + 1] -= p * q
+                    a[i][k] -= p
+    return values
+
+def qrEigen(rows, vectors=False, tolerance=2.2e-16):
+    """ Return the eigenvalues of a small square matrix by the QR algorithm
+
+    The matrix is first reduced to upper Hessenberg form, then Francis
+    double shift QR steps split it into 1 by 1 and 2 by 2 blocks, the
+    2 by 2 blocks giving pairs of complex eigenvalues. The reduction
+    costs O(n ** 3) and every step O(n ** 2), so this is for small
+    matrices, such as the ones the Lanczos routines reduce to. For a
+    symmetric matrix with vectors the Hessenberg form is tridiagonal
+    and its eigenpairs are found by implicit QL steps.
+
+    >>> [round(value, 12) for value in qrEigen([[2, 1], [1, 2]])]
+    [3.0, 1.0]
+    >>> qrEigen([[0, -1], [1, 0]])
+    [1j, -1j]
+    >>> values = qrEigen([[0.6, -0.8, 0.3, 0.1],
+    ...                   [0.9, 0.2, -0.5, 0.7],
+    ...                   [-0.4, 0.6, 0.1, -0.9],
+    ...                   [0.2, -0.3, 0.8, 0.4]])
+    >>> [complex(round(v.real, 6), round(v.imag, 6)) for v in values]
+    [(0.294465+1.335761j), (0.294465-1.335761j), (0.355535+0.440292j), (0.355535-0.440292j)]
+
+    Args:
+        rows: list of row sequences of a square matrix.
+        vectors: if True the matrix must be symmetric and the
+                 eigenvectors are returned as well.
+        tolerance: relative size of a negligible sub diagonal entry.
+
+    Returns:
+        The eigenvalues, largest magnitude first, and for vectors a list
+        of the matching unit eigenvectors as lists.
+    """
+    a = [[float(x) for x in row] for row in rows]
+    n = len(a)
+    q = _hessenberg(a, vectors)
+    if not vectors:
+        values = _francis(a, tolerance)
+        return sorted(values, key=lambda value: -abs(value))
+    values, ys = _tridiagonalEigen([a[i][i] for i in range(n)],
+                                   [a[i + 1][i] for i in range(n - 1)])
+    order = sorted(range(n), key=lambda i: -abs(values[i]))
+    return [values[i] for i in order], \
+        [[_dot(row, ys[i]) for row in q] for i in order]
+
+def _tridiagonalEigen(diagonal, offDiagonal, vectors=True):
+    """ Eigenpairs of a symmetric tridiagonal matrix by implicit QL steps
+
+    Returns:
+        The eigenvalues and, per eigenvalue, its unit eigenvector as a
+        list, or if vectors is False only the last component of it,
+        which costs O(1) instead of O(n) per rotation.
+    """
+    d = list(diagonal)
+    e = list(offDiagonal) + [0.0]
+    n = len(d)
+    if vectors:
+        z = [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)]
+    else:
+        z = [0.0] * n
+        if n:
+            z[-1] = 1.0
+    for l in range(n):
+        iterations = 0
+        while True:
+            m = l
+            while m < n - 1:
+                if abs(e[m]) <= 2.2e-16 * (abs(d[m]) + abs(d[m + 1])):
+                    break
+                m += 1
+            if m == l:
+                break
+            iterations += 1
+            if iterations > QR_ITERATIONS:
+                raise ArithmeticError('the QL algorithm did not converge')
+            g = (d[l + 1] - d[l]) / (2.0 * e[l])
+            r = hypot(g, 1.0)
+            g = d[m] - d[l] + e[l] / (g + copysign(r, g))
+            s = c = 1.0
+            p = 0.0
+            i = m - 1
+            while i >= l:
+                f = s * e[i]
+                b = c * e[i]
+                r = hypot(f, g)
+                e[i + 1] = r
+                if r == 0.0:
+                    d[i + 1] -= p
+                    e[m] = 0.0
+                    break
+                s = f / r
+                c = g / r
+                g = d[i + 1] - p
+                r = (d[i] - g) * s + 2.0 * c * b
+                p = s * r
+                d[i + 1] = g + p
+                g = c * r - b
+                left, right = z[i], z[i + 1]
+                if vectors:
+                    z[i + 1] = list(map(add, map(mul, left, repeat(s)),
+                                        map(mul, right, repeat(c))))
+                    z[i] = list(map(sub, map(mul, left, repeat(c)),
+                                    map(mul, right, repeat(s))))
+                else:
+                    z[i + 1] = s * left + c * right
+                    z[i] = c * left - s * right
+                i -= 1
+            else:
+                d[l] -= p
+                e[l] = g
+                e[m] = 0.0
+    return d, z
+
+def _tridiagonalVector(diagonal, offDiagonal, value, others=()):
+    """ Return a unit eigenvector of a symmetric tridiagonal matrix
+
+    A few steps of inverse iteration with the eigenvalue as shift, each
+    a tridiagonal solve with partial pivoting. The vector is kept
+    orthogonal to others, eigenvectors of eigenvalues close to value.
+    """
+    n = len(diagonal)
+    scale = max([abs(x) for x in diagonal] + [abs(x) for x in offDiagonal])
+    tiny = 2.2e-16 * (scale or 1.0)
+    x = _start(n, seed=1)
+    for step in range(3):
+        lower = list(offDiagonal)
+        middle = [a - value for a in diagonal]
+        upper = list(offDiagonal) + [0.0]
+        further = [0.0] * n
+        b = list(x)
+        for i in range(n - 1):
+            if abs(middle[i]) >= abs(lower[i]):
+                if middle[i] == 0:
+                    middle[i] = tiny
+                factor = lower[i] / middle[i]
+                middle[i + 1] -= factor * upper[i]
+                b[i + 1] -= factor * b[i]
+            else:
+                factor = middle[i] / lower[i]
+                middle[i], next = lower[i], middle[i + 1]
+                middle[i + 1] = upper[i] - factor * next
+                further[i] = upper[i + 1]
+                upper[i + 1] = -factor * upper[i + 1]
+                upper[i] = next
+                b[i], b[i + 1] = b[i + 1], b[i] - factor * b[i + 1]
+        for i in range(n - 1, -1, -1):
+            total = b[i]
+            if i + 1 < n:
+                total -= upper[i] * b[i + 1]
+            if i + 2 < n:
+                total -= further[i] * b[i + 2]
+            b[i] = total / (middle[i] or tiny)
+        for u in others:
+            b = _axpy(-_dot(b, u), u, b)
+        length = _norm(b)
+        if length == 0:
+            break
+        x = [a / length for a in b]
+    return x
+
+def powerIteration(operator, iterations=1000, tolerance=1e-10, start=None):
+    """ Return the eigenvalue of largest magnitude and its eigenvector
+
+    >>> from matrix import Matrix
+    >>> value, vector = powerIteration(Matrix([[2, 0], [0, 1]]))
+    >>> round(value, 6), [round(x, 6) for x in vector]
+    (2.0, [1.0, 0.0])
+
+    Args:
+        operator: square Matrix, CSRMatrix or other operator.
+        iterations: largest number of products.
+        tolerance: residual |A * x - value * x|, relative to the
+                   eigenvalue, taken as converged.
+        start: optional start vector, a reproducible random one if None.
+
+    Returns:
+        The eigenvalue and a unit eigenvector as a Vector.
+    """
+    n = operator.nRows()
+    x = _start(n) if start is None else list(start)
+    length = _norm(x)
+    x = [a / length for a in x]
+    value = 0.0
+    for i in range(iterations):
+        y = _apply(operator, x)
+        value = _dot(x, y)
+        residual = _norm(_axpy(-value, x, y))
+        length = _norm(y)
+        if length == 0 or residual <= tolerance * abs(value):
+            break
+        x = [a / length for a in y]
+    return value, Vector(_orient(x))
+
+def lanczos(operator, k, tolerance=1e-10, maxSteps=None):
+    """ Return the k eigenpairs of largest magnitude of a symmetric operator
+
+    A Krylov basis is built one product at a time and kept orthogonal,
+    the operator restricted to it is tridiagonal and its eigenpairs,
+    found by implicit QL steps, approximate those of the operator. Steps are
+    added until the residuals of the k wanted pairs are below the
+    tolerance.
+
+    >>> from matrix import Matrix
+    >>> values, vectors = lanczos(Matrix([[2, 1, 0], [1, 2, 0], [0, 0, 1]]), 2)
+    >>> [round(value, 10) for value in values]
+    [3.0, 1.0]
+
+    The basis is restarted with a new vector whenever it spans an
+    invariant subspace, so repeated eigenvalues are all found:
+    >>> values, vectors = lanczos(Matrix([[3, 0, 0], [0, 3, 0], [0, 0, 1]]), 2)
+    >>> [round(value, 10) for value in values]
+    [3.0, 3.0]
+    >>> identity = Matrix([[float(i == j) for j in range(4)] for i in range(4)])
+    >>> values, vectors = lanczos(identity, 2)
+    >>> [round(value, 10) for value in values]
+    [1.0, 1.0]
+    >>> round(abs(_dot(list(vectors[0]), list(vectors[1]))), 10)
+    0.0
+
+    Args:
+        operator: symmetric Matrix, CSRMatrix or other operator.
+        k: number of eigenpairs.
+        tolerance: residual, relative to the eigenvalue, taken as
+                   converged.
+        maxSteps: largest size of the basis, nRows by default.
+
+    Raises:
+        ValueError: if fewer than k eigenpairs can be found, as when
+                    maxSteps is less than k.
+
+    Returns:
+        The eigenvalues, largest magnitude first, and the matching unit
+        eigenvectors as Vectors, each signed so that its largest
+        component is positive.
+    """
+    n = operator.nRows()
+    k = min(k, n)
+    if k <= 0:
+        return [], []
+    maxSteps = min(maxSteps or n, n)
+    basis = [_start(n)]
+    alphas = []
+    betas = []
+    check = k
+    while True:
+        v = basis[-1]
+        w = _apply(operator, v)
+        alpha = _dot(w, v)
+        alphas.append(alpha)
+        w = _axpy(-alpha, v, w)
+        if len(basis) > 1:
+            w = _axpy(-betas[-1], basis[-2], w)
+        # Full reorthogonalization keeps the basis orthogonal in floating
+        # point, it costs a product with the basis per step.
+        for u in basis:
+            w = _axpy(-_dot(w, u), u, w)
+        beta = _norm(w)
+        steps = len(basis)
+        # At a breakdown the basis spans an invariant subspace. Its
+        # Ritz pairs are exact but other eigenvectors, such as further
+        # copies of a repeated eigenvalue, are not in it yet.
+        breakdown = beta <= 1e-12 * (abs(alpha) or 1.0)
+        done = steps >= maxSteps
+        if done or (steps >= check and not breakdown):
+            # The residuals only need the last components of the
+            # eigenvectors of the tridiagonal matrix.
+            values, ends = _tridiagonalEigen(alphas, betas, vectors=False)
+            order = sorted(range(steps), key=lambda i: -abs(values[i]))[:k]
+            if len(order) < k:
+                raise ValueError('only %d of %d eigenpairs found in %d '
+                                 'steps' % (len(order), k, steps))
+            if done or all(abs(beta * ends[i]) <= tolerance *
+                           max(abs(values[i]), 1e-300) for i in order):
+                spread = max(abs(value) for value in values)
+                found = []
+                vectors = []
+                for i in order:
+                    close = [y for value, y in found
+                             if abs(value - values[i]) <= 1e-3 * spread]
+                    y = _tridiagonalVector(alphas, betas[:steps - 1],
+                                           values[i], close)
+                    found.append((values[i], y))
+                    x = [0.0] * n
+                    for weight, u in zip(y, basis):
+                        x = _axpy(weight, u, x)
+                    vectors.append(Vector(_orient(x)))
+                return [values[i] for i in order], vectors
+            check = steps + max(5, steps // 4)
+        if breakdown:
+            # Go on with a new start vector, the tridiagonal matrix
+            # splits into blocks at the zero.
+            v = _restart(basis, n)
+            if v is None:
+                raise ValueError('no start vector orthogonal to the basis '
+                                 'after %d steps' % steps)
+            betas.append(0.0)
+            basis.append(v)
+        else:
+            betas.append(beta)
+            basis.append([a / beta for a in w])
+
+class _NormalOperator(object):
+    """ The operator A.T * A of an operator A, applied as two products """
+
+    def __init__(self, operator):
+        self._operator = operator
+        self._transposed = operator.T
+
+    def nRows(self):
+        return self._operator.nColumns()
+
+    def __mul__(self, vector):
+        return self._transposed * (self._operator * vector)
+
+def truncatedSVD(operator, k, tolerance=1e-10):
+    """ Return the k largest singular values and their singular vectors
+
+    The right singular vectors are the eigenvectors of A.T * A, found by
+    lanczos with one product by A and one by A.T per step, the left ones
+    are A * v / s. Singular values much smaller than the largest lose
+    accuracy since A.T * A squares them.
+
+    >>> from matrix import Matrix
+    >>> u, s, v = truncatedSVD(Matrix([[3, 0], [0, 4], [0, 0]]), 1)
+    >>> [round(value, 10) for value in s]
+    [4.0]
+    >>> [round(x, 10) for x in u[0]], [round(x, 10) for x in v[0]]
+    ([0.0, 1.0, 0.0], [0.0, 1.0])
+
+    Args:
+        operator: Matrix, CSRMatrix or other operator with a transpose.
+        k: number of singular values.
+        tolerance: see lanczos.
+
+    Returns:
+        The left singular vectors, the singular values, largest first,
+        and the right singular vectors, the vectors as Vectors.
+    """
+    values, rights = lanczos(_NormalOperator(operator), k, tolerance)
+    singular = [sqrt(max(value, 0.0)) for value in values]
+    lefts = []
+    for value, right in zip(singular, rights):
+        left = _apply(operator, list(right))
+        lefts.append(Vector([x / value for x in left] if value
+                            else [0.0] * len(left)))
+    return lefts, singular, rights
+
+class SingularMatrixError(Exception):
+    def __init__(self, value):
+        self.parameter = value
+    def __str__(self):
+        return repr(self.parameter)
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -27,8 +27,36 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from vector import Vector, VectorLengthError
-from functools import reduce
+from vector import Vector, VectorBatch, VectorLengthError, _evaluated
+from operator import add, sub, mul
+from itertools import chain, repeat
+from array import array
+from itertools import count
+from collections import OrderedDict
+from collections.abc import MutableSequence
+from numbers import Integral
+import storage
+import kernels
+import linalg
+import dtypes
+
+# Source of version numbers. Every change to the elements of a Matrix
+# gives it a new number, so a number is never reused.
+_versions = count()
+
+# Number of powers of matrices kept by Matrix.__pow__, least recently
+# used first out. Zero, the default, turns the cache off. The cache is
+# keyed by Matrix.version, which does not see writes through row
+# Vectors, so only turn it on for matrices changed as a whole.
+POWER_CACHE_SIZE = 0
+
+# Computed powers by (transposed, version, exponent). Version numbers are
+# never reused so an entry can not be mistaken for another matrix.
+_powers = OrderedDict()
+
+def clearPowers():
+    """ Forget every power kept by Matrix.__pow__ """
+    _powers.clear()
 
 class Matrix(object):
     """ Mathematical Matrix
@@ -36,36 +64,216 @@ class Matrix(object):
         The Matrix implements a row-matrix
     """
 
-    def __init__(self, elements):
+    __slots__ = ('_storage', '_data', '_elements', '_dtype', '_revision',
+                 '_derived', '__weakref__')
+
+    def __init__(self, elements, storage=None, dtype=None):
         """ Construct a Matrix
 
         Elements must be a list of list where each internal
         list must be the same length.
 
+        The storage selects how the elements are kept. The 'list'
+        storage (the default) keeps the given lists. The 'array'
+        storage copies the elements into one contiguous array of
+        doubles and hands out rows that are views into that block.
+        When elements is a Matrix the storage is shared unless a
+        different storage or dtype is asked for. A transposed view is
+        always copied into rows of its own.
+
+        The dtype ('int64', 'float32', 'float64' or 'complex128', see
+        the dtypes module) makes every element of that one type. The
+        elements are then converted, and kept in an array of that
+        type unless the 'list' storage is asked for.
+
         >>> m1 = Matrix([[1.1, 1.2],\
                          [2.1, 2.2],\
                          [3.1, 3.2]])
+        >>> m2 = Matrix([[1, 2], [3, 4]], storage='array')
+        >>> m2
+        Matrix([[1.0, 2.0],
+                [3.0, 4.0]])
+        >>> m3 = Matrix([[1, 2], [3, 4]], dtype='int64')
+        >>> m3.storage(), m3.dtype()
+        ('array', int64)
+        >>> m4 = Matrix(m2.T)
+        >>> m4.storage(), m4._data is not None, m4[0]
+        ('array', True, Vector([1.0, 3.0]))
+        >>> type(Matrix(m1.T)._elements[0])
+        <class 'list'>
 
         Args:
             elements: list of list
+            storage: 'list' or 'array'
+            dtype: name of a dtype or a dtypes.DType
         """
+        dtype = dtypes.dtype(dtype)
+        if isinstance(elements, TransposedMatrix):
+            elements = elements.materialize()
         if isinstance(elements, Matrix):
-            self._elements = elements._elements
+            if (storage is None or storage == elements._storage) and \
+                    (dtype is None or dtype is elements._dtype):
+                self.copy(elements)
+                return
+            if dtype is None:
+                dtype = elements._dtype
+            elements = elements._elements
 
-        else:
-            if not isinstance(elements, list):
+        elif not isinstance(elements, list):
+            raise TypeError
+
+        rows = []
+        length = len(elements[0])
+        for vector in elements:
+            if len(vector) != length:
+                raise VectorLengthError('rows must have the same length')
+            if isinstance(vector, Vector):
+                vector = vector._elements
+            if not isinstance(vector, (MutableSequence, memoryview)):
                 raise TypeError
+            rows.append(vector)
+
+        if storage is None:
+            storage = Matrix._storageOf(rows, dtype)
+        self._setRows(rows, storage, dtype)
+
+    @classmethod
+    def fromRows(cls, rows, storage=None, dtype=None):
+        """ Construct a Matrix from an iterable of rows
+
+        The rows are consumed one at a time, so they may come from a
+        generator. With the 'array' storage each row is copied straight
+        into the flat block and no row is kept.
+
+        >>> Matrix.fromRows(([i, i * i] for i in range(3)), storage='array')
+        Matrix([[0.0, 0.0],
+                [1.0, 1.0],
+                [2.0, 4.0]])
+
+        Args:
+            rows: iterable of rows of the same length.
+            storage: 'list' (the default) or 'array'
+            dtype: name of a dtype or a dtypes.DType
+        """
+        if storage != 'array':
+            return cls([list(row) for row in rows], storage=storage,
+                       dtype=dtype)
+        return cls._fromFlat(*Matrix._flattenRows(rows, dtypes.dtype(dtype)))
+
+    @staticmethod
+    def _flattenRows(rows, dtype=None):
+        """ Copy an iterable of rows into a flat block
+
+        Returns:
+            The block, the number of rows and the number of columns.
+        """
+        data = array(Matrix._typecodeOf(dtype))
+        nRows = 0
+        nColumns = None
+        for row in rows:
+            if nColumns is None:
+                nColumns = len(row)
+            elif len(row) != nColumns:
+                raise VectorLengthError('rows must have the same length')
+            data.extend(row)
+            nRows += 1
+        if nColumns is None:
+            raise ValueError('a Matrix needs at least one row')
+        return data, nRows, nColumns
+
+    @staticmethod
+    def _storageOf(rows, dtype=None):
+        """ Return the storage name fitting the given rows and dtype """
+        if dtype is not None:
+            if dtype.typecode is None:
+                return storage.LIST
+            return storage.ARRAY
+        if all(isinstance(row, list) for row in rows):
+            return storage.LIST
+        return storage.ARRAY
+
+    @staticmethod
+    def _typecodeOf(dtype):
+        """ Return the array typecode storing the dtype """
+        if dtype is None:
+            return storage.DEFAULT_TYPECODE
+        if dtype.typecode is None:
+            raise ValueError('%s needs the list storage' % dtype.name)
+        return dtype.typecode
+
+    def _setRows(self, rows, name, dtype=None):
+        """ Store the rows using the named storage and dtype """
+        storage.checkStorage(name)
+        self._storage = name
+        if name == storage.LIST:
+            self._data = None
+            if dtype is not None:
+                self._elements = [dtype.convert(row) for row in rows]
+            else:
+                self._elements = [row if isinstance(row, list) else list(row)
+                                  for row in rows]
+            self._dtype = dtype
+        else:
+            nColumns = len(rows[0]) if rows else 0
+            self._data = storage.flatten(rows, Matrix._typecodeOf(dtype))
+            self._elements = storage.rowViews(self._data, len(rows), nColumns)
+            self._dtype = dtypes.fromTypecode(self._data.typecode)
+        self._revision = [next(_versions)]
+        self._derived = {}
+
+    @classmethod
+    def _fromFlat(cls, data, nRows, nColumns):
+        """ Build an array backed Matrix around a flat row major block """
+        new = cls.__new__(cls)
+        new._storage = storage.ARRAY
+        new._data = data
+        new._elements = storage.rowViews(data, nRows, nColumns)
+        new._dtype = dtypes.fromTypecode(storage.typecodeOf(data))
+        new._revision = [next(_versions)]
+        new._derived = {}
+        return new
+
+    def _new(self, rows, dtype):
+        """ Build a Matrix from rows using the storage of this Matrix
+
+        The storage falls back to 'list' for a dtype arrays can not hold.
+        """
+        name = self._storage
+        if dtype is not None and dtype.typecode is None:
+            name = storage.LIST
+        new = Matrix.__new__(Matrix)
+        new._setRows(rows, name, dtype)
+        return new
+
+    def _newFlat(self, function, other, dtype):
+        """ Build an array backed Matrix mapping function over flat blocks
+
+        A dtype arrays can not hold builds list rows instead.
+        """
+        if dtype is not None and dtype.typecode is None:
+            values = list(map(function, self._data, other))
+            nColumns = self.nColumns()
+            return self._new([values[i:i + nColumns]
+                              for i in range(0, len(values), nColumns or 1)],
+                             dtype)
+        typecode = Matrix._typecodeOf(dtype) if dtype is not None \
+            else storage.typecodeOf(self._data)
+        return Matrix._fromFlat(array(typecode, map(function, self._data, other)),
+                                self.nRows(), self.nColumns())
 
-            length = len(elements[0])
-            for vector in elements:
-                if len(vector) != length:
-                    raise VectorLengthError
-                if isinstance(vector, Vector):
-                    vector = vector._elements
-                if not isinstance(vector, list):
-                    raise TypeError
+    def dtype(self):
+        """ Return the dtype of the elements, None if they are untyped
 
-            self._elements = elements
+        Array backed matrices are always typed.
+
+        >>> Matrix([[1, 2]]).dtype() is None
+        True
+        >>> Matrix([[1, 2]], storage='array').dtype()
+        float64
+        >>> (Matrix([[1, 2]], dtype='int64') * 0.5).dtype()
+        float64
+        """
+        return self._dtype
 
     def __str__(self):
         """ Return the string representation of the Matrix
@@ -81,7 +289,7 @@ class Matrix(object):
          [3.1, 3.2]]
 
         """
-        return '['+reduce(lambda x, y: str(x)+',\n '+str(y), self)+']'
+        return '['+',\n '.join(map(str, self))+']'
 
     def __repr__(self):
         """ Return the representation of the Matrix
@@ -95,9 +303,7 @@ class Matrix(object):
         """
         prefix = 'Matrix(['
         indent = ' ' * len(prefix)
-        return 'Matrix(['+\
-            reduce(lambda x, y: str(x)+',\n'+indent+str(y),
-            self)+'])'
+        return prefix+(',\n'+indent).join(map(str, self))+'])'
 
     def __add__(self, other):
         """ Add this matrix to the other matrix in a new matrix
@@ -105,10 +311,18 @@ class Matrix(object):
         >>> m1 = Matrix([[1.1, 1.2], [2.1, 2.2]])
         >>> m2 = Matrix([[10.1, 10.2], [20.1, 20.2]])
         >>> m1 + m2
-        Matrix([[11.2, 11.4],
-                [22.2, 22.4]])
+        Matrix([[11.2, 11.399999999999999],
+                [22.200000000000003, 22.4]])
         """
-        return Matrix(map(lambda x, y: x + y, self, other))
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        self._checkSize(other)
+        dtype = dtypes.promote(self._dtype, other._dtype)
+        if self._data is not None and other._data is not None:
+            return self._newFlat(add, other._data, dtype)
+        return self._new([list(map(add, x, y))
+                          for x, y in zip(self._elements, other._elements)],
+                         dtype)
 
     def __iadd__(self, other):
         """ Add this matrix to the other in place
@@ -117,10 +331,61 @@ class Matrix(object):
         >>> m2 = Matrix([[10.1, 10.2], [20.1, 20.2]])
         >>> m1 += m2
         >>> m1
-        Matrix([[11.2, 11.4],
-                [22.2, 22.4]])
+        Matrix([[11.2, 11.399999999999999],
+                [22.200000000000003, 22.4]])
+
+        The elements are written into the existing storage so every
+        holder of it sees the sum:
+        >>> m1 = Matrix([[1, 2]])
+        >>> row = m1[0]
+        >>> m1 += Matrix([[10, 20]])
+        >>> row
+        Vector([11, 22])
+
+        A typed matrix keeps its dtype, results of a higher kind are
+        refused:
+        >>> m2 = Matrix([[1, 2]], dtype='int64')
+        >>> m2 += Matrix([[0.5, 0.5]], dtype='float64')
+        Traceback (most recent call last):
+            ...
+        TypeError: result dtype float64 cannot be stored in int64
+
+        Untyped operands are typed from their elements, and a lazy
+        expression is evaluated first:
+        >>> m2 += Matrix([[0.5, 0.5]])
+        Traceback (most recent call last):
+            ...
+        TypeError: result dtype float64 cannot be stored in int64
+        >>> m2 += Matrix([[1, 2]]).lazy() * 10
+        >>> m2
+        Matrix([[11, 22]])
         """
-        return self.copy(self + other)
+        other = _evaluated(other)
+        self._checkSize(other)
+        return self._applyInto(self, add, other)
+
+    def add(self, other, out=None):
+        """ Add this matrix to the other matrix, optionally into out
+
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> out = Matrix([[0, 0], [0, 0]], storage='array')
+        >>> m1.add(m1, out=out)
+        Matrix([[2.0, 4.0],
+                [6.0, 8.0]])
+
+        Args:
+            other: Matrix
+            out: Matrix the sum is written into, a new one if None.
+
+        Returns:
+            The Matrix holding the sum.
+        """
+        if out is None:
+            return self + other
+        other = _evaluated(other)
+        self._checkSize(other)
+        self._checkSize(out)
+        return self._applyInto(out, add, other)
 
     def __sub__(self, other):
         """ Substract the other vector from this vector 
@@ -131,7 +396,15 @@ class Matrix(object):
         Matrix([[9.0, 9.0],
                 [18.0, 18.0]])
         """
-        return Matrix(map(lambda x, y: x - y, self, other))
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        self._checkSize(other)
+        dtype = dtypes.promote(self._dtype, other._dtype)
+        if self._data is not None and other._data is not None:
+            return self._newFlat(sub, other._data, dtype)
+        return self._new([list(map(sub, x, y))
+                          for x, y in zip(self._elements, other._elements)],
+                         dtype)
 
     def __isub__(self, other):
         """ Substract the other vector from this vector inplace
@@ -142,8 +415,95 @@ class Matrix(object):
         >>> m1
         Matrix([[9.0, 9.0],
                 [18.0, 18.0]])
+        >>> m1 -= m2.lazy() * 2
+        >>> m1
+        Matrix([[6.8, 6.6],
+                [13.8, 13.6]])
+        """
+        other = _evaluated(other)
+        self._checkSize(other)
+        return self._applyInto(self, sub, other)
+
+    def sub(self, other, out=None):
+        """ Subtract the other matrix from this matrix, optionally into out
+
+        >>> m1 = Matrix([[10, 20], [30, 40]])
+        >>> m1.sub(Matrix([[1, 2], [3, 4]]), out=m1)
+        Matrix([[9, 18],
+                [27, 36]])
+
+        Args:
+            other: Matrix
+            out: Matrix the difference is written into, a new one if None.
+
+        Returns:
+            The Matrix holding the difference.
+        """
+        if out is None:
+            return self - other
+        other = _evaluated(other)
+        self._checkSize(other)
+        self._checkSize(out)
+        return self._applyInto(out, sub, other)
+
+    def scale(self, scalar, out=None):
+        """ Multiply this matrix by a scalar, optionally into out
+
+        >>> out = Matrix([[0, 0]])
+        >>> Matrix([[1, 2]]).scale(3, out=out)
+        Matrix([[3, 6]])
+
+        Args:
+            scalar: The number to multiply by
+            out: Matrix the result is written into, a new one if None.
+
+        Returns:
+            The Matrix holding the result.
         """
-        return self.copy(self - other)
+        if out is None:
+            return self * scalar
+        self._checkSize(out)
+        return self._applyInto(out, mul, scalar)
+
+    def _applyInto(self, out, function, other):
+        """ Write function of this matrix and a Matrix or scalar into out
+
+        The function is applied element by element and the results are
+        written into the storage of out in place, see _checkStore for
+        the results a typed out can take.
+        """
+        self._checkStore(out, other)
+        if isinstance(other, Matrix):
+            flat = other._data
+            rows = other._elements
+        else:
+            flat = repeat(other)
+            rows = repeat(flat)
+        if out._data is not None and self._data is not None \
+                and flat is not None:
+            kernels.assign(out._data, map(function, self._data, flat))
+        else:
+            for target, row, operand in zip(out._elements, self._elements, rows):
+                kernels.assign(target, map(function, row, operand))
+        out._touch()
+        return out
+
+    def _checkStore(self, out, other):
+        """ Raise TypeError unless out can take arithmetic with other
+
+        Untyped operands are typed from their elements, see
+        dtypes.ofValues, so every store into a typed matrix is checked.
+        """
+        if out._dtype is None:
+            return
+        dtype = self._dtype or \
+            dtypes.ofValues(chain.from_iterable(self._elements))
+        if isinstance(other, Matrix):
+            dtype = dtypes.promote(dtype, other._dtype or dtypes.ofValues(
+                chain.from_iterable(other._elements)))
+        else:
+            dtype = dtypes.promoteScalar(dtype, other)
+        dtypes.checkStore(out._dtype, dtype)
 
     def __mul__(self, other):
         """ Multiply this Matrix by a scalar, Matrix, or Vector
@@ -158,30 +518,137 @@ class Matrix(object):
         >>> m1 = Matrix([[1.1, 1.2], [2.1, 2.2]])
         >>> v1 = Vector([3, 4])
         >>> m1 * v1
-        Vector([8.1, 15.1])
+        Vector([8.1, 15.100000000000001])
 
-        Matrix multiplication:
+        Matrix multiplication uses the kernels module, which picks a
+        blocked pure Python kernel, the Strassen-Winograd recursion for
+        large near square operands (see kernels.STRASSEN_THRESHOLD) or
+        NumPy for large operands:
         >>> m1 = Matrix([[1.1, 1.2], [2.1, 2.2]])
         >>> m2 = Matrix([[3.1, 3.2], [4.1, 4.2]])
         >>> m1 * m2
         Matrix([[8.33, 8.56],
-                [15.53, 15.96]])
+                [15.530000000000001, 15.960000000000003]])
         """
         if not hasattr(other, '__iter__'):
-            return Matrix(map(lambda x: x * other, self))
+            dtype = dtypes.promoteScalar(self._dtype, other)
+            if self._data is not None:
+                return self._newFlat(mul, repeat(other), dtype)
+            return self._new([[x * other for x in row]
+                              for row in self._elements], dtype)
 
         elif isinstance(other, Matrix):
-            try:
-                other = other.transpose()
-                elements = []
-                for vector in self:
-                    elements.append(map(lambda x: x * vector, other))
-                return Matrix(elements)
-            except TypeError:
-                raise MatrixSizeError
+            if self.nColumns() != other.nRows():
+                raise MatrixSizeError('columns of the left Matrix must '
+                                      'match rows of the right Matrix')
+            dtype = dtypes.promote(self._dtype, other._dtype)
+            if self._data is not None and other._data is not None and \
+                    dtype is not None and dtype.kind == 'f':
+                data = kernels.multiplyFlat(self._data, other._data,
+                                            self.nRows(), self.nColumns(),
+                                            other.nColumns(), dtype.typecode)
+                if data is not None:
+                    return Matrix._fromFlat(data, self.nRows(), other.nColumns())
+            if isinstance(other, TransposedMatrix):
+                return self._new(kernels.multiplyTransposed(
+                    self._elements, other._base._elements), dtype)
+            return self._new(kernels.multiply(self._elements, other._elements),
+                             dtype)
 
         elif isinstance(other, Vector):
-            return Vector(map(lambda x: x * other, self))
+            if len(other) != self.nColumns():
+                raise VectorLengthError('vector length must match nColumns')
+            elements = other._elements
+            return Vector([sum(map(mul, row, elements)) for row in self._elements],
+                          dtype=dtypes.promote(self._dtype, other.dtype()))
+
+        return NotImplemented
+
+    def mulVectors(self, vectors):
+        """ Multiply this Matrix by many vectors at once
+
+        All of the products are taken in one pass over the rows: each
+        row is read once and multiplied by every vector, see
+        kernels.multiplyVectors.
+
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> m1.mulVectors([Vector([1, 0]), Vector([1, 1])])
+        [Vector([1, 3]), Vector([3, 7])]
+        >>> m1.mulVectors(VectorBatch([[1, 0], [1, 1]]))
+        VectorBatch([[1.0, 3.0], [3.0, 7.0]])
+
+        Args:
+            vectors: iterable of Vectors or sequences, or a VectorBatch,
+                     each with as many elements as this Matrix has
+                     columns.
+
+        Returns:
+            A list of Vectors, or a VectorBatch for a VectorBatch, with
+            the product of each vector in order.
+        """
+        nColumns = self.nColumns()
+        if isinstance(vectors, VectorBatch):
+            if len(vectors) and vectors.dimension() != nColumns:
+                raise VectorLengthError('vector length must match nColumns')
+            products = kernels.multiplyVectors(
+                self._elements, [vector._elements for vector in vectors])
+            return VectorBatch._fromFlat(
+                array('d', chain.from_iterable(zip(*products))), self.nRows())
+        vectors = [vector if isinstance(vector, Vector) else Vector(vector)
+                   for vector in vectors]
+        for vector in vectors:
+            if len(vector) != nColumns:
+                raise VectorLengthError('vector length must match nColumns')
+        if not vectors:
+            return []
+        products = kernels.multiplyVectors(
+            self._elements, [vector._elements for vector in vectors])
+        columns = zip(*products) if products else [()] * len(vectors)
+        return [Vector(list(column),
+                       dtype=dtypes.promote(self._dtype, vector.dtype()))
+                for column, vector in zip(columns, vectors)]
+
+    def lazy(self):
+        """ Return a lazy expression of this matrix
+
+        Arithmetic on the expression is only carried out when it is
+        evaluated, in a single pass and with out intermediate matrices.
+        See the expression module.
+
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> (m1.lazy() + m1 - m1.lazy() * 0.5).evaluate()
+        Matrix([[1.5, 3.0],
+                [4.5, 6.0]])
+        """
+        from expression import Leaf
+        return Leaf(self)
+
+    def amul(self, other, executor=None, blockRows=None):
+        """ Multiply by the other Matrix on an executor, awaitable
+
+        See the aio module.
+
+        >>> import asyncio
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> asyncio.run(m1.amul(m1))
+        Matrix([[7, 10],
+                [15, 22]])
+        """
+        import aio
+        return aio.multiply(self, other, executor, blockRows)
+
+    def atranspose(self, executor=None, blockRows=None):
+        """ Return the transpose copied on an executor, awaitable
+
+        See the aio module.
+
+        >>> import asyncio
+        >>> asyncio.run(Matrix([[1, 2], [3, 4]]).atranspose())
+        Matrix([[1, 3],
+                [2, 4]])
+        """
+        import aio
+        return aio.transpose(self, executor, blockRows)
 
     def __imul__(self, other):
         """ Multiply this Matrix by a scalar inplace
@@ -194,9 +661,83 @@ class Matrix(object):
                 [4.2, 4.4]])
         """
         if not hasattr(other, '__iter__'):
-            self.copy(self * other)
+            self._applyInto(self, mul, other)
         return self
 
+    def mul(self, other, out=None, workers=None):
+        """ Multiply this Matrix by a scalar, Matrix, or Vector into out
+
+        The product is written into the storage of out in place. For a
+        Matrix or Vector product out must not share storage with either
+        operand. A Matrix product of floats is split over workers
+        processes if more than one is asked for, see the parallel
+        module; products of integers are not, so they stay exact.
+
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> out = Matrix([[0, 0], [0, 0]])
+        >>> m1.mul(m1, out=out)
+        Matrix([[7, 10],
+                [15, 22]])
+        >>> m1.mul(Vector([1, 1]), out=Vector(2))
+        Vector([3, 7])
+        >>> m1.mul(m1, workers=2)
+        Matrix([[7, 10],
+                [15, 22]])
+
+        A new out gets the promoted dtype, and list storage for complex:
+        >>> m2 = Matrix([[1, 2], [3, 4]], storage='array')
+        >>> m3 = m2.mul(Matrix([[1j, 0], [0, 1]], dtype='complex128'), workers=2)
+        >>> m3.dtype(), m3.storage()
+        (complex128, 'list')
+        >>> m4 = Matrix([[1, 2], [3, 4]], dtype='int64')
+        >>> m4.mul(m4, workers=2).dtype()
+        int64
+
+        Args:
+            other: scalar, Matrix or Vector
+            out: Matrix or Vector the product is written into, a new one
+                 if None.
+            workers: number of processes for a Matrix product, defaults
+                     to kernels.WORKERS for large products.
+
+        Returns:
+            The Matrix or Vector holding the product.
+        """
+        if out is None:
+            if isinstance(other, Matrix) and workers is not None:
+                out = self._new([[0] * other.nColumns()
+                                 for i in range(self.nRows())],
+                                dtypes.promote(self._dtype, other._dtype))
+            else:
+                return self * other
+
+        if not hasattr(other, '__iter__'):
+            return self.scale(other, out)
+
+        elif isinstance(other, Matrix):
+            if self.nColumns() != other.nRows() or \
+                    out.nRows() != self.nRows() or \
+                    out.nColumns() != other.nColumns():
+                raise MatrixSizeError('matrices must have matching sizes')
+            if out is self or out is other:
+                raise ValueError('out must not be an operand')
+            if isinstance(other, TransposedMatrix):
+                kernels.multiplyTransposed(self._elements,
+                                           other._base._elements,
+                                           out=out._elements,
+                                           workers=workers)
+            else:
+                kernels.multiply(self._elements, other._elements,
+                                 out=out._elements, workers=workers)
+            out._touch()
+            return out
+
+        elif isinstance(other, Vector):
+            if len(out) != self.nRows():
+                raise VectorLengthError('out must have a length of nRows')
+            kernels.assign(out._elements, [row * other for row in self])
+            return out
+
     def __iter__(self):
         """ Iterate over the Vectors in the Matrix
         >>> m1 = Matrix([[1.1, 1.2], [2.1, 2.2]])
@@ -206,8 +747,9 @@ class Matrix(object):
         Vector([2.1, 2.2])
 
         """
+        dtype = self._dtype
         for row_vector in self._elements:
-            yield Vector(row_vector)
+            yield Vector._wrap(row_vector, dtype)
 
     def __getitem__(self, index):
         """ Get a row Vector at the index
@@ -216,7 +758,9 @@ class Matrix(object):
         >>> m1[0]
         Vector([1.1, 1.2])
         """
-        return Vector(self._elements[index])
+        if isinstance(index, slice):
+            return Vector(self._elements[index])
+        return Vector._wrap(self._elements[index], self._dtype)
 
     def __setitem__(self, index, value):
         """ Set the row Vector at the index
@@ -228,15 +772,47 @@ class Matrix(object):
         >>> m1[1] = [30, 40]
         >>> m1[1]
         Vector([30, 40])
+
+        Rows of an array backed matrix are written in place:
+        >>> m2 = Matrix([[1, 2], [3, 4]], storage='array')
+        >>> row = m2[0]
+        >>> m2[0] = [10, 20]
+        >>> row
+        Vector([10.0, 20.0])
+
+        The row is converted to the dtype of a typed matrix whatever
+        the storage, see dtypes.checkStore for the rows it can take:
+        >>> m3 = Matrix([[1, 2]], storage='list', dtype='complex128')
+        >>> m3[0] = [3, 4]
+        >>> m3._elements[0]
+        [(3+0j), (4+0j)]
+        >>> m4 = Matrix([[1, 2]], storage='list', dtype='int64')
+        >>> m4[0] = [0.5, 1]
+        Traceback (most recent call last):
+            ...
+        TypeError: result dtype float64 cannot be stored in int64
         """
         if len(value) != self.nColumns():
-            raise VectorLengthError
+            raise VectorLengthError('rows must have the same length')
         if isinstance(value, Vector):
-            self._elements[index] = value._elements
+            source = value.dtype()
+            value = value._elements
         elif isinstance(value, list):
-            self._elements[index] = value
+            source = None
         else:
             raise TypeError
+        dtype = self._dtype
+        if dtype is not None:
+            dtypes.checkStore(dtype, source or dtypes.ofValues(value))
+            value = dtype.convert(value)
+        row = self._elements[index]
+        if isinstance(row, list):
+            self._elements[index] = value
+        elif isinstance(row, memoryview):
+            row[:] = array(row.format, value)
+        else:
+            row[:] = value
+        self._touch()
 
     def copy(self, other):
         """ Copy the elements of the other matrix
@@ -246,11 +822,96 @@ class Matrix(object):
         >>> m2 = Matrix(m1)
         >>> m2._elements is m1._elements
         True
+
+        A transposed view is copied into rows of its own:
+        >>> m3 = Matrix([[1, 2]]).copy(m1.T)
+        >>> m3, m3._elements[0]
+        (Matrix([[1],
+                [2],
+                [3]]), [1])
         """
         assert isinstance(other, Matrix)
+        if isinstance(other, TransposedMatrix):
+            other = other.materialize()
+        self._storage = other._storage
+        self._data = other._data
         self._elements = other._elements
+        self._dtype = other._dtype
+        self._revision = other._revision
+        self._derived = {}
         return self
 
+    def save(self, path):
+        """ Save the matrix to a binary file
+
+        The file holds a small header with the array typecode of the
+        dtype and the size followed by the elements in row major order.
+        Untyped matrices are written as doubles. Complex elements can
+        not be saved.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'matrix.bin')
+        >>> Matrix([[1, 2], [3, 4]]).save(path)
+        >>> Matrix.load(path)
+        Matrix([[1.0, 2.0],
+                [3.0, 4.0]])
+
+        Args:
+            path: path of the file to write.
+        """
+        data = self._data
+        if data is None:
+            data = storage.flatten(self._elements, Matrix._typecodeOf(self._dtype))
+        storage.save(path, data, (self.nRows(), self.nColumns()))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """ Load a matrix saved by save
+
+        With mmap the file is mapped rather than read: the rows are
+        views into the mapping and are only paged in when used. Changes
+        to a mapped matrix are never written back to the file.
+
+        Args:
+            path: path of the file to read.
+            mmap: map the file instead of reading it.
+
+        Returns:
+            An array backed Matrix.
+        """
+        data, shape = storage.load(path, mmap)
+        if len(shape) != 2:
+            raise ValueError('%s does not hold a Matrix' % path)
+        return cls._fromFlat(data, *shape)
+
+    def version(self):
+        """ Return the version number of the elements of the matrix
+
+        The number changes whenever rows are set or the matrix is
+        changed in place, and is shared by matrices sharing storage.
+        Writing single elements through a row Vector is not seen.
+
+        >>> m1 = Matrix([[1, 2]])
+        >>> before = m1.version()
+        >>> m1[0] = [3, 4]
+        >>> m1.version() == before
+        False
+        """
+        return self._revision[0]
+
+    def _touch(self):
+        """ Give the elements a new version number """
+        self._revision[0] = next(_versions)
+
+    def _cached(self, name, compute):
+        """ Return a derived result, computing it once per version """
+        version = self._revision[0]
+        entry = self._derived.get(name)
+        if entry is None or entry[0] != version:
+            entry = (version, compute())
+            self._derived[name] = entry
+        return entry[1]
+
     def nRows(self):
         """ Return the number of rows in the matrix
 
@@ -267,20 +928,476 @@ class Matrix(object):
         """
         return len(self._elements[0])
 
+    def storage(self):
+        """ Return the name of the storage used by the matrix
+
+        >>> Matrix([[1, 2]]).storage()
+        'list'
+        >>> Matrix([[1, 2]], storage='array').storage()
+        'array'
+        """
+        return self._storage
+
+    def _checkSize(self, other):
+        """ Raise MatrixSizeError unless other has the same shape """
+        if self.nRows() != other.nRows() or \
+                self.nColumns() != other.nColumns():
+            raise MatrixSizeError('matrices must have the same size')
+
     def transpose(self):
         """ Transpose the matrix
 
+        The transpose is a view sharing the storage of this matrix, so
+        no elements are copied and writes through either are seen by
+        both. Use materialize to get an independent Matrix.
+
         >>> m1 = Matrix([[1.1, 1.2, 1.3], [2.1, 2.2, 3.3]])
         >>> m1.transpose()
         Matrix([[1.1, 2.1],
                 [1.2, 2.2],
                 [1.3, 3.3]])
+        >>> Matrix([[1, 2, 3], [4, 5, 6]], storage='array').transpose()
+        Matrix([[1.0, 4.0],
+                [2.0, 5.0],
+                [3.0, 6.0]])
+        >>> m1.transpose().transpose() is m1
+        True
         """
-        new = Matrix([[0]*self.nRows() for i in range(self.nColumns())])
-        for i in range(self.nRows()):
-            for j in range(self.nColumns()):
-                new[j][i] = self[i][j]
-        return new
+        return TransposedMatrix(self)
+
+    @property
+    def T(self):
+        """ The transpose of the matrix
+
+        >>> Matrix([[1, 2]]).T
+        Matrix([[1],
+                [2]])
+        """
+        return self.transpose()
+
+    def materialize(self):
+        """ Return a Matrix owning its own storage
+
+        A Matrix already owns its storage so it is returned as is.
+
+        >>> m1 = Matrix([[1, 2]])
+        >>> m1.materialize() is m1
+        True
+        """
+        return self
+
+    def _factorization(self):
+        """ Return the cached packed LU factors, pivots and sign """
+        if self.nRows() != self.nColumns():
+            raise MatrixSizeError('matrix must be square')
+        return self._cached('lu', lambda: linalg.luDecompose(self._elements))
+
+    def lu(self):
+        """ Return the LU decomposition with partial pivoting
+
+        The factors satisfy P * A = L * U where L is lower triangular
+        with a unit diagonal and U is upper triangular. The
+        factorization is cached until the matrix is changed.
+
+        >>> P, L, U = Matrix([[1, 2], [3, 4]]).lu()
+        >>> P
+        Matrix([[0, 1],
+                [1, 0]])
+        >>> L
+        Matrix([[1, 0],
+                [0.3333333333333333, 1]])
+        >>> U
+        Matrix([[3, 4],
+                [0, 0.6666666666666667]])
+
+        Returns:
+            The permutation, lower and upper Matrices.
+        """
+        lu, pivots, sign = self._factorization()
+        n = len(lu)
+        P = [[0] * n for i in range(n)]
+        L = [[0] * n for i in range(n)]
+        U = [[0] * n for i in range(n)]
+        for i, row in enumerate(lu):
+            P[i][pivots[i]] = 1
+            L[i][:i] = row[:i]
+            L[i][i] = 1
+            U[i][i:] = row[i:]
+        dtype = dtypes.floating(self._dtype)
+        return self._new(P, dtype), self._new(L, dtype), self._new(U, dtype)
+
+    def solve(self, b):
+        """ Solve the linear system A x = b
+
+        The LU decomposition is computed once and reused for every
+        right hand side until the matrix is changed.
+
+        >>> m1 = Matrix([[2, 1], [1, 3]])
+        >>> m1.solve(Vector([3, 5]))
+        Vector([0.8, 1.4])
+        >>> m1.solve(Matrix([[3, 1], [5, 0]]))
+        Matrix([[0.8, 0.6],
+                [1.4, -0.2]])
+
+        Args:
+            b: Vector right hand side, or Matrix whose columns are
+               right hand sides.
+
+        Returns:
+            The solution as a Vector, or a Matrix of solution columns.
+        """
+        lu, pivots, sign = self._factorization()
+        if isinstance(b, Matrix):
+            if b.nRows() != self.nRows():
+                raise MatrixSizeError('right hand side must have nRows rows')
+            columns = [linalg.luSolve(lu, pivots, column)
+                       for column in zip(*b._elements)]
+            return b._new([list(row) for row in zip(*columns)],
+                          dtypes.floating(dtypes.promote(self._dtype, b._dtype)))
+        if len(b) != self.nRows():
+            raise VectorLengthError('right hand side must have a length of nRows')
+        return Vector(linalg.luSolve(lu, pivots, b))
+
+    def det(self):
+        """ Return the determinant of the matrix
+
+        >>> Matrix([[2, 1], [1, 3]]).det()
+        5.0
+        """
+        lu, pivots, sign = self._factorization()
+        return linalg.luDeterminant(lu, sign)
+
+    def inverse(self):
+        """ Return the inverse of the matrix
+
+        >>> Matrix([[2, 1], [1, 3]]).inverse()
+        Matrix([[0.6, -0.2],
+                [-0.2, 0.4]])
+        """
+        lu, pivots, sign = self._factorization()
+        n = len(lu)
+        columns = []
+        for i in range(n):
+            unit = [0] * n
+            unit[i] = 1
+            columns.append(linalg.luSolve(lu, pivots, unit))
+        return self._new([list(row) for row in zip(*columns)],
+                         dtypes.floating(self._dtype))
+
+    def eigenvalues(self):
+        """ Return every eigenvalue by the QR algorithm
+
+        Meant for small matrices, see linalg.qrEigen. Complex eigenvalues
+        of a real matrix come in conjugate pairs.
+
+        >>> Matrix([[2, 0], [0, 3]]).eigenvalues()
+        [3.0, 2.0]
+        """
+        if self.nRows() != self.nColumns():
+            raise MatrixSizeError('matrix must be square')
+        return linalg.qrEigen(self._elements)
+
+    def eigen(self, k=None):
+        """ Return eigenvalues and eigenvectors of a symmetric matrix
+
+        With out k every pair is found by the QR algorithm. With k only
+        the k of largest magnitude are found by the Lanczos method from
+        products with vectors, which suits large matrices.
+
+        >>> values, vectors = Matrix([[2, 1], [1, 2]]).eigen(1)
+        >>> [round(value, 10) for value in values]
+        [3.0]
+        >>> [round(x, 10) for x in vectors[0]]
+        [0.7071067812, 0.7071067812]
+        >>> values, vectors = Matrix([[3, 0, 0], [0, 3, 0], [0, 0, 1]]).eigen(2)
+        >>> [round(value, 10) for value in values]
+        [3.0, 3.0]
+
+        Returns:
+            The eigenvalues, largest magnitude first, and a list of the
+            matching unit eigenvectors as Vectors.
+        """
+        if self.nRows() != self.nColumns():
+            raise MatrixSizeError('matrix must be square')
+        if k is None:
+            values, vectors = linalg.qrEigen(self._elements, vectors=True)
+            return values, [Vector(vector) for vector in vectors]
+        return linalg.lanczos(self, k)
+
+    def svd(self, k):
+        """ Return the k largest singular values and singular vectors
+
+        See linalg.truncatedSVD.
+
+        >>> u, s, v = Matrix([[3, 0], [0, 4]]).svd(2)
+        >>> [round(value, 10) for value in s]
+        [4.0, 3.0]
+
+        Returns:
+            The left singular vectors, the singular values and the right
+            singular vectors.
+        """
+        return linalg.truncatedSVD(self, k)
+
+    def __pow__(self, exponent):
+        """ Raise the matrix to an integer power by repeated squaring
+
+        With POWER_CACHE_SIZE set the squares and the result are kept
+        in a bounded least recently used cache keyed by the version of
+        the matrix, so later powers of an unchanged matrix reuse them.
+        Like version, the cache does not see writes through row
+        Vectors, which is why it is off by default.
+
+        >>> Matrix([[1, 1], [1, 0]]) ** 10
+        Matrix([[89, 55],
+                [55, 34]])
+        >>> m1 = Matrix([[1, 1], [1, 0]])
+        >>> m1 ** 3
+        Matrix([[3, 2],
+                [2, 1]])
+        >>> m1[0][0] = 2
+        >>> m1 ** 3
+        Matrix([[12, 5],
+                [5, 2]])
+        >>> Matrix([[2, 0], [0, 4]]) ** -1
+        Matrix([[0.5, 0.0],
+                [0.0, 0.25]])
+
+        Args:
+            exponent: int, a negative power raises the inverse.
+
+        Returns:
+            A new Matrix.
+        """
+        if not isinstance(exponent, Integral):
+            return NotImplemented
+        if self.nRows() != self.nColumns():
+            raise MatrixSizeError('matrix must be square')
+        if exponent < 0:
+            return self.inverse() ** -exponent
+        return self._power(exponent)._clone()
+
+    def _power(self, exponent):
+        """ Return the power, which may be shared with the cache """
+        if exponent == 0:
+            return self._identity(self._dtype)
+        key = (isinstance(self, TransposedMatrix), self.version())
+        power = _powers.get(key + (exponent,))
+        if power is not None:
+            _powers.move_to_end(key + (exponent,))
+            return power
+        power = None
+        square = self
+        bit = 1
+        while True:
+            if exponent & bit:
+                power = square if power is None else power * square
+            bit <<= 1
+            if bit > exponent:
+                break
+            cached = _powers.get(key + (bit,))
+            if cached is None:
+                cached = square * square
+                _storePower(key + (bit,), cached)
+            else:
+                _powers.move_to_end(key + (bit,))
+            square = cached
+        if power is not self:
+            _storePower(key + (exponent,), power)
+        return power
+
+    def _identity(self, dtype):
+        """ Return an identity matrix of the size of this square matrix """
+        n = self.nRows()
+        return self._new([[1 if i == j else 0 for j in range(n)]
+                          for i in range(n)], dtype)
+
+    def _clone(self):
+        """ Return a Matrix with a copy of the elements """
+        if self._data is not None:
+            return Matrix._fromFlat(array(self._data.typecode, self._data),
+                                    self.nRows(), self.nColumns())
+        return self._new([list(row) for row in self._elements], self._dtype)
+
+    def exp(self):
+        """ Return the matrix exponential e ** A
+
+        The matrix is scaled down by a power of two until its norm is at
+        most 1/2, where the Taylor series converges in a few terms, and
+        the sum is then squared back up as e ** A = (e ** (A / 2**s)) **
+        (2**s).
+
+        >>> Matrix([[0, 1], [0, 0]]).exp()
+        Matrix([[1.0, 1.0],
+                [0.0, 1.0]])
+
+        Returns:
+            A new Matrix of floats.
+        """
+        if self.nRows() != self.nColumns():
+            raise MatrixSizeError('matrix must be square')
+        norm = max([sum(abs(x) for x in row) for row in self._elements] or [0])
+        squarings = 0
+        while norm > 0.5:
+            norm /= 2
+            squarings += 1
+        scaled = self * (1.0 / 2 ** squarings)
+        result = term = self._identity(scaled._dtype) * 1.0
+        for k in range(1, 30):
+            term = term * scaled * (1.0 / k)
+            result = result + term
+            largest = max([abs(x) for row in term._elements for x in row] or [0])
+            if largest <= 1e-17:
+                break
+        for i in range(squarings):
+            result = result * result
+        return result
+
+class TransposedMatrix(Matrix):
+    """ Transposed view of a Matrix
+
+        The view shares the storage of the Matrix it was made from and
+        swaps the index order. For array storage the rows of the view
+        are strided memoryviews into the flat block, for list storage
+        they are column views over the row lists.
+    """
+
+    __slots__ = ('_base', '_source', '_columns')
+
+    def __init__(self, base):
+        """ Construct a transposed view of the base Matrix
+
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> t1 = TransposedMatrix(m1)
+        >>> t1[0][1] = 30
+        >>> m1
+        Matrix([[1, 2],
+                [30, 4]])
+
+        Args:
+            base: Matrix
+        """
+        self._base = base
+        self._source = None
+        self._columns = None
+        self._derived = {}
+
+    @property
+    def _revision(self):
+        return self._base._revision
+
+    @property
+    def _dtype(self):
+        return self._base._dtype
+
+    @property
+    def _storage(self):
+        return self._base._storage
+
+    @property
+    def _data(self):
+        # The block of the base is not in row major order for the view.
+        return None
+
+    @property
+    def _elements(self):
+        """ The column views of the base, rebuilt if the base is rebound """
+        base = self._base
+        if self._source is not base._elements:
+            self._source = base._elements
+            nColumns = base.nColumns()
+            if base._data is not None and nColumns:
+                view = memoryview(base._data)
+                self._columns = [view[j::nColumns] for j in range(nColumns)]
+            else:
+                self._columns = [_ColumnView(base._elements, j)
+                                 for j in range(nColumns)]
+        return self._columns
+
+    def copy(self, other):
+        """ Write the elements of the other matrix through the view
+
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> t1 = m1.T
+        >>> t1.copy(Matrix([[10, 30], [20, 40]]))
+        Matrix([[10, 30],
+                [20, 40]])
+        >>> m1
+        Matrix([[10, 20],
+                [30, 40]])
+        """
+        assert isinstance(other, Matrix)
+        for index, row in enumerate(other._elements):
+            self[index] = list(row)
+        return self
+
+    def transpose(self):
+        """ Return the Matrix this view was made from """
+        return self._base
+
+    def materialize(self):
+        """ Return the transpose as a Matrix owning its own storage
+
+        >>> m1 = Matrix([[1, 2], [3, 4]])
+        >>> m2 = m1.T.materialize()
+        >>> m2[0][1] = 30
+        >>> m1
+        Matrix([[1, 2],
+                [3, 4]])
+        >>> m2
+        Matrix([[1, 30],
+                [2, 4]])
+        """
+        return self._base._new(list(zip(*self._base._elements)),
+                               self._base._dtype)
+
+class _ColumnView(MutableSequence):
+    """ A column of a list of rows seen as a sequence """
+
+    __slots__ = ('_rows', '_index')
+
+    def __init__(self, rows, index):
+        self._rows = rows
+        self._index = index
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        index = self._index
+        for row in self._rows:
+            yield row[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [row[self._index] for row in self._rows[index]]
+        return self._rows[index][self._index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            rows = self._rows[index]
+            value = list(value)
+            if len(value) != len(rows):
+                raise VectorLengthError('cannot resize a column view')
+            for row, element in zip(rows, value):
+                row[self._index] = element
+        else:
+            self._rows[index][self._index] = value
+
+    def __delitem__(self, index):
+        raise TypeError('cannot resize a column view')
+
+    def insert(self, index, value):
+        raise TypeError('cannot resize a column view')
+
+def _storePower(key, power):
+    """ Keep a power in the cache, dropping the least recently used """
+    if POWER_CACHE_SIZE <= 0:
+        return
+    _powers[key] = power
+    _powers.move_to_end(key)
+    while len(_powers) > POWER_CACHE_SIZE:
+        _powers.popitem(last=False)
 
 class MatrixSizeError(Exception):
     def __init__(self, value):
@@ -0,0 +1,140 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Parallel matrix multiplication over a process pool
+
+The operands are copied once into shared memory blocks of doubles. Each
+worker process attaches to the blocks by name, multiplies its share of
+the rows of the left operand and writes them into a shared result
+block, so no matrix data is pickled between processes.
+
+Set kernels.WORKERS to use the pool from Matrix.__mul__, or pass
+workers to Matrix.mul.
+"""
+from array import array
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import kernels
+
+# Process pools by number of workers, kept so that processes are only
+# started once.
+_pools = {}
+
+def executor(workers):
+    """ Return the shared process pool with the given number of workers """
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ProcessPoolExecutor(workers)
+    return pool
+
+def shutdown():
+    """ Shut down the process pools started by this module """
+    while _pools:
+        workers, pool = _pools.popitem()
+        pool.shutdown()
+
+def multiply(a, b, workers, pool=None):
+    """ Multiply the rows a by the rows b using a pool of processes
+
+    The rows of a are split into one block per worker. Elements are
+    converted to doubles.
+
+    >>> multiply([[1, 2], [3, 4]], [[5, 6], [7, 8]], 2)
+    [[19.0, 22.0], [43.0, 50.0]]
+
+    Args:
+        a: list of row sequences of the left operand.
+        b: list of row sequences of the right operand.
+        workers: number of row blocks and of processes in the pool.
+        pool: optional concurrent.futures executor to run the blocks,
+              the shared pool of the module by default.
+
+    Returns:
+        The product as a list of lists.
+
+    Raises:
+        TypeError: if an element can not be converted to a double.
+    """
+    nRows = len(a)
+    nInner = len(b)
+    nColumns = len(b[0]) if b else 0
+    if pool is None:
+        pool = executor(workers)
+
+    blocks = []
+    try:
+        left = _share(nRows * nInner, blocks, a)
+        right = _share(nInner * nColumns, blocks, b)
+        result = _share(nRows * nColumns, blocks)
+        step = -(-nRows // workers) or 1
+        futures = [pool.submit(_multiplyRows, left.name, right.name,
+                               result.name, nInner, nColumns,
+                               start, min(start + step, nRows))
+                   for start in range(0, nRows, step)]
+        for future in futures:
+            future.result()
+        with result.buf.cast('d') as flat:
+            return [flat[i:i + nColumns].tolist()
+                    for i in range(0, nRows * nColumns, nColumns or 1)]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def _share(size, blocks, rows=None):
+    """ Return a new shared block of size doubles holding the rows """
+    block = shared_memory.SharedMemory(create=True, size=max(8 * size, 8))
+    blocks.append(block)
+    if rows is not None and size:
+        with block.buf.cast('d') as flat:
+            flat[:size] = array('d', chain.from_iterable(rows))
+    return block
+
+def _multiplyRows(left, right, result, nInner, nColumns, start, stop):
+    """ Multiply rows start to stop of the shared left block in a worker """
+    blocks = [shared_memory.SharedMemory(name=name)
+              for name in (left, right, result)]
+    try:
+        with blocks[0].buf.cast('d') as flat:
+            a = [flat[i:i + nInner].tolist()
+                 for i in range(start * nInner, stop * nInner, nInner or 1)]
+        with blocks[1].buf.cast('d') as flat:
+            columns = [flat[j:nInner * nColumns:nColumns].tolist()
+                       for j in range(nColumns)]
+        rows = kernels.blockedMultiply(a, columns)
+        with blocks[2].buf.cast('d') as flat:
+            flat[start * nColumns:stop * nColumns] = \
+                array('d', chain.from_iterable(rows))
+    finally:
+        for block in blocks:
+            block.close()
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
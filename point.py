@@ -1,4 +1,10 @@
+from functools import reduce
+import heapq
+import math
+from vector import smallVector
+
 class Point(object):
+    __slots__ = ('elements',)
     def __init__(self, elements):
         self.elements = list(elements)
     def __repr__(self):
@@ -28,9 +34,9 @@ class Point(object):
         assert len(self) == len(other)
         new_point = Point([0]*len(self))
         for i in range(len(self)):
-            new_point[i] = self[i] + other[i]
+            new_point[i] = self[i] - other[i]
         return new_point
-    def __iadd__(self, other):
+    def __isub__(self, other):
         assert type(other) == Point
         assert len(self) == len(other)
         for i in range(len(self)):
@@ -44,3 +50,319 @@ class Point(object):
         return self.elements[index]
     def __len__(self):
         return len(self.elements)
+    def vector(self):
+        """ Return the coordinates as a Vector
+
+        Points of two to four coordinates give a Vector2, Vector3 or
+        Vector4 with unrolled arithmetic.
+
+        >>> Point((1, 2, 3)).vector()
+        Vector3([1, 2, 3])
+        """
+        return smallVector(self.elements)
+
+
+class _Node(object):
+    """ Node of a PointIndex holding one point """
+    __slots__ = ('coordinates', 'point', 'axis', 'left', 'right', 'live')
+
+    def __init__(self, coordinates, point, axis):
+        self.coordinates = coordinates
+        self.point = point
+        self.axis = axis
+        self.left = None
+        self.right = None
+        self.live = True
+
+class PointIndex(object):
+    """ k-d tree over a set of points
+
+    The index answers nearest neighbour, radius and axis aligned range
+    queries in about logarithmic time instead of scanning every point.
+    Points may be Point objects or any sequences of coordinates, the
+    queries return the objects that were added.
+
+    >>> index = PointIndex([Point((0, 0)), Point((1, 1)), Point((5, 5))])
+    >>> index.nearest((0.9, 0.8))
+    [Point(1, 1)]
+    >>> index.nearest((0.9, 0.8), 2)
+    [Point(1, 1), Point(0, 0)]
+    >>> index.withinRadius((0, 0), 1.5)
+    [Point(1, 1), Point(0, 0)]
+    >>> index.inRange((-1, -1), (2, 2))
+    [Point(1, 1), Point(0, 0)]
+    """
+
+    def __init__(self, points=()):
+        """ Construct a PointIndex bulk loading the points
+
+        Args:
+            points: iterable of points that all have the same dimension.
+        """
+        self._dimension = None
+        self._build(list(points))
+
+    def _build(self, points):
+        """ Build a balanced tree from the points """
+        entries = [(tuple(point), point) for point in points]
+        for coordinates, point in entries:
+            self._checkDimension(coordinates)
+        self._root = self._buildNode(entries, 0)
+        self._size = len(entries)
+        self._nodes = len(entries)
+        self._built = len(entries)
+
+    def _buildNode(self, entries, depth):
+        """ Return the root of a subtree split at the median of entries """
+        if not entries:
+            return None
+        axis = depth % self._dimension
+        entries.sort(key=lambda entry: entry[0][axis])
+        middle = len(entries) // 2
+        # Equal coordinates must all be on the right of the split, as
+        # insert puts them there.
+        value = entries[middle][0][axis]
+        while middle > 0 and entries[middle - 1][0][axis] == value:
+            middle -= 1
+        node = _Node(entries[middle][0], entries[middle][1], axis)
+        node.left = self._buildNode(entries[:middle], depth + 1)
+        node.right = self._buildNode(entries[middle + 1:], depth + 1)
+        return node
+
+    def _checkDimension(self, coordinates):
+        """ Check that the coordinates have the dimension of the index """
+        if self._dimension is None:
+            if not coordinates:
+                raise ValueError('points must have at least one coordinate')
+            self._dimension = len(coordinates)
+        elif len(coordinates) != self._dimension:
+            raise ValueError('points must have the same dimension')
+
+    def __len__(self):
+        """ Return the number of points in the index
+
+        >>> len(PointIndex([(0, 0), (1, 1)]))
+        2
+        """
+        return self._size
+
+    def __iter__(self):
+        """ Iterate over the points in the index """
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.live:
+                yield node.point
+            stack.append(node.right)
+            stack.append(node.left)
+
+    def __contains__(self, point):
+        """ Return True if a point with the same coordinates is indexed
+
+        >>> (1, 1) in PointIndex([(0, 0), (1, 1)])
+        True
+        """
+        return self._find(tuple(point)) is not None
+
+    def dimension(self):
+        """ Return the dimension of the points, None if never given any """
+        return self._dimension
+
+    def insert(self, point):
+        """ Add a point to the index
+
+        The tree is rebuilt once it has grown to twice the size it was
+        built at, which keeps it balanced for any insertion order.
+
+        >>> index = PointIndex()
+        >>> for x in range(10):
+        ...     index.insert((x, x))
+        >>> index.nearest((3.2, 3.2))
+        [(3, 3)]
+        """
+        coordinates = tuple(point)
+        self._checkDimension(coordinates)
+        self._size += 1
+        self._nodes += 1
+        if self._nodes > 2 * self._built:
+            self._build(list(self) + [point])
+            return
+        if self._root is None:
+            self._root = _Node(coordinates, point, 0)
+            return
+        node = self._root
+        while True:
+            axis = node.axis
+            if coordinates[axis] < node.coordinates[axis]:
+                if node.left is None:
+                    node.left = _Node(coordinates, point,
+                                      (axis + 1) % self._dimension)
+                    return
+                node = node.left
+            else:
+                if node.right is None:
+                    node.right = _Node(coordinates, point,
+                                       (axis + 1) % self._dimension)
+                    return
+                node = node.right
+
+    def delete(self, point):
+        """ Remove a point with the same coordinates from the index
+
+        The node is only marked deleted, the tree is rebuilt with out
+        them once they make up half of it.
+
+        >>> index = PointIndex([(0, 0), (1, 1)])
+        >>> index.delete((0, 0))
+        >>> index.nearest((0, 0))
+        [(1, 1)]
+
+        Raises:
+            KeyError: if no such point is in the index.
+        """
+        node = self._find(tuple(point))
+        if node is None:
+            raise KeyError(point)
+        node.live = False
+        self._size -= 1
+        if 2 * (self._nodes - self._size) > self._nodes:
+            self._build(list(self))
+
+    def _find(self, coordinates):
+        """ Return a live node with the coordinates, or None """
+        if self._dimension is None or len(coordinates) != self._dimension:
+            return None
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.live and node.coordinates == coordinates:
+                return node
+            axis = node.axis
+            if coordinates[axis] < node.coordinates[axis]:
+                stack.append(node.left)
+            else:
+                stack.append(node.right)
+        return None
+
+    def nearest(self, point, k=1):
+        """ Return the k points nearest to point, nearest first
+
+        Args:
+            point: sequence of coordinates.
+            k: number of points to return.
+
+        Returns:
+            A list of at most k points.
+        """
+        return [found for distance, found in self.nearestWithDistances(point, k)]
+
+    def nearestWithDistances(self, point, k=1):
+        """ Return (distance, point) pairs of the k nearest points
+
+        >>> PointIndex([(0, 0), (3, 4)]).nearestWithDistances((0, 0), 2)
+        [(0.0, (0, 0)), (5.0, (3, 4))]
+        """
+        query = tuple(point)
+        self._checkQuery(query)
+        if k <= 0:
+            return []
+        dist = math.dist
+        # Max heap of the best k as (-distance, order, point).
+        best = []
+        order = 0
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if node is None or (len(best) == k and bound > -best[0][0]):
+                continue
+            if node.live:
+                distance = dist(query, node.coordinates)
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, order, node.point))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, order, node.point))
+                order += 1
+            difference = query[node.axis] - node.coordinates[node.axis]
+            if difference < 0:
+                near, far = node.left, node.right
+            else:
+                near, far = node.right, node.left
+            stack.append((far, max(bound, abs(difference))))
+            stack.append((near, bound))
+        best.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [(-distance, found) for distance, order, found in best]
+
+    def withinRadius(self, point, radius):
+        """ Return the points at most radius away from point
+
+        Args:
+            point: sequence of coordinates.
+            radius: largest euclidean distance.
+
+        Returns:
+            A list of the points in no particular order.
+        """
+        query = tuple(point)
+        self._checkQuery(query)
+        dist = math.dist
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.live and dist(query, node.coordinates) <= radius:
+                found.append(node.point)
+            value = node.coordinates[node.axis]
+            if query[node.axis] + radius >= value:
+                stack.append(node.right)
+            if query[node.axis] - radius <= value:
+                stack.append(node.left)
+        return found
+
+    def inRange(self, lower, upper):
+        """ Return the points inside the axis aligned box lower to upper
+
+        Both corners are inclusive.
+
+        Args:
+            lower: sequence of the smallest coordinates of the box.
+            upper: sequence of the largest coordinates of the box.
+
+        Returns:
+            A list of the points in no particular order.
+        """
+        lower = tuple(lower)
+        upper = tuple(upper)
+        self._checkQuery(lower)
+        self._checkQuery(upper)
+        bounds = list(zip(lower, upper))
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            coordinates = node.coordinates
+            if node.live and all(low <= value <= high for value, (low, high)
+                                 in zip(coordinates, bounds)):
+                found.append(node.point)
+            value = coordinates[node.axis]
+            if upper[node.axis] >= value:
+                stack.append(node.right)
+            if lower[node.axis] <= value:
+                stack.append(node.left)
+        return found
+
+    def _checkQuery(self, coordinates):
+        """ Check that query coordinates match the dimension of the index """
+        if self._dimension is not None and len(coordinates) != self._dimension:
+            raise ValueError('query must have the dimension of the points')
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
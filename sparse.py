@@ -0,0 +1,643 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Sparse matrices and vectors
+
+Only the non-zero elements are stored. A COOMatrix keeps (row, column,
+value) triples and is cheap to build one element at a time. A
+CSRMatrix keeps the elements of each row together and is the format
+used for arithmetic. A SparseVector keeps sorted indices and values.
+
+The sparse types mix with the dense Matrix and Vector: products and
+sums with a dense operand give a dense result, products and sums of
+sparse operands stay sparse.
+"""
+from array import array
+from bisect import bisect_left
+from itertools import repeat
+from operator import add, mul
+from math import sqrt
+from numbers import Number
+from vector import Vector, VectorLengthError
+from matrix import Matrix, MatrixSizeError
+import dtypes
+import linalg
+
+class SparseVector(object):
+    """ Mathematical Vector storing only its non-zero elements """
+
+    def __init__(self, value, length=None):
+        """ Construct a SparseVector
+
+        If value is a dict it maps indices to values and length must
+        be given. Otherwise value is a dense sequence whose non-zero
+        elements are kept.
+
+        >>> SparseVector([0, 2, 0, 3])
+        SparseVector({1: 2.0, 3: 3.0}, 4)
+        >>> SparseVector({5: 1}, 10)
+        SparseVector({5: 1.0}, 10)
+
+        Args:
+            value: dict of index to value, or a dense sequence.
+            length: length of the vector when value is a dict.
+        """
+        if isinstance(value, dict):
+            if length is None:
+                raise TypeError('a length is needed')
+            indices = sorted(value)
+            if indices and not (0 <= indices[0] and indices[-1] < length):
+                raise IndexError('SparseVector index out of range')
+            values = [value[index] for index in indices]
+        else:
+            value = list(value)
+            length = len(value)
+            indices = [index for index, element in enumerate(value) if element]
+            values = [value[index] for index in indices]
+        self._length = length
+        self._indices = array('q', indices)
+        self._values = array('d', values)
+
+    @classmethod
+    def _fromArrays(cls, length, indices, values):
+        """ Build a SparseVector around sorted index and value arrays """
+        new = cls.__new__(cls)
+        new._length = length
+        new._indices = indices
+        new._values = values
+        return new
+
+    def __repr__(self):
+        return 'SparseVector({' + ', '.join(
+            '%d: %r' % pair for pair in zip(self._indices, self._values)) + \
+            '}, %d)' % self._length
+
+    def __str__(self):
+        return str(self.toDense())
+
+    def __len__(self):
+        """ Return the length of the vector
+
+        >>> len(SparseVector({1: 1}, 5))
+        5
+        """
+        return self._length
+
+    def nNonZeros(self):
+        """ Return the number of stored elements
+
+        >>> SparseVector([0, 1, 0, 2]).nNonZeros()
+        2
+        """
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        """ Get the element at the index
+
+        >>> v1 = SparseVector([0, 1, 0, 2])
+        >>> v1[1], v1[2]
+        (1.0, 0.0)
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('SparseVector index out of range')
+        position = bisect_left(self._indices, index)
+        if position < len(self._indices) and self._indices[position] == index:
+            return self._values[position]
+        return 0.0
+
+    def __iter__(self):
+        """ Iterate over all of the elements, zeros included """
+        previous = 0
+        for index, value in zip(self._indices, self._values):
+            for i in range(previous, index):
+                yield 0.0
+            yield value
+            previous = index + 1
+        for i in range(previous, self._length):
+            yield 0.0
+
+    def items(self):
+        """ Return the (index, value) pairs of the stored elements
+
+        >>> list(SparseVector([0, 1, 0, 2]).items())
+        [(1, 1.0), (3, 2.0)]
+        """
+        return zip(self._indices, self._values)
+
+    def toDense(self):
+        """ Return the vector as a dense Vector
+
+        >>> SparseVector({1: 2}, 3).toDense()
+        Vector([0.0, 2.0, 0.0])
+        """
+        elements = [0.0] * self._length
+        for index, value in zip(self._indices, self._values):
+            elements[index] = value
+        return Vector(elements)
+
+    def __add__(self, other):
+        """ Add the other vector
+
+        A SparseVector sum stays sparse, a sum with a dense vector is
+        dense.
+
+        >>> v1 = SparseVector({0: 1, 2: 2}, 3)
+        >>> v1 + SparseVector({2: 3}, 3)
+        SparseVector({0: 1.0, 2: 5.0}, 3)
+        >>> v1 + Vector([1, 1, 1])
+        Vector([2.0, 1, 3.0])
+        """
+        if len(other) != self._length:
+            raise VectorLengthError('vectors must have the same length')
+        if isinstance(other, SparseVector):
+            merged = dict(self.items())
+            for index, value in other.items():
+                merged[index] = merged.get(index, 0.0) + value
+            return SparseVector(merged, self._length)
+        elements = list(other)
+        for index, value in zip(self._indices, self._values):
+            elements[index] += value
+        return Vector(elements)
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        """ Return the dot product with a vector, or scale by a scalar
+
+        >>> v1 = SparseVector({0: 1, 2: 2}, 3)
+        >>> v1 * Vector([3, 4, 5])
+        13.0
+        >>> v1 * SparseVector({2: 10}, 3)
+        20.0
+        >>> v1 * 2
+        SparseVector({0: 2.0, 2: 4.0}, 3)
+        """
+        if not hasattr(other, '__iter__'):
+            return SparseVector._fromArrays(
+                self._length, array('q', self._indices),
+                array('d', map(mul, self._values, repeat(other))))
+        if len(other) != self._length:
+            raise VectorLengthError('vectors must have the same length')
+        if isinstance(other, SparseVector):
+            if other.nNonZeros() < self.nNonZeros():
+                return other * self
+            return sum(value * other[index] for index, value in self.items())
+        if isinstance(other, Vector):
+            other = other._elements
+        return sum(map(mul, self._values, map(other.__getitem__, self._indices)))
+
+    def __rmul__(self, other):
+        """ Multiply a scalar, vector or dense Matrix by this vector
+
+        >>> Matrix([[1, 2], [3, 4]]) * SparseVector({1: 1}, 2)
+        Vector([2.0, 4.0])
+        """
+        if isinstance(other, Matrix):
+            if other.nColumns() != self._length:
+                raise VectorLengthError('vector length must match nColumns')
+            return Vector([sum(map(mul, self._values,
+                                   map(row.__getitem__, self._indices)))
+                           for row in other._elements])
+        return self * other
+
+    def __abs__(self):
+        """ Return the magnitude of the vector
+
+        >>> abs(SparseVector({0: 3, 9: 4}, 10))
+        5.0
+        """
+        return sqrt(sum(map(mul, self._values, self._values)))
+
+class COOMatrix(object):
+    """ Sparse Matrix built from (row, column, value) triples """
+
+    def __init__(self, nRows, nColumns, entries=()):
+        """ Construct a COOMatrix
+
+        Entries may be given up front and more can be appended. Entries
+        at the same position are summed when the matrix is converted.
+
+        >>> m1 = COOMatrix(2, 3, [(0, 0, 1), (1, 2, 5)])
+        >>> m1.append(1, 2, 1)
+        >>> m1.toDense()
+        Matrix([[1.0, 0.0, 0.0],
+                [0.0, 0.0, 6.0]])
+
+        Args:
+            nRows: number of rows.
+            nColumns: number of columns.
+            entries: iterable of (row, column, value) triples.
+        """
+        self._nRows = nRows
+        self._nColumns = nColumns
+        self._rows = array('q')
+        self._columns = array('q')
+        self._values = array('d')
+        for row, column, value in entries:
+            self.append(row, column, value)
+
+    def __repr__(self):
+        return 'COOMatrix(%d, %d, nonZeros=%d)' % (
+            self._nRows, self._nColumns, len(self._values))
+
+    def append(self, row, column, value):
+        """ Add a value at the row and column
+
+        Args:
+            row: row index.
+            column: column index.
+            value: number added at that position.
+        """
+        if not (0 <= row < self._nRows and 0 <= column < self._nColumns):
+            raise IndexError('COOMatrix index out of range')
+        self._rows.append(row)
+        self._columns.append(column)
+        self._values.append(value)
+
+    def nRows(self):
+        return self._nRows
+
+    def nColumns(self):
+        return self._nColumns
+
+    def nNonZeros(self):
+        """ Return the number of stored entries """
+        return len(self._values)
+
+    def toCSR(self):
+        """ Return the matrix as a CSRMatrix
+
+        >>> COOMatrix(2, 2, [(1, 0, 2), (0, 1, 3)]).toCSR().toDense()
+        Matrix([[0.0, 3.0],
+                [2.0, 0.0]])
+        """
+        rows = [{} for i in range(self._nRows)]
+        for row, column, value in zip(self._rows, self._columns, self._values):
+            entries = rows[row]
+            entries[column] = entries.get(column, 0.0) + value
+        return CSRMatrix._fromRowDicts(rows, self._nColumns)
+
+    def toDense(self):
+        """ Return the matrix as a dense Matrix """
+        return self.toCSR().toDense()
+
+class CSRMatrix(object):
+    """ Sparse Matrix in compressed sparse row format
+
+        The column indices and values of row i are
+        indices[indptr[i]:indptr[i + 1]] and
+        values[indptr[i]:indptr[i + 1]], sorted by column.
+    """
+
+    def __init__(self, elements):
+        """ Construct a CSRMatrix
+
+        >>> m1 = CSRMatrix([[1, 0, 0], [0, 0, 2]])
+        >>> m1.nNonZeros()
+        2
+        >>> m2 = CSRMatrix(COOMatrix(2, 2, [(0, 1, 1)]))
+
+        Args:
+            elements: dense Matrix or list of lists, COOMatrix or
+                      CSRMatrix.
+        """
+        if isinstance(elements, COOMatrix):
+            elements = elements.toCSR()
+        if isinstance(elements, CSRMatrix):
+            self._nRows = elements._nRows
+            self._nColumns = elements._nColumns
+            self._indptr = elements._indptr
+            self._indices = elements._indices
+            self._values = elements._values
+            return
+        if isinstance(elements, Matrix):
+            elements = elements._elements
+        nColumns = len(elements[0]) if elements else 0
+        indptr = array('q', [0])
+        indices = array('q')
+        values = array('d')
+        for row in elements:
+            if len(row) != nColumns:
+                raise VectorLengthError('rows must have the same length')
+            for column, value in enumerate(row):
+                if value:
+                    indices.append(column)
+                    values.append(value)
+            indptr.append(len(values))
+        self._nRows = len(elements)
+        self._nColumns = nColumns
+        self._indptr = indptr
+        self._indices = indices
+        self._values = values
+
+    @classmethod
+    def _fromArrays(cls, nRows, nColumns, indptr, indices, values):
+        """ Build a CSRMatrix around its three arrays """
+        new = cls.__new__(cls)
+        new._nRows = nRows
+        new._nColumns = nColumns
+        new._indptr = indptr
+        new._indices = indices
+        new._values = values
+        return new
+
+    @classmethod
+    def _fromRowDicts(cls, rows, nColumns):
+        """ Build a CSRMatrix from one dict of column to value per row """
+        indptr = array('q', [0])
+        indices = array('q')
+        values = array('d')
+        for entries in rows:
+            for column in sorted(entries):
+                indices.append(column)
+                values.append(entries[column])
+            indptr.append(len(values))
+        return cls._fromArrays(len(rows), nColumns, indptr, indices, values)
+
+    def __repr__(self):
+        return 'CSRMatrix(%d, %d, nonZeros=%d)' % (
+            self._nRows, self._nColumns, len(self._values))
+
+    def __str__(self):
+        return str(self.toDense())
+
+    def nRows(self):
+        """ Return the number of rows in the matrix
+
+        >>> CSRMatrix([[0, 1], [0, 0], [1, 0]]).nRows()
+        3
+        """
+        return self._nRows
+
+    def nColumns(self):
+        """ Return the number of columns in the matrix
+
+        >>> CSRMatrix([[0, 1], [0, 0], [1, 0]]).nColumns()
+        2
+        """
+        return self._nColumns
+
+    def nNonZeros(self):
+        """ Return the number of stored elements """
+        return len(self._values)
+
+    def _row(self, index):
+        """ Return the (indices, values) slices of a row """
+        start = self._indptr[index]
+        stop = self._indptr[index + 1]
+        return self._indices[start:stop], self._values[start:stop]
+
+    def __getitem__(self, index):
+        """ Get a row as a SparseVector, or an element by (row, column)
+
+        >>> m1 = CSRMatrix([[1, 0, 0], [0, 0, 2]])
+        >>> m1[1]
+        SparseVector({2: 2.0}, 3)
+        >>> m1[1, 2], m1[1][0]
+        (2.0, 0.0)
+        """
+        if isinstance(index, tuple):
+            row, column = index
+            return self[row][column]
+        if index < 0:
+            index += self._nRows
+        if not 0 <= index < self._nRows:
+            raise IndexError('CSRMatrix index out of range')
+        indices, values = self._row(index)
+        return SparseVector._fromArrays(self._nColumns, indices, values)
+
+    def __iter__(self):
+        """ Iterate over the rows as SparseVectors """
+        for index in range(self._nRows):
+            yield self[index]
+
+    def toDense(self, storage=None):
+        """ Return the matrix as a dense Matrix
+
+        >>> CSRMatrix([[1, 0], [0, 2]]).toDense()
+        Matrix([[1.0, 0.0],
+                [0.0, 2.0]])
+
+        Args:
+            storage: storage of the dense Matrix.
+        """
+        rows = []
+        for index in range(self._nRows):
+            row = [0.0] * self._nColumns
+            for column, value in zip(*self._row(index)):
+                row[column] = value
+            rows.append(row)
+        return Matrix(rows, storage=storage)
+
+    def transpose(self):
+        """ Transpose the matrix
+
+        >>> CSRMatrix([[1, 0, 3], [0, 2, 0]]).transpose().toDense()
+        Matrix([[1.0, 0.0],
+                [0.0, 2.0],
+                [3.0, 0.0]])
+        """
+        nonZeros = len(self._values)
+        indptr = array('q', bytes(8 * (self._nColumns + 1)))
+        for column in self._indices:
+            indptr[column + 1] += 1
+        for column in range(self._nColumns):
+            indptr[column + 1] += indptr[column]
+        following = array('q', indptr[:-1])
+        indices = array('q', bytes(8 * nonZeros))
+        values = array('d', bytes(8 * nonZeros))
+        for row in range(self._nRows):
+            for position in range(self._indptr[row], self._indptr[row + 1]):
+                column = self._indices[position]
+                target = following[column]
+                indices[target] = row
+                values[target] = self._values[position]
+                following[column] = target + 1
+        return CSRMatrix._fromArrays(self._nColumns, self._nRows,
+                                     indptr, indices, values)
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def eigen(self, k):
+        """ Return the k eigenpairs of largest magnitude of a symmetric matrix
+
+        Only products with vectors are used, see linalg.lanczos.
+
+        >>> values, vectors = CSRMatrix([[2, 0, 0], [0, 5, 0], [0, 0, 1]]).eigen(1)
+        >>> [round(value, 10) for value in values]
+        [5.0]
+        >>> [round(x, 10) for x in vectors[0]]
+        [-0.0, 1.0, 0.0]
+        """
+        return linalg.lanczos(self, k)
+
+    def svd(self, k):
+        """ Return the k largest singular values and singular vectors
+
+        See linalg.truncatedSVD.
+        """
+        return linalg.truncatedSVD(self, k)
+
+    def _checkSize(self, other):
+        if self._nRows != other.nRows() or self._nColumns != other.nColumns():
+            raise MatrixSizeError('matrices must have the same size')
+
+    def __add__(self, other):
+        """ Add the other matrix
+
+        A sum of sparse matrices stays sparse, a sum with a dense
+        Matrix is dense.
+
+        >>> m1 = CSRMatrix([[1, 0], [0, 2]])
+        >>> (m1 + CSRMatrix([[0, 1], [0, 1]])).toDense()
+        Matrix([[1.0, 1.0],
+                [0.0, 3.0]])
+        >>> Matrix([[1, 1], [1, 1]]) + m1
+        Matrix([[2.0, 1],
+                [1, 3.0]])
+        """
+        if isinstance(other, COOMatrix):
+            other = other.toCSR()
+        if isinstance(other, CSRMatrix):
+            self._checkSize(other)
+            rows = []
+            for index in range(self._nRows):
+                entries = dict(zip(*self._row(index)))
+                for column, value in zip(*other._row(index)):
+                    entries[column] = entries.get(column, 0.0) + value
+                rows.append(entries)
+            return CSRMatrix._fromRowDicts(rows, self._nColumns)
+        if isinstance(other, Matrix):
+            self._checkSize(other)
+            rows = [list(row) for row in other._elements]
+            for index, row in enumerate(rows):
+                for column, value in zip(*self._row(index)):
+                    row[column] += value
+            return other._new(rows, dtypes.floating(other.dtype()))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        """ Multiply this matrix by a scalar, vector or matrix
+
+        Zeros of the sparse operand are skipped. Products with dense
+        operands are dense, products of sparse operands are sparse.
+
+        >>> m1 = CSRMatrix([[1, 0], [0, 2]])
+        >>> m1 * Vector([3, 4])
+        Vector([3.0, 8.0])
+        >>> m1 * Matrix([[1, 2], [3, 4]])
+        Matrix([[1.0, 2.0],
+                [6.0, 8.0]])
+        >>> (m1 * m1).toDense()
+        Matrix([[1.0, 0.0],
+                [0.0, 4.0]])
+        >>> (m1 * 3).toDense()
+        Matrix([[3.0, 0.0],
+                [0.0, 6.0]])
+        """
+        if isinstance(other, Number):
+            return CSRMatrix._fromArrays(
+                self._nRows, self._nColumns, self._indptr, self._indices,
+                array('d', map(mul, self._values, repeat(other))))
+
+        if isinstance(other, COOMatrix):
+            other = other.toCSR()
+        if isinstance(other, CSRMatrix):
+            if self._nColumns != other._nRows:
+                raise MatrixSizeError('columns of the left Matrix must '
+                                      'match rows of the right Matrix')
+            rows = []
+            for index in range(self._nRows):
+                entries = {}
+                for inner, value in zip(*self._row(index)):
+                    for column, element in zip(*other._row(inner)):
+                        entries[column] = entries.get(column, 0.0) + \
+                                          value * element
+                rows.append(entries)
+            return CSRMatrix._fromRowDicts(rows, other._nColumns)
+
+        if isinstance(other, Matrix):
+            if self._nColumns != other.nRows():
+                raise MatrixSizeError('columns of the left Matrix must '
+                                      'match rows of the right Matrix')
+            dense = other._elements
+            rows = []
+            for index in range(self._nRows):
+                row = [0.0] * other.nColumns()
+                for inner, value in zip(*self._row(index)):
+                    row = list(map(add, row, map(mul, dense[inner], repeat(value))))
+                rows.append(row)
+            return other._new(rows, dtypes.floating(other.dtype()))
+
+        if isinstance(other, SparseVector):
+            other = other.toDense()
+        if hasattr(other, '__iter__'):
+            if len(other) != self._nColumns:
+                raise VectorLengthError('vector length must match nColumns')
+            if isinstance(other, Vector):
+                other = other._elements
+            element = other.__getitem__
+            return Vector([sum(map(mul, values, map(element, indices)))
+                           for indices, values in map(self._row, range(self._nRows))])
+        return NotImplemented
+
+    def __rmul__(self, other):
+        """ Multiply a scalar or dense Matrix by this matrix
+
+        >>> Matrix([[1, 2], [3, 4]]) * CSRMatrix([[0, 1], [1, 0]])
+        Matrix([[2.0, 1.0],
+                [4.0, 3.0]])
+        >>> 2 * CSRMatrix([[0, 1]])
+        CSRMatrix(1, 2, nonZeros=1)
+        """
+        if isinstance(other, Number):
+            return self * other
+        if isinstance(other, Matrix):
+            if other.nColumns() != self._nRows:
+                raise MatrixSizeError('columns of the left Matrix must '
+                                      'match rows of the right Matrix')
+            rows = []
+            for dense in other._elements:
+                row = [0.0] * self._nColumns
+                for inner, value in enumerate(dense):
+                    if value:
+                        for column, element in zip(*self._row(inner)):
+                            row[column] += value * element
+                rows.append(row)
+            return other._new(rows, dtypes.floating(other.dtype()))
+        return NotImplemented
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
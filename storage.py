@@ -0,0 +1,199 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Storage engines for the Matrix
+
+A Matrix keeps its rows in a list of row sequences. With the list
+storage each row is an ordinary Python list. With the array storage
+all of the elements live in a single flat ``array.array`` in row major
+order and each row is a ``memoryview`` slice into that block, so rows
+share memory with the block and with each other.
+"""
+from array import array
+from itertools import chain
+import mmap as mmapping
+import struct
+import sys
+
+LIST = 'list'
+ARRAY = 'array'
+
+STORAGES = (LIST, ARRAY)
+
+DEFAULT_TYPECODE = 'd'
+
+# Header of a saved block: magic, typecode, number of dimensions and up
+# to two dimensions. The elements follow little endian, 8 byte aligned.
+MAGIC = b'PYMATH01'
+HEADER = struct.Struct('<8scB6xQQ')
+
+def typecodeOf(data):
+    """ Return the typecode of a flat block, an array or a memoryview
+
+    >>> typecodeOf(array('d'))
+    'd'
+    >>> typecodeOf(memoryview(array('d')))
+    'd'
+    """
+    if isinstance(data, array):
+        return data.typecode
+    return data.format
+
+def checkStorage(storage):
+    """ Return the storage name, raising ValueError if it is unknown
+
+    >>> checkStorage('array')
+    'array'
+    >>> checkStorage('heap')
+    Traceback (most recent call last):
+        ...
+    ValueError: unknown storage 'heap'
+    """
+    if storage not in STORAGES:
+        raise ValueError('unknown storage %r' % (storage,))
+    return storage
+
+def flatten(rows, typecode=DEFAULT_TYPECODE):
+    """ Copy the rows into one contiguous row major array
+
+    >>> flatten([[1, 2], [3, 4]])
+    array('d', [1.0, 2.0, 3.0, 4.0])
+
+    Args:
+        rows: iterable of row sequences.
+        typecode: array typecode of the block.
+    """
+    return array(typecode, chain.from_iterable(rows))
+
+def rowViews(data, nRows, nColumns):
+    """ Return a list of memoryview rows sharing the flat block
+
+    >>> data = flatten([[1, 2], [3, 4]])
+    >>> rows = rowViews(data, 2, 2)
+    >>> rows[1][0] = 30
+    >>> data
+    array('d', [1.0, 2.0, 30.0, 4.0])
+
+    Args:
+        data: flat row major block supporting the buffer protocol.
+        nRows: number of rows in the block.
+        nColumns: number of columns in the block.
+    """
+    view = memoryview(data)
+    if nColumns == 0:
+        return [view[0:0] for i in range(nRows)]
+    return [view[i:i + nColumns]
+            for i in range(0, nRows * nColumns, nColumns)]
+
+def save(path, data, shape):
+    """ Save a flat block to a file
+
+    Args:
+        path: path of the file to write.
+        data: flat array or memoryview of the elements.
+        shape: tuple of one or two dimensions.
+    """
+    typecode = typecodeOf(data)
+    if not isinstance(data, array):
+        data = array(typecode, data)
+    if sys.byteorder == 'big':
+        data = array(typecode, data)
+        data.byteswap()
+    with open(path, 'wb') as output:
+        writeHeader(output, typecode, shape)
+        data.tofile(output)
+
+def writeHeader(output, typecode, shape):
+    """ Write the header of a saved block at the start of a file
+
+    Args:
+        output: file open for binary writing.
+        typecode: array typecode of the elements.
+        shape: tuple of one or two dimensions.
+    """
+    dimensions = tuple(shape) + (0,) * (2 - len(shape))
+    output.seek(0)
+    output.write(HEADER.pack(MAGIC, typecode.encode('ascii'),
+                             len(shape), *dimensions))
+
+def load(path, mmap=True):
+    """ Load a flat block saved by save
+
+    With mmap the file is mapped copy on write and the block is a
+    memoryview of the mapping, so pages are only read when used and
+    changes are never written back to the file. Otherwise the block is
+    read into an array.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'block.bin')
+    >>> save(path, flatten([[1, 2], [3, 4]]), (2, 2))
+    >>> data, shape = load(path)
+    >>> data.tolist(), shape
+    ([1.0, 2.0, 3.0, 4.0], (2, 2))
+    >>> load(path, mmap=False)
+    (array('d', [1.0, 2.0, 3.0, 4.0]), (2, 2))
+
+    Args:
+        path: path of the file to read.
+        mmap: map the file instead of reading it.
+
+    Returns:
+        The flat block and the tuple of dimensions.
+    """
+    with open(path, 'rb') as source:
+        header = source.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError('%s is not a saved block' % path)
+        magic, typecode, nDimensions, first, second = HEADER.unpack(header)
+        if magic != MAGIC or nDimensions not in (1, 2):
+            raise ValueError('%s is not a saved block' % path)
+        typecode = typecode.decode('ascii')
+        shape = (first, second)[:nDimensions]
+        size = first * (second if nDimensions == 2 else 1)
+        itemsize = array(typecode).itemsize
+
+        if mmap and size and sys.byteorder == 'little':
+            mapping = mmapping.mmap(source.fileno(), 0,
+                                    access=mmapping.ACCESS_COPY)
+            stop = HEADER.size + size * itemsize
+            if len(mapping) < stop:
+                raise ValueError('%s is truncated' % path)
+            return memoryview(mapping)[HEADER.size:stop].cast(typecode), shape
+
+        data = array(typecode)
+        try:
+            data.fromfile(source, size)
+        except EOFError:
+            raise ValueError('%s is truncated' % path)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        return data, shape
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,300 @@
+# Copyright (C) 2013, Cameron White
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the project nor the names of its contributors
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE PROJECT AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE PROJECT OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Streaming construction and out-of-core Matrix operations
+
+Matrices too large for memory are written to disk one row at a time
+with a MatrixWriter, in the format of Matrix.save, and processed one
+chunk of rows at a time. Chunks are read through a memory mapping so
+only the pages in use are held in memory.
+
+>>> import os, tempfile
+>>> path = os.path.join(tempfile.mkdtemp(), 'rows.bin')
+>>> with MatrixWriter(path, 2) as writer:
+...     writer.extend([i, 2 * i] for i in range(5))
+>>> for chunk in multiplyVector(path, Vector([1, 1]), chunkRows=2):
+...     chunk
+Vector([0.0, 3.0])
+Vector([6.0, 9.0])
+Vector([12.0])
+"""
+from array import array
+import mmap
+import sys
+import storage
+from vector import Vector, VectorLengthError
+from matrix import Matrix, MatrixSizeError
+
+# Rows processed at a time when no chunk size is given.
+CHUNK_ROWS = 4096
+
+class MatrixWriter(object):
+    """ Write a Matrix to a file one row at a time
+
+    The number of rows is only known, and written to the header, when
+    the writer is closed.
+    """
+
+    def __init__(self, path, nColumns):
+        """ Open the file at path for writing rows of nColumns elements
+
+        Args:
+            path: path of the file to write.
+            nColumns: number of elements of every row.
+        """
+        self._path = path
+        self._nColumns = nColumns
+        self._nRows = 0
+        self._output = open(path, 'wb')
+        storage.writeHeader(self._output, storage.DEFAULT_TYPECODE,
+                            (0, nColumns))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close()
+
+    def append(self, row):
+        """ Write one row
+
+        Args:
+            row: sequence of nColumns numbers.
+        """
+        if len(row) != self._nColumns:
+            raise VectorLengthError('rows must have the same length')
+        data = array(storage.DEFAULT_TYPECODE, row)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        data.tofile(self._output)
+        self._nRows += 1
+
+    def extend(self, rows):
+        """ Write every row of an iterable
+
+        Args:
+            rows: iterable of sequences of nColumns numbers.
+        """
+        for row in rows:
+            self.append(row)
+
+    def nRows(self):
+        """ Return the number of rows written so far """
+        return self._nRows
+
+    def close(self):
+        """ Write the final header and close the file """
+        if self._output is not None:
+            storage.writeHeader(self._output, storage.DEFAULT_TYPECODE,
+                                (self._nRows, self._nColumns))
+            self._output.close()
+            self._output = None
+
+def writeMatrix(path, rows, nColumns=None):
+    """ Write the rows of an iterable to a file without holding them
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'rows.bin')
+    >>> writeMatrix(path, ([i, i] for i in range(3)))
+    (3, 2)
+    >>> Matrix.load(path)
+    Matrix([[0.0, 0.0],
+            [1.0, 1.0],
+            [2.0, 2.0]])
+
+    Args:
+        path: path of the file to write.
+        rows: iterable of rows of the same length.
+        nColumns: length of the rows, taken from the first row if None.
+
+    Returns:
+        The number of rows and columns written.
+    """
+    rows = iter(rows)
+    if nColumns is None:
+        try:
+            first = next(rows)
+        except StopIteration:
+            raise ValueError('a Matrix needs at least one row')
+        nColumns = len(first)
+        rows = _prepend(first, rows)
+    with MatrixWriter(path, nColumns) as writer:
+        writer.extend(rows)
+        return writer.nRows(), nColumns
+
+def _prepend(first, rows):
+    yield first
+    for row in rows:
+        yield row
+
+def _load(path):
+    """ Map the Matrix saved at path
+
+    Returns:
+        The flat block and the numbers of rows and columns, taken from
+        the header so a file without rows still has its columns.
+    """
+    data, shape = storage.load(path, mmap=True)
+    if len(shape) != 2:
+        raise ValueError('%s does not hold a Matrix' % path)
+    return data, shape[0], shape[1]
+
+def chunks(path, chunkRows=None):
+    """ Yield the Matrix saved at path as Matrices of chunkRows rows
+
+    The chunks are views into a memory mapping of the file. A file
+    without rows yields no chunks.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'empty.bin')
+    >>> MatrixWriter(path, 3).close()
+    >>> list(chunks(path))
+    []
+
+    Args:
+        path: path of a file written by Matrix.save or MatrixWriter.
+        chunkRows: rows per chunk, defaults to CHUNK_ROWS.
+    """
+    data, nRows, nColumns = _load(path)
+    chunkRows = chunkRows or CHUNK_ROWS
+    for start in range(0, nRows, chunkRows):
+        stop = min(start + chunkRows, nRows)
+        yield Matrix._fromFlat(data[start * nColumns:stop * nColumns],
+                               stop - start, nColumns)
+
+def multiplyVector(path, vector, chunkRows=None):
+    """ Yield the product of the Matrix saved at path and a vector
+
+    The product is yielded as one Vector per chunk of rows.
+
+    Args:
+        path: path of the saved Matrix.
+        vector: Vector with as many elements as the Matrix has columns.
+        chunkRows: rows per chunk, defaults to CHUNK_ROWS.
+    """
+    if not isinstance(vector, Vector):
+        vector = Vector(vector)
+    data, nRows, nColumns = _load(path)
+    if nColumns != len(vector):
+        raise VectorLengthError('vector length must match nColumns')
+    for chunk in chunks(path, chunkRows):
+        yield chunk * vector
+
+def add(path, otherPath, outPath, chunkRows=None):
+    """ Add two saved matrices chunk by chunk into a new file
+
+    >>> import os, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> a, b = os.path.join(folder, 'a.bin'), os.path.join(folder, 'b.bin')
+    >>> Matrix([[1, 2], [3, 4]]).save(a)
+    >>> Matrix([[10, 20], [30, 40]]).save(b)
+    >>> add(a, b, os.path.join(folder, 'sum.bin'), chunkRows=1)
+    (2, 2)
+    >>> Matrix.load(os.path.join(folder, 'sum.bin'))
+    Matrix([[11.0, 22.0],
+            [33.0, 44.0]])
+
+    Args:
+        path: path of the left saved Matrix.
+        otherPath: path of the right saved Matrix.
+        outPath: path of the file to write the sum to.
+        chunkRows: rows per chunk, defaults to CHUNK_ROWS.
+
+    Returns:
+        The number of rows and columns of the sum.
+    """
+    first, nRows, nColumns = _load(path)
+    second, otherRows, otherColumns = _load(otherPath)
+    if (nRows, nColumns) != (otherRows, otherColumns):
+        raise MatrixSizeError('matrices must have the same size')
+    with MatrixWriter(outPath, nColumns) as writer:
+        for a, b in zip(chunks(path, chunkRows), chunks(otherPath, chunkRows)):
+            writer.extend((a + b)._elements)
+        return writer.nRows(), nColumns
+
+def transpose(path, outPath, chunkRows=None):
+    """ Transpose a saved Matrix into a new file
+
+    The output file is mapped for writing. Each chunk of chunkRows
+    input rows fills a contiguous run of every output row, so the
+    writes go through the mapping a block at a time rather than one
+    element per page.
+
+    >>> import os, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> Matrix([[1, 2, 3], [4, 5, 6]]).save(os.path.join(folder, 'a.bin'))
+    >>> transpose(os.path.join(folder, 'a.bin'), os.path.join(folder, 't.bin'))
+    (3, 2)
+    >>> Matrix.load(os.path.join(folder, 't.bin'))
+    Matrix([[1.0, 4.0],
+            [2.0, 5.0],
+            [3.0, 6.0]])
+    >>> MatrixWriter(os.path.join(folder, 'e.bin'), 3).close()
+    >>> transpose(os.path.join(folder, 'e.bin'), os.path.join(folder, 'et.bin'))
+    (3, 0)
+
+    Args:
+        path: path of the saved Matrix.
+        outPath: path of the file to write the transpose to.
+        chunkRows: rows read per chunk, defaults to CHUNK_ROWS.
+
+    Returns:
+        The number of rows and columns of the transpose.
+    """
+    data, nRows, nColumns = _load(path)
+    chunkRows = chunkRows or CHUNK_ROWS
+    typecode = storage.typecodeOf(data)
+    size = storage.HEADER.size + nRows * nColumns * array(typecode).itemsize
+    with open(outPath, 'w+b') as output:
+        storage.writeHeader(output, typecode, (nColumns, nRows))
+        output.truncate(size)
+        output.flush()
+        if not nRows * nColumns:
+            return nColumns, nRows
+        mapping = mmap.mmap(output.fileno(), size)
+        try:
+            with memoryview(mapping) as view:
+                with view[storage.HEADER.size:].cast(typecode) as flat:
+                    for start in range(0, nRows, chunkRows):
+                        stop = min(start + chunkRows, nRows)
+                        block = data[start * nColumns:stop * nColumns]
+                        for column in range(nColumns):
+                            values = block[column::nColumns]
+                            if sys.byteorder == 'big':
+                                values = array(typecode, values)
+                                values.byteswap()
+                            offset = column * nRows
+                            flat[offset + start:offset + stop] = values
+            mapping.flush()
+        finally:
+            mapping.close()
+    return nColumns, nRows
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -27,38 +27,87 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 from numbers import Number
-from functools import reduce
-from math import sqrt
+from math import fsum, inf, sqrt
+from collections.abc import MutableSequence
+from operator import add, sub, mul
+from itertools import chain, cycle, repeat
+from array import array
+import kernels
+import storage
+import dtypes
+
+def _evaluated(value):
+    """ Return value, or its result if it is a lazy expression """
+    evaluate = getattr(value, 'evaluate', None)
+    return evaluate() if callable(evaluate) else value
+
+def _typed(value):
+    """ Return the dtype of value, from its elements if it is untyped """
+    dtype = getattr(value, 'dtype', None)
+    dtype = dtype() if callable(dtype) else None
+    return dtype or dtypes.ofValues(value)
 
 class Vector(object):
     """ Mathematical Vector """
 
-    def __init__(self, value):
+    __slots__ = ('_elements', '_dtype')
+
+    def __init__(self, value, dtype=None):
         """ Construct a Vector
 
         If value is a number the vector becomes a vector all 0 of
-        that length. If the value is a list the vector will 
-        contain the elements of that length with out any copying.
+        that length. If the value is a list, array, memoryview or
+        other mutable sequence the vector will contain the elements
+        of that length with out any copying.
         Any other type for value will be converted to list if 
         possible, this will probably result in copying of data.
         Also if value is a Vector then the constructor copies.
 
+        With a dtype ('int64', 'float32', 'float64' or 'complex128',
+        see the dtypes module) every element is of that one type. The
+        elements are converted into an array of that type, or a list
+        for complex128, unless they are already stored that way.
+
         >>> v1 = Vector([1, 2, 3, 4, 5])
         >>> v2 = Vector([0.1, 0.2, 0.3, 0.4, 0.5])
         >>> v3 = Vector(5)
+        >>> v4 = Vector([1, 2], dtype='float32')
+        >>> v4.dtype(), v4
+        (float32, Vector([1.0, 2.0]))
 
         Args:
             value: list, number, or something that can be converted 
                    to a list.
+            dtype: name of a dtype or a dtypes.DType
         """
+        if dtype is not None:
+            dtype = dtypes.dtype(dtype)
         if isinstance(value, Vector):
             self._elements = value._elements
-        elif isinstance(value, list):
+            self._dtype = value._dtype
+        elif isinstance(value, (MutableSequence, memoryview)):
             self._elements = value
+            self._dtype = None
+            if isinstance(value, (array, memoryview)):
+                self._dtype = dtypes.fromTypecode(storage.typecodeOf(value))
         elif isinstance(value, Number):
             self._elements = [0]*value
+            self._dtype = None
         else:
             self._elements = list(value)
+            self._dtype = None
+
+        if dtype is not None and dtype is not self._dtype:
+            self._elements = dtype.store(self._elements)
+            self._dtype = dtype
+
+    @classmethod
+    def _wrap(cls, elements, dtype=None):
+        """ Build a vector around elements with out checking them """
+        new = cls.__new__(cls)
+        new._elements = elements
+        new._dtype = dtype
+        return new
 
     def __repr__(self):
         """ Return the representation of the Vector
@@ -66,7 +115,7 @@ class Vector(object):
         >>> Vector([1,2,3])
         Vector([1, 2, 3])
         """
-        return 'Vector(' + str(self) + ')'
+        return type(self).__name__ + '(' + str(self) + ')'
 
     def __str__(self):
         """ Return the string of the Vector
@@ -74,9 +123,7 @@ class Vector(object):
         >>> print(Vector([1,2,3]))
         [1, 2, 3]
         """
-        return '[' \
-                + str(reduce(lambda x, y: str(x) + ', ' + str(y), self._elements))\
-                + ']'
+        return '[' + ', '.join(map(str, self._elements)) + ']'
 
     def __add__(self, other):
         """ Add this vector to the other vector in a new vector
@@ -86,16 +133,24 @@ class Vector(object):
         >>> v1 + v2
         Vector([1.1, 2.2, 3.3, 4.4, 5.5])
 
+        A lazy expression, or anything else with out a length, is left
+        to its own reflected operator:
+        >>> (Vector([1, 2]) + Vector([1, 2]).lazy()).evaluate()
+        Vector([2, 4])
+        >>> (Vector([1, 2]) - Vector([1, 2]).lazy() * 2).evaluate()
+        Vector([-1, -2])
+
         Args:
             other: The other vector
 
         Returns:
             The new vector.
         """
-        try:
-            return Vector(map(lambda a, b: a + b, self, other))
-        except TypeError:
-            raise VectorLengthError
+        if not hasattr(other, '__len__'):
+            return NotImplemented
+        self._checkLength(other)
+        return Vector(list(map(add, self._elements, other)),
+                      dtype=self._promote(other))
 
     def __iadd__(self, other):
         """ Add this vector to the other vector in place.
@@ -105,11 +160,54 @@ class Vector(object):
         >>> v1 += v2
         >>> v1
         Vector([1.1, 2.2, 3.3, 4.4, 5.5])
+        >>> v3 = Vector([1, 2])
+        >>> v3 += Vector([1, 2]).lazy() * 10
+        >>> v3
+        Vector([11, 22])
+
+        The elements are written into the existing storage so every
+        holder of it sees the sum. Untyped operands are typed from their
+        elements, as by Matrix:
+        >>> v4 = Vector([1, 2], dtype='int64')
+        >>> v4 += [0.5, 0.5]
+        Traceback (most recent call last):
+            ...
+        TypeError: result dtype float64 cannot be stored in int64
 
         Args:
             other: The other vector
         """
-        return self.copy(self + other)
+        other = _evaluated(other)
+        self._checkLength(other)
+        self._checkStore(self, other)
+        kernels.assign(self._elements, map(add, self._elements, other))
+        return self
+
+    def add(self, other, out=None):
+        """ Add this vector to the other vector, optionally into out
+
+        >>> v1 = Vector([1, 2])
+        >>> out = Vector(2)
+        >>> v1.add(Vector([10, 20]), out=out) is out
+        True
+        >>> out
+        Vector([11, 22])
+
+        Args:
+            other: The other vector
+            out: Vector the sum is written into, a new one if None.
+
+        Returns:
+            The vector holding the sum.
+        """
+        if out is None:
+            return self + other
+        other = _evaluated(other)
+        self._checkLength(other)
+        self._checkLength(out)
+        self._checkStore(out, other)
+        kernels.assign(out._elements, map(add, self._elements, other))
+        return out
 
     def __sub__(self, other):
         """ Subtract the other vector from this vector in a new vector.
@@ -125,23 +223,117 @@ class Vector(object):
         Returns:
             The new vector.
         """
-        try:
-            return Vector(map(lambda a, b: a - b, self, other))
-        except TypeError:
-            raise VectorLengthError
+        if not hasattr(other, '__len__'):
+            return NotImplemented
+        self._checkLength(other)
+        return Vector(list(map(sub, self._elements, other)),
+                      dtype=self._promote(other))
 
     def __isub__(self, other):
-        """ Subtract the other vector from this vector in a new vector.
+        """ Subtract the other vector from this vector in place.
 
         >>> v1 = Vector([1, 2, 3, 4, 5])
         >>> v2 = Vector([0.1, 0.2, 0.3, 0.4, 0.5])
-        >>> v1 - v2
+        >>> v1 -= v2
+        >>> v1
         Vector([0.9, 1.8, 2.7, 3.6, 4.5])
 
         Args:
             other: The other vector
         """
-        return self.copy(self - other)
+        other = _evaluated(other)
+        self._checkLength(other)
+        self._checkStore(self, other)
+        kernels.assign(self._elements, map(sub, self._elements, other))
+        return self
+
+    def sub(self, other, out=None):
+        """ Subtract the other vector from this vector, optionally into out
+
+        >>> v1 = Vector([10, 20])
+        >>> v1.sub(Vector([1, 2]), out=v1)
+        Vector([9, 18])
+
+        Args:
+            other: The other vector
+            out: Vector the difference is written into, a new one if None.
+
+        Returns:
+            The vector holding the difference.
+        """
+        if out is None:
+            return self - other
+        other = _evaluated(other)
+        self._checkLength(other)
+        self._checkLength(out)
+        self._checkStore(out, other)
+        kernels.assign(out._elements, map(sub, self._elements, other))
+        return out
+
+    def scale(self, scalar, out=None):
+        """ Multiply this vector by a scalar, optionally into out
+
+        >>> out = Vector(2)
+        >>> Vector([1, 2]).scale(3, out=out)
+        Vector([3, 6])
+
+        Args:
+            scalar: The number to multiply by
+            out: Vector the result is written into, a new one if None.
+
+        Returns:
+            The vector holding the result.
+        """
+        if out is None:
+            return self * scalar
+        self._checkLength(out)
+        self._checkStore(out, scalar)
+        kernels.assign(out._elements, map(mul, self._elements, repeat(scalar)))
+        return out
+
+    def dtype(self):
+        """ Return the dtype of the elements, None if they are untyped
+
+        >>> Vector([1, 2]).dtype() is None
+        True
+        >>> (Vector([1, 2], dtype='int64') + Vector([1, 2], dtype='float32')).dtype()
+        float64
+        """
+        return self._dtype
+
+    def _promote(self, other):
+        """ Return the dtype of arithmetic with the other vector """
+        dtype = getattr(other, 'dtype', None)
+        return dtypes.promote(self._dtype,
+                              dtype() if callable(dtype) else None)
+
+    def _checkStore(self, out, other):
+        """ Raise TypeError unless out can take arithmetic with other
+
+        Untyped operands are typed from their elements, see
+        dtypes.ofValues, so every store into a typed vector is checked.
+        """
+        if out._dtype is None:
+            return
+        dtype = self._dtype or dtypes.ofValues(self._elements)
+        if isinstance(other, Number):
+            dtype = dtypes.promoteScalar(dtype, other)
+        else:
+            dtype = dtypes.promote(dtype, _typed(other))
+        dtypes.checkStore(out._dtype, dtype)
+
+    def _checkLength(self, other):
+        """ Raise VectorLengthError unless other has the same length
+
+        A lazy Vector expression has no length but a shape.
+        """
+        shape = getattr(other, 'shape', None)
+        if shape is not None and not hasattr(other, '__len__'):
+            length = shape[0] if len(shape) == 1 else None
+        else:
+            length = len(other)
+        if length != len(self._elements):
+            raise VectorLengthError('vectors must have the same length')
 
     def __iter__(self):
         for element in self._elements:
@@ -180,7 +372,134 @@ class Vector(object):
         >>> abs(Vector([1, 2, 3]))
         3.7416573867739413
         """
-        return sqrt(self * self)
+        return self.norm()
+
+    def dot(self, other, exact=False):
+        """ Return the dot product of this vector and the other
+
+        >>> Vector([1, 2, 3]).dot(Vector([4, 5, 6]))
+        32
+        >>> Vector([1e100, 1.0, -1e100]).dot([1, 1, 1], exact=True)
+        1.0
+
+        Args:
+            other: Vector or sequence of the same length.
+            exact: if True sum with math.fsum, which rounds only once,
+                   the result is then a float.
+
+        Raises:
+            VectorLengthError: if the lengths differ.
+        """
+        self._checkLength(other)
+        if isinstance(other, Vector):
+            other = other._elements
+        if exact:
+            return fsum(map(mul, self._elements, other))
+        return sum(map(mul, self._elements, other))
+
+    def sum(self, exact=False):
+        """ Return the sum of the elements
+
+        >>> Vector([0.1] * 10).sum(), Vector([0.1] * 10).sum(exact=True)
+        (0.9999999999999999, 1.0)
+
+        Args:
+            exact: if True sum with math.fsum.
+        """
+        if exact:
+            return fsum(self._elements)
+        return sum(self._elements)
+
+    def min(self):
+        """ Return the smallest element
+
+        >>> Vector([3, 1, 2]).min()
+        1
+        """
+        return min(self._elements)
+
+    def max(self):
+        """ Return the largest element
+
+        >>> Vector([3, 1, 2]).max()
+        3
+        """
+        return max(self._elements)
+
+    def argmin(self):
+        """ Return the index of the first smallest element
+
+        >>> Vector([3, 1, 2, 1]).argmin()
+        1
+        """
+        elements = self._elements
+        return min(range(len(elements)), key=elements.__getitem__)
+
+    def argmax(self):
+        """ Return the index of the first largest element
+
+        >>> Vector([3, 1, 3]).argmax()
+        0
+        """
+        elements = self._elements
+        return max(range(len(elements)), key=elements.__getitem__)
+
+    def norm(self, order=2, exact=False):
+        """ Return the L1, L2 or infinity norm
+
+        >>> v1 = Vector([3, -4])
+        >>> v1.norm(), v1.norm(1), v1.norm(inf)
+        (5.0, 7, 4)
+
+        Args:
+            order: 1, 2 or math.inf.
+            exact: if True sum with math.fsum.
+
+        Raises:
+            ValueError: for any other order.
+        """
+        elements = self._elements
+        if order == 2:
+            if self._dtype is not None and self._dtype.kind == 'c':
+                squares = [abs(x) ** 2 for x in elements]
+            else:
+                squares = map(mul, elements, elements)
+            return sqrt(fsum(squares) if exact else sum(squares))
+        if order == 1:
+            return fsum(map(abs, elements)) if exact else sum(map(abs, elements))
+        if order == inf:
+            return max(map(abs, elements), default=0)
+        raise ValueError('order must be 1, 2 or inf')
+
+    def normalize(self, order=2):
+        """ Return a new vector of the same direction and norm 1
+
+        >>> Vector([3, 4]).normalize()
+        Vector([0.6000000000000001, 0.8])
+
+        Raises:
+            ValueError: for a zero vector.
+        """
+        length = self.norm(order)
+        if not length:
+            raise ValueError('cannot normalize a zero vector')
+        return self * (1.0 / length)
+
+    def cosine(self, other):
+        """ Return the cosine of the angle between this vector and the other
+
+        >>> Vector([1, 0]).cosine(Vector([1, 1]))
+        0.7071067811865475
+
+        Raises:
+            ValueError: if either vector is zero.
+        """
+        if not isinstance(other, Vector):
+            other = Vector(other)
+        lengths = self.norm() * other.norm()
+        if not lengths:
+            raise ValueError('the cosine of a zero vector is undefined')
+        return self.dot(other) / lengths
 
     def copy(self, other):
         """ Copy the elements of the other vector
@@ -190,8 +509,11 @@ class Vector(object):
         >>> v2 = Vector(v1)
         >>> v2._elements is v1._elements
         True
+        >>> Vector(0).copy(Vector([1, 2], dtype='int64')).dtype()
+        int64
         """
         self._elements = other._elements
+        self._dtype = other._dtype
         return self
 
     def __mul__(self, other):
@@ -203,22 +525,428 @@ class Vector(object):
         Vector([2, 4])
         """
         if not hasattr(other, '__iter__'):
-            return Vector(map(lambda x: x*other, self))
-        else:
-            return reduce(lambda x, y: x+y, 
-                          map(lambda x, y: x*y, self, other))
+            return Vector(list(map(mul, self._elements, repeat(other))),
+                          dtype=dtypes.promoteScalar(self._dtype, other))
+        return self.dot(other)
 
-    def __imul__(self, other):
+    def save(self, path):
+        """ Save the vector to a binary file
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'vector.bin')
+        >>> Vector([1, 2, 3]).save(path)
+        >>> Vector.load(path)
+        Vector([1.0, 2.0, 3.0])
+
+        Args:
+            path: path of the file to write.
+        """
+        data = self._elements
+        if not isinstance(data, (array, memoryview)):
+            data = array(storage.DEFAULT_TYPECODE, data)
+        storage.save(path, data, (len(data),))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """ Load a vector saved by save
+
+        With mmap the vector is a view into a copy on write mapping of
+        the file, see Matrix.load.
+
+        Args:
+            path: path of the file to read.
+            mmap: map the file instead of reading it.
+        """
+        data, shape = storage.load(path, mmap)
+        if len(shape) != 1:
+            raise ValueError('%s does not hold a Vector' % path)
+        return cls(data)
+
+    def lazy(self):
+        """ Return a lazy expression of this vector
+
+        Arithmetic on the expression is only carried out when it is
+        evaluated, in a single pass and with out intermediate vectors.
+        See the expression module.
+
+        >>> v1 = Vector([1, 2])
+        >>> (v1.lazy() * 2 + v1).evaluate()
+        Vector([3, 6])
         """
+        from expression import Leaf
+        return Leaf(self)
+
+    def __imul__(self, other):
+        """ Multiply this vector by a scalar in place
+
         >>> v1 = Vector([1, 2])
+        >>> alias = Vector(v1)
         >>> v1 *= 2
-        >>> v1
+        >>> alias
         Vector([2, 4])
+
+        A typed vector keeps its dtype, see dtypes.checkStore:
+        >>> v2 = Vector([1, 2], dtype='int64')
+        >>> v2 *= 0.5
+        Traceback (most recent call last):
+            ...
+        TypeError: result dtype float64 cannot be stored in int64
         """
         if not hasattr(other, '__iter__'):
-            self.copy(self * other)
+            self._checkStore(self, other)
+            kernels.assign(self._elements,
+                           map(mul, self._elements, repeat(other)))
         return self
 
+class Vector2(Vector):
+    """ Vector of two elements with unrolled arithmetic
+
+    Arithmetic with another Vector2 skips the generic loops of Vector.
+    Anything else, or typed elements, falls back to Vector.
+
+    >>> Vector2([1, 2]) + Vector2([3, 4])
+    Vector2([4, 6])
+    >>> Vector2([1, 2]) * Vector2([3, 4])
+    11
+    """
+
+    __slots__ = ()
+
+    def __init__(self, value, dtype=None):
+        Vector.__init__(self, value, dtype)
+        if len(self._elements) != 2:
+            raise VectorLengthError('a Vector2 has two elements')
+
+    def __add__(self, other):
+        if type(other) is Vector2 and self._dtype is other._dtype is None:
+            a = self._elements
+            b = other._elements
+            return Vector2._wrap([a[0] + b[0], a[1] + b[1]])
+        return Vector.__add__(self, other)
+
+    def __sub__(self, other):
+        if type(other) is Vector2 and self._dtype is other._dtype is None:
+            a = self._elements
+            b = other._elements
+            return Vector2._wrap([a[0] - b[0], a[1] - b[1]])
+        return Vector.__sub__(self, other)
+
+    def __mul__(self, other):
+        if self._dtype is None:
+            a = self._elements
+            if isinstance(other, Number):
+                return Vector2._wrap([a[0] * other, a[1] * other])
+            if type(other) is Vector2 and other._dtype is None:
+                b = other._elements
+                return a[0] * b[0] + a[1] * b[1]
+        return Vector.__mul__(self, other)
+
+    def __abs__(self):
+        a = self._elements
+        return sqrt(a[0] * a[0] + a[1] * a[1])
+
+class Vector3(Vector):
+    """ Vector of three elements with unrolled arithmetic
+
+    >>> Vector3([1, 2, 3]) - Vector3([1, 1, 1])
+    Vector3([0, 1, 2])
+    >>> Vector3([1, 0, 0]).cross(Vector3([0, 1, 0]))
+    Vector3([0, 0, 1])
+    """
+
+    __slots__ = ()
+
+    def __init__(self, value, dtype=None):
+        Vector.__init__(self, value, dtype)
+        if len(self._elements) != 3:
+            raise VectorLengthError('a Vector3 has three elements')
+
+    def __add__(self, other):
+        if type(other) is Vector3 and self._dtype is other._dtype is None:
+            a = self._elements
+            b = other._elements
+            return Vector3._wrap([a[0] + b[0], a[1] + b[1], a[2] + b[2]])
+        return Vector.__add__(self, other)
+
+    def __sub__(self, other):
+        if type(other) is Vector3 and self._dtype is other._dtype is None:
+            a = self._elements
+            b = other._elements
+            return Vector3._wrap([a[0] - b[0], a[1] - b[1], a[2] - b[2]])
+        return Vector.__sub__(self, other)
+
+    def __mul__(self, other):
+        if self._dtype is None:
+            a = self._elements
+            if isinstance(other, Number):
+                return Vector3._wrap([a[0] * other, a[1] * other, a[2] * other])
+            if type(other) is Vector3 and other._dtype is None:
+                b = other._elements
+                return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+        return Vector.__mul__(self, other)
+
+    def __abs__(self):
+        a = self._elements
+        return sqrt(a[0] * a[0] + a[1] * a[1] + a[2] * a[2])
+
+    def cross(self, other):
+        """ Return the cross product of this vector and the other """
+        a = self._elements
+        b = other._elements if isinstance(other, Vector) else other
+        return Vector3._wrap([a[1] * b[2] - a[2] * b[1],
+                              a[2] * b[0] - a[0] * b[2],
+                              a[0] * b[1] - a[1] * b[0]])
+
+class Vector4(Vector):
+    """ Vector of four elements with unrolled arithmetic
+
+    >>> abs(Vector4([1, 1, 1, 1]) * 2)
+    4.0
+    """
+
+    __slots__ = ()
+
+    def __init__(self, value, dtype=None):
+        Vector.__init__(self, value, dtype)
+        if len(self._elements) != 4:
+            raise VectorLengthError('a Vector4 has four elements')
+
+    def __add__(self, other):
+        if type(other) is Vector4 and self._dtype is other._dtype is None:
+            a = self._elements
+            b = other._elements
+            return Vector4._wrap([a[0] + b[0], a[1] + b[1],
+                                  a[2] + b[2], a[3] + b[3]])
+        return Vector.__add__(self, other)
+
+    def __sub__(self, other):
+        if type(other) is Vector4 and self._dtype is other._dtype is None:
+            a = self._elements
+            b = other._elements
+            return Vector4._wrap([a[0] - b[0], a[1] - b[1],
+                                  a[2] - b[2], a[3] - b[3]])
+        return Vector.__sub__(self, other)
+
+    def __mul__(self, other):
+        if self._dtype is None:
+            a = self._elements
+            if isinstance(other, Number):
+                return Vector4._wrap([a[0] * other, a[1] * other,
+                                      a[2] * other, a[3] * other])
+            if type(other) is Vector4 and other._dtype is None:
+                b = other._elements
+                return a[0] * b[0] + a[1] * b[1] + a[2] * b[2] + a[3] * b[3]
+        return Vector.__mul__(self, other)
+
+    def __abs__(self):
+        a = self._elements
+        return sqrt(a[0] * a[0] + a[1] * a[1] + a[2] * a[2] + a[3] * a[3])
+
+# Fixed size classes by length, see smallVector.
+SMALL = {2: Vector2, 3: Vector3, 4: Vector4}
+
+def smallVector(value):
+    """ Return the elements as a Vector2, Vector3 or Vector4 if they fit
+
+    >>> smallVector((1, 2, 3))
+    Vector3([1, 2, 3])
+    >>> smallVector((1, 2, 3, 4, 5))
+    Vector([1, 2, 3, 4, 5])
+    """
+    elements = list(value)
+    return SMALL.get(len(elements), Vector)(elements)
+
+class VectorBatch(object):
+    """ Many Vectors of the same length in one contiguous block
+
+    The elements of all of the vectors are kept in a single array of
+    doubles, one vector after the other. Arithmetic runs over the whole
+    block at once and indexing returns Vectors that are views into the
+    block.
+    """
+
+    __slots__ = ('_data', '_dimension', '_view')
+
+    def __init__(self, value, dimension=None):
+        """ Construct a VectorBatch
+
+        If value is a number the batch holds that many vectors of all
+        0 of the given dimension. Otherwise value is an iterable of
+        vectors (Vectors, Points, lists, ...) which are copied into
+        the block.
+
+        >>> b1 = VectorBatch([[1, 2, 3], [4, 5, 6]])
+        >>> b2 = VectorBatch(2, 3)
+
+        Args:
+            value: number of vectors or iterable of vectors.
+            dimension: length of each vector, needed for a number or
+                       an empty iterable.
+        """
+        if isinstance(value, Number):
+            if dimension is None:
+                raise TypeError('a dimension is needed')
+            self._data = array('d', bytes(8 * value * dimension))
+        else:
+            vectors = [list(vector) for vector in value]
+            if dimension is None:
+                dimension = len(vectors[0]) if vectors else 0
+            for vector in vectors:
+                if len(vector) != dimension:
+                    raise VectorLengthError('vectors must have the same length')
+            self._data = array('d', chain.from_iterable(vectors))
+        self._dimension = dimension
+        self._view = memoryview(self._data)
+
+    @classmethod
+    def _fromFlat(cls, data, dimension):
+        """ Build a VectorBatch around a flat block """
+        new = cls.__new__(cls)
+        new._data = data
+        new._dimension = dimension
+        new._view = memoryview(data)
+        return new
+
+    def __repr__(self):
+        """ Return the representation of the VectorBatch
+
+        >>> VectorBatch([[1, 2], [3, 4]])
+        VectorBatch([[1.0, 2.0], [3.0, 4.0]])
+        """
+        return 'VectorBatch([' + ', '.join(str(vector) for vector in self) + '])'
+
+    def __len__(self):
+        """ Return the number of vectors in the batch
+
+        >>> len(VectorBatch([[1, 2], [3, 4], [5, 6]]))
+        3
+        """
+        if not self._dimension:
+            return 0
+        return len(self._data) // self._dimension
+
+    def dimension(self):
+        """ Return the length of each vector in the batch
+
+        >>> VectorBatch([[1, 2], [3, 4], [5, 6]]).dimension()
+        2
+        """
+        return self._dimension
+
+    def __getitem__(self, index):
+        """ Get a Vector view of the vector at the index
+
+        >>> b1 = VectorBatch([[1, 2], [3, 4]])
+        >>> v1 = b1[1]
+        >>> v1[0] = 30
+        >>> b1
+        VectorBatch([[1.0, 2.0], [30.0, 4.0]])
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('VectorBatch index out of range')
+        start = index * self._dimension
+        return Vector._wrap(self._view[start:start + self._dimension],
+                            dtypes.float64)
+
+    def __setitem__(self, index, value):
+        """ Set the vector at the index
+
+        >>> b1 = VectorBatch([[1, 2], [3, 4]])
+        >>> b1[0] = Vector([10, 20])
+        >>> b1[0]
+        Vector([10.0, 20.0])
+        """
+        if len(value) != self._dimension:
+            raise VectorLengthError('vectors must have the same length')
+        self[index]._elements[:] = array('d', value)
+
+    def __iter__(self):
+        dimension = self._dimension
+        for start in range(0, len(self._data), dimension or 1):
+            yield Vector._wrap(self._view[start:start + dimension],
+                               dtypes.float64)
+
+    def _broadcast(self, other):
+        """ Return the flat elements of other matching this batch """
+        if isinstance(other, VectorBatch):
+            if len(other._data) != len(self._data) or \
+                    other._dimension != self._dimension:
+                raise VectorLengthError('batches must have the same size')
+            return other._data
+        if len(other) != self._dimension:
+            raise VectorLengthError('vectors must have the same length')
+        return cycle(other)
+
+    def __add__(self, other):
+        """ Add a VectorBatch, or a Vector to every vector, in a new batch
+
+        >>> b1 = VectorBatch([[1, 2], [3, 4]])
+        >>> b1 + VectorBatch([[10, 20], [30, 40]])
+        VectorBatch([[11.0, 22.0], [33.0, 44.0]])
+        >>> b1 + Vector([10, 20])
+        VectorBatch([[11.0, 22.0], [13.0, 24.0]])
+        """
+        return VectorBatch._fromFlat(
+            array('d', map(add, self._data, self._broadcast(other))),
+            self._dimension)
+
+    def __sub__(self, other):
+        """ Subtract a VectorBatch, or a Vector from every vector
+
+        >>> b1 = VectorBatch([[1, 2], [3, 4]])
+        >>> b1 - Vector([1, 1])
+        VectorBatch([[0.0, 1.0], [2.0, 3.0]])
+        """
+        return VectorBatch._fromFlat(
+            array('d', map(sub, self._data, self._broadcast(other))),
+            self._dimension)
+
+    def __mul__(self, other):
+        """ Scale the batch, or return the dot products of every vector
+
+        The dot products are taken with a single Vector or pairwise
+        with the vectors of another VectorBatch.
+
+        >>> b1 = VectorBatch([[1, 2], [3, 4]])
+        >>> b1 * 2
+        VectorBatch([[2.0, 4.0], [6.0, 8.0]])
+        >>> b1 * Vector([1, 1])
+        Vector([3.0, 7.0])
+        >>> b1 * b1
+        Vector([5.0, 25.0])
+        """
+        if not hasattr(other, '__iter__'):
+            return VectorBatch._fromFlat(
+                array('d', map(mul, self._data, repeat(other))),
+                self._dimension)
+        products = array('d', map(mul, self._data, self._broadcast(other)))
+        return Vector(self._sums(products))
+
+    def __abs__(self):
+        """ Return the magnitudes of the vectors
+
+        >>> abs(VectorBatch([[3, 4], [6, 8]]))
+        Vector([5.0, 10.0])
+        """
+        return Vector(list(map(sqrt, self._sums(
+            array('d', map(mul, self._data, self._data))))))
+
+    def _sums(self, data):
+        """ Return the sum of each vector of a block shaped like this batch
+
+        The block is summed one component at a time over strided
+        slices so the loops stay in C even for short vectors.
+        """
+        dimension = self._dimension
+        if not dimension:
+            return []
+        sums = data[0::dimension]
+        for component in range(1, dimension):
+            sums = map(add, sums, data[component::dimension])
+        return list(sums)
+
 class VectorLengthError(Exception):
     def __init__(self, value):
         self.parameter = value